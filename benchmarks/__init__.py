@@ -0,0 +1,40 @@
+"""Standalone benchmarks for the todo app.
+
+Run them from the project root, e.g. ``python -m benchmarks.board_ordering``.
+Every benchmark works against a throwaway test database, never db.sqlite3.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo.settings')
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def median_ms(func, repeat=5):
+    """Runs func `repeat` times and returns the median wall time in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
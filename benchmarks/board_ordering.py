@@ -0,0 +1,84 @@
+"""Compares in-Python board sorting with database-side ordering.
+
+Usage: python -m benchmarks.board_ordering [--rows 100000]
+"""
+import argparse
+
+from benchmarks import setup, test_database, median_ms
+from benchmarks.generator import generate
+
+
+def legacy_sort(todo_lists):
+    """The pre-index board ordering: load every row and sort twice in Python."""
+    with_due_date = []
+    without_due_date = []
+
+    for todo in todo_lists:
+        if todo.due_date:
+            with_due_date.append(todo)
+        else:
+            without_due_date.append(todo)
+
+    with_due_date.sort(key=lambda todo: todo.due_date)
+    without_due_date.sort(key=lambda todo: todo.date_created)
+    return with_due_date + without_due_date
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+
+    from todoapp.models import TodoList
+    from todoapp.board import ordered_todolists
+
+    index = ['status', 'due_date', 'date_created']
+
+    with test_database() as connection:
+        generate(todos=args.rows)
+        table = TodoList._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        index_name = next(name for name, constraint in constraints.items()
+                          if constraint['index'] and constraint['columns'] == index)
+        # Plain statements rather than the schema editor, which remakes the
+        # whole table on SQLite and trips over the search index triggers.
+        drop_index = 'DROP INDEX {0}'.format(connection.ops.quote_name(index_name))
+        create_index = 'CREATE INDEX {0} ON {1} ({2})'.format(
+            connection.ops.quote_name(index_name), connection.ops.quote_name(table),
+            ', '.join(connection.ops.quote_name(column) for column in index))
+
+        print('{0} rows'.format(TodoList.objects.count()))
+        print('{0:<10} {1:>12} {2:>12} {3:>14}'.format(
+            'status', 'before (ms)', 'after (ms)', 'first 50 (ms)'))
+
+        for status, _ in TodoList.STATUS_CHOICES:
+            column = TodoList.objects.filter(status=status)
+
+            with connection.cursor() as cursor:
+                cursor.execute(drop_index)
+            before = median_ms(lambda: legacy_sort(column.all()), args.repeat)
+
+            with connection.cursor() as cursor:
+                cursor.execute(create_index)
+            after = median_ms(lambda: ordered_todolists(column.all()), args.repeat)
+            # The index lets the database stop after the first rows, which an
+            # in-Python sort never can.
+            first_page = column.filter(due_date__isnull=False).order_by('due_date', 'date_created', 'pk')
+            after_first = median_ms(lambda: list(first_page[:50]), args.repeat)
+
+            print('{0:<10} {1:>12.1f} {2:>12.1f} {3:>14.1f}'.format(status, before, after, after_first))
+
+        queryset = TodoList.objects.filter(status=TodoList.PENDING, due_date__isnull=False)
+        sql, params = queryset.order_by('due_date', 'date_created', 'pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            for row in cursor.fetchall():
+                print('plan: {0}'.format(row[-1]))
+
+
+if __name__ == '__main__':
+    main()
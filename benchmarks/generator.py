@@ -0,0 +1,76 @@
+"""Deterministic synthetic data for benchmarks.
+
+The same seed always produces the same labels and todos, relative to the
+day the data is generated.
+"""
+import random
+from datetime import timedelta
+
+
+WORDS = (
+    'buy call email write review plan fix clean book pay send order check '
+    'update prepare schedule cancel renew file sort print read draft meet '
+    'milk bread invoice report taxes garden car dentist flight hotel budget '
+    'slides contract laundry groceries insurance passport license backup '
+    'server release meeting client project team doctor school gym bank'
+).split()
+
+LABEL_NAMES = (
+    'work home chore errand finance health travel family school shopping '
+    'garden car admin hobby social reading fitness kids pets projects'
+).split()
+
+# Share of todos per status, roughly what a board looks like after a year.
+STATUS_WEIGHTS = (('Pending', 2), ('Completed', 7), ('Missed', 1))
+
+
+def sentence(rand, length):
+    return ' '.join(rand.choice(WORDS) for _ in range(length))
+
+
+def generate(labels=20, todos=10000, seed=0, batch_size=500, owner=None):
+    """Creates `labels` labels and `todos` todos with bulk_create, all
+    belonging to owner or, by default, a new user called "bench" whose
+    password is "bench". Returns the owner.
+
+    Label use is skewed (a few labels hold most todos), 60% of todos have a
+    due date that fits their status, and details range from empty to a few
+    paragraphs.
+    """
+    from django.contrib.auth.models import User
+    from todoapp.cache import bump_version
+    from todoapp.models import Label, TodoList, label_registry, local_today
+
+    rand = random.Random(seed)
+    today = local_today()
+    if owner is None:
+        owner = User.objects.create_user('bench', password='bench')
+
+    names = ('{0}-{1}'.format(LABEL_NAMES[i % len(LABEL_NAMES)], i) for i in range(labels))
+    Label.objects.bulk_create(Label(owner=owner, name=name, slug=name) for name in names)
+    label_registry.clear()
+    label_ids = list(Label.objects.filter(owner=owner).order_by('pk').values_list('pk', flat=True))
+    label_weights = [1.0 / (rank + 1) for rank in range(len(label_ids))]
+
+    statuses = [status for status, weight in STATUS_WEIGHTS for _ in range(weight)]
+
+    def todo(i):
+        status = rand.choice(statuses)
+        due_date = None
+        if rand.random() < 0.6:
+            if status == TodoList.PENDING:
+                due_date = today + timedelta(days=rand.randrange(0, 90))
+            else:
+                due_date = today - timedelta(days=rand.randrange(1, 365))
+
+        details_length = int(rand.lognormvariate(2.5, 1.0)) if rand.random() < 0.7 else 0
+        return TodoList(owner=owner, title='{0} {1}'.format(sentence(rand, rand.randint(1, 4)), i),
+                        details=sentence(rand, min(details_length, 400)),
+                        due_date=due_date,
+                        status=status,
+                        label_id=rand.choices(label_ids, label_weights)[0])
+
+    TodoList.objects.bulk_create((todo(i) for i in range(todos)), batch_size=batch_size)
+    # bulk_create sends no signals, so invalidate cached columns by hand.
+    bump_version()
+    return owner
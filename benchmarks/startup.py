@@ -0,0 +1,104 @@
+"""Cold start of todo.wsgi, with and without the production startup mode.
+
+Each run starts a fresh interpreter that imports todo.wsgi and sends it a
+few requests. It reports the import time (settings, apps and, in
+production mode, the warm-up), the first and second board requests and the
+first request for the new todo form, signed in as the board's owner.
+Medians are taken over --runs interpreters per mode.
+
+Usage: python -m benchmarks.startup [--runs 5] [--todos 2000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import setup, test_database
+from benchmarks.generator import generate
+
+
+MODES = (('lazy', '0'), ('production', '1'))
+
+
+def request_ms(application, path, cookie):
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {'PATH_INFO': path, 'HTTP_HOST': 'localhost', 'HTTP_COOKIE': cookie}
+    setup_testing_defaults(environ)
+    start = time.perf_counter()
+    response = application(environ, lambda status, headers: None)
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return (time.perf_counter() - start) * 1000
+
+
+def child(database, cookie):
+    """Runs in the fresh interpreter; prints its timings as JSON."""
+    start = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = database
+    # Render every board, so the second request shows the steady-state cost.
+    settings.TODO_BOARD_CACHE = None
+    from todo.wsgi import application
+    timings = {'import': (time.perf_counter() - start) * 1000}
+
+    timings['first board'] = request_ms(application, '/todo/', cookie)
+    timings['second board'] = request_ms(application, '/todo/', cookie)
+    timings['first form'] = request_ms(application, '/todo/new', cookie)
+    print(json.dumps(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--todos', type=int, default=2000)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--cookie', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.cookie)
+
+    setup()
+
+    from django.conf import settings
+    from django.test import Client
+
+    # The interpreters under test need a database file they can open.
+    directory = tempfile.mkdtemp()
+    settings.DATABASES['default']['TEST'] = {'NAME': os.path.join(directory, 'startup.sqlite3')}
+
+    with test_database() as connection:
+        owner = generate(todos=args.todos)
+        database = connection.settings_dict['NAME']
+        client = Client()
+        client.force_login(owner)
+        cookie = '{0}={1}'.format(settings.SESSION_COOKIE_NAME,
+                                  client.cookies[settings.SESSION_COOKIE_NAME].value)
+
+        results = {}
+        for mode, flag in MODES:
+            env = dict(os.environ, TODO_PRODUCTION_STARTUP=flag)
+            runs = [json.loads(subprocess.check_output(
+                [sys.executable, '-m', 'benchmarks.startup', '--child', database,
+                 '--cookie', cookie], env=env))
+                for _ in range(args.runs)]
+            results[mode] = {name: sorted(run[name] for run in runs)[len(runs) // 2]
+                             for name in runs[0]}
+
+    names = list(results['lazy'])
+    print('{0:<12}'.format('ms') + ''.join('{0:>14}'.format(name) for name in names))
+    for mode, _ in MODES:
+        print('{0:<12}'.format(mode) +
+              ''.join('{0:>14.1f}'.format(results[mode][name]) for name in names))
+
+
+if __name__ == '__main__':
+    main()
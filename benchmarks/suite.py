@@ -0,0 +1,214 @@
+"""Request-level benchmarks for the todo views.
+
+Generates a board with benchmarks.generator, then times each scenario with
+the test client and reports p50/p95 latency, queries per request and peak
+memory per request. Results can be saved as JSON and compared with an
+earlier run.
+
+Usage: python -m benchmarks.suite [--labels 20] [--todos 10000]
+                                  [--iterations 30] [--output results.json]
+                                  [--compare baseline.json] [--only home]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from benchmarks import setup, test_database
+from benchmarks.generator import generate
+
+
+# Untimed requests per scenario, to fill caches and connections.
+WARMUP = 2
+
+
+class Scenario(object):
+    """One kind of request; prepare() runs untimed before every request."""
+
+    def __init__(self, name, request, prepare=None, status=200):
+        self.name = name
+        self.request = request
+        self.prepare = prepare
+        self.status = status
+
+    def run(self, client, i):
+        response = self.request(client, i)
+        if response.status_code != self.status:
+            raise RuntimeError('{0}: expected {1}, got {2}'.format(
+                self.name, self.status, response.status_code))
+
+
+def scenarios(requests):
+    """Builds the scenarios; each may be run `requests` times in total."""
+    from django.urls import reverse
+    from todoapp.cache import bump_version
+    from todoapp.models import Label, TodoList
+
+    home = reverse('todoapp:home')
+    label = Label.objects.order_by('pk')[0]
+    label_id = label.pk
+    # Every mutating request gets a row of its own.
+    ids = list(TodoList.objects.filter(status=TodoList.PENDING)
+                               .order_by('pk').values_list('pk', flat=True)[:3 * requests])
+    edit_ids, complete_ids, delete_ids = (ids[n::3] for n in range(3))
+
+    def edit(client, i):
+        return client.post(reverse('todoapp:edit_todo', args=[edit_ids[i]]), {
+            'title': 'edited todo {0}'.format(i), 'details': 'edited by the benchmark',
+            'due_date': '', 'label': label_id, 'status': TodoList.PENDING})
+
+    return [
+        # A write invalidates every cached column, so the cold scenarios are
+        # what a board costs after any change.
+        Scenario('home', lambda client, i: client.get(home), prepare=bump_version),
+        Scenario('home_cached', lambda client, i: client.get(home)),
+        Scenario('home_label', lambda client, i: client.get(home, {'label': label.slug}),
+                 prepare=bump_version),
+        Scenario('home_search', lambda client, i: client.get(home, {'q': 'invoice'}),
+                 prepare=bump_version),
+        Scenario('create_todo', lambda client, i: client.post(reverse('todoapp:new_todo'), {
+            'title': 'benchmark todo {0}'.format(i), 'details': 'created by the benchmark',
+            'due_date': '', 'label': label_id, 'status': TodoList.PENDING}), status=302),
+        Scenario('edit_todo', edit, status=302),
+        Scenario('complete_todo', lambda client, i: client.get(
+            reverse('todoapp:complete_todo', args=[complete_ids[i]])), status=302),
+        Scenario('delete_todo', lambda client, i: client.post(
+            reverse('todoapp:delete_todo', args=[delete_ids[i]])), status=302),
+        Scenario('create_label', lambda client, i: client.post(reverse('todoapp:new_label'), {
+            'name': 'benchmark label {0}'.format(i)}), status=302),
+    ]
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    values = sorted(values)
+    rank = max(int(round(percent / 100.0 * len(values))), 1)
+    return values[rank - 1]
+
+
+def measure(scenario, client, connection, iterations, warmup=WARMUP):
+    from django.test.utils import CaptureQueriesContext
+
+    for i in range(warmup):
+        if scenario.prepare:
+            scenario.prepare()
+        scenario.run(client, i)
+
+    timings, queries = [], []
+    for i in range(warmup, warmup + iterations):
+        if scenario.prepare:
+            scenario.prepare()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            scenario.run(client, i)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(context.captured_queries))
+
+    # Tracing slows everything down, so memory gets a request of its own.
+    if scenario.prepare:
+        scenario.prepare()
+    tracemalloc.start()
+    try:
+        scenario.run(client, warmup + iterations)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return OrderedDict([
+        ('requests', iterations),
+        ('p50_ms', round(percentile(timings, 50), 2)),
+        ('p95_ms', round(percentile(timings, 95), 2)),
+        ('mean_ms', round(sum(timings) / len(timings), 2)),
+        ('queries', round(sum(queries) / len(queries), 1)),
+        ('peak_kb', round(peak / 1024.0, 1)),
+    ])
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    columns = ('p50_ms', 'p95_ms', 'queries', 'peak_kb')
+    print('{0:<14}'.format('scenario') + ''.join('{0:>18}'.format(column) for column in columns))
+
+    for name, result in results.items():
+        row = '{0:<14}'.format(name)
+        before = (baseline or {}).get(name)
+        for column in columns:
+            if before is None:
+                row += '{0:>18}'.format(result[column])
+            else:
+                row += '{0:>18}'.format('{0} ({1:+.0f}%)'.format(
+                    result[column], change(before[column], result[column])))
+        print(row)
+
+
+def change(before, after):
+    return (after - before) * 100.0 / before if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--labels', type=int, default=20)
+    parser.add_argument('--todos', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--only', nargs='*', metavar='SCENARIO',
+                        help='Run only these scenarios.')
+    parser.add_argument('--output', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with.')
+    args = parser.parse_args()
+
+    setup()
+
+    import django
+    from django.conf import settings
+    from django.test import Client
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['scenarios']
+
+    with test_database() as connection:
+        settings.DEBUG = False
+        owner = generate(labels=args.labels, todos=args.todos, seed=args.seed)
+        client = Client()
+        client.force_login(owner)
+
+        results = OrderedDict()
+        for scenario in scenarios(WARMUP + args.iterations + 1):
+            if not args.only or scenario.name in args.only:
+                results[scenario.name] = measure(scenario, client, connection, args.iterations)
+
+    print_results(results, baseline)
+
+    if args.output:
+        report = OrderedDict([
+            ('meta', OrderedDict([
+                ('commit', git_commit()),
+                ('labels', args.labels),
+                ('todos', args.todos),
+                ('seed', args.seed),
+                ('python', platform.python_version()),
+                ('django', django.get_version()),
+                ('database', connection.vendor),
+            ])),
+            ('scenarios', results),
+        ])
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Concurrent writes through the todo views against a SQLite file.
+
+Every thread creates, edits and completes todos through the test client.
+Exits with status 1 if any request failed with a lock error.
+
+Usage: python -m benchmarks.write_contention [--threads 16] [--writes 50] [--plain]
+
+--plain turns off the pragmas, retries and immediate transactions, to show
+what they prevent.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import setup, test_database
+from benchmarks.generator import generate
+
+
+def writer(number, writes, owner, label_id, results):
+    from django.db import OperationalError, connection
+    from django.test import Client
+    from django.urls import reverse
+    from todoapp.models import TodoList
+
+    client = Client()
+    client.force_login(owner)
+    done = errors = 0
+    try:
+        for i in range(writes):
+            title = 'thread {0} todo {1}'.format(number, i)
+            try:
+                client.post(reverse('todoapp:new_todo'), {
+                    'title': title, 'label': label_id, 'status': 'Pending', 'details': ''})
+                pk = TodoList.objects.get(title=title).pk
+                client.post(reverse('todoapp:edit_todo', args=[pk]), {
+                    'title': title, 'label': label_id, 'status': 'Pending', 'details': 'edited'})
+                client.get(reverse('todoapp:complete_todo', args=[pk]))
+                done += 3
+            except OperationalError:
+                errors += 1
+    finally:
+        connection.close()
+    results[number] = (done, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=50, help='Todos per thread.')
+    parser.add_argument('--plain', action='store_true')
+    args = parser.parse_args()
+
+    setup()
+
+    from django.conf import settings
+    from todoapp.models import Label
+
+    settings.DEBUG = False
+    if args.plain:
+        settings.TODO_SQLITE_PRAGMAS = {}
+        settings.TODO_WRITE_RETRIES = 0
+        settings.DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
+        # Python's sqlite3 waits 5 seconds by default; fail fast like SQLite.
+        settings.DATABASES['default']['OPTIONS'] = {'timeout': 0}
+    # The default in-memory test database cannot use WAL or show contention
+    # between connections.
+    directory = tempfile.mkdtemp()
+    settings.DATABASES['default']['TEST'] = {'NAME': os.path.join(directory, 'contention.sqlite3')}
+
+    with test_database():
+        owner = generate(labels=5, todos=1000)
+        label_id = Label.objects.values_list('pk', flat=True)[0]
+
+        results = {}
+        threads = [threading.Thread(target=writer, args=(n, args.writes, owner, label_id, results))
+                   for n in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    done = sum(result[0] for result in results.values())
+    errors = sum(result[1] for result in results.values())
+    print('{0} threads, {1} writes in {2:.1f}s ({3:.0f}/s), {4} lock errors'.format(
+        args.threads, done, elapsed, done / elapsed, errors))
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,86 @@
 $(document).ready(function() {
     $('select').material_select();
+
+    // Replace a column's "Load more" link with the next page of cards.
+    function loadMore(link) {
+        if (link.data('loading')) {
+            return;
+        }
+        link.data('loading', true);
+        $.get(link.attr('href'), function(html) {
+            link.replaceWith(html);
+        });
+    }
+
+    $(document).on('click', '.load-more', function(event) {
+        event.preventDefault();
+        loadMore($(this));
+    });
+
+    $(window).on('scroll', function() {
+        var bottom = $(window).scrollTop() + $(window).height();
+        $('.load-more').each(function() {
+            if ($(this).offset().top < bottom) {
+                loadMore($(this));
+            }
+        });
+    });
+
+    var board = $('#board');
+    // A filtered or searched board only updates the cards it already shows.
+    var filtered = window.location.search.length > 1;
+
+    // Moves, replaces or removes one card from a card response.
+    function patchCard(data) {
+        var card = $('#todo-' + data.id);
+        if (data.deleted) {
+            card.remove();
+            return;
+        }
+        if (filtered && !card.length) {
+            return;
+        }
+        card.remove();
+        var column = board.find('.board-column[data-status="' + data.status + '"]');
+        // New and moved cards go to the top of their column until the next reload.
+        column.children('p').first().after(data.html);
+    }
+
+    $(document).on('click', '.complete-todo', function(event) {
+        event.preventDefault();
+        $.get($(this).attr('href'), patchCard);
+    });
+
+    $(document).on('submit', '.delete-todo', function(event) {
+        event.preventDefault();
+        var form = $(this);
+        $.post(form.attr('action'), form.serialize(), patchCard);
+    });
+
+    // Follow changes made in other tabs and by other people.
+    if (board.length && window.EventSource) {
+        var cardUrl = board.data('card-url');
+        var events = new EventSource(board.data('events-url'));
+
+        events.addEventListener('todo', function(event) {
+            var data = JSON.parse(event.data);
+            if (data.ids.length > 50) {
+                window.location.reload();
+                return;
+            }
+            $.each(data.ids, function(i, id) {
+                if (data.action === 'deleted') {
+                    patchCard({id: id, deleted: true});
+                } else {
+                    $.getJSON(cardUrl.replace('/0/', '/' + id + '/'), patchCard)
+                        .fail(function() { patchCard({id: id, deleted: true}); });
+                }
+            });
+        });
+
+        events.addEventListener('reload', function() {
+            events.close();
+            window.location.reload();
+        });
+    }
 });
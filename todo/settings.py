@@ -37,24 +37,32 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.humanize',
     'todoapp',
 ]
 
+# Every request runs the whole list, board reads included. The board shows
+# the signed-in user's todos, so it needs the session and auth middleware;
+# leaving out only MessageMiddleware for reads saved nothing measurable.
 MIDDLEWARE = [
+    'todoapp.metrics.MetricsMiddleware',
+    'todoapp.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'todoapp.tenants.TenantMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'todoapp.profiling.ProfileMiddleware',
 ]
 
 ROOT_URLCONF = 'todo.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'todoapp.metrics.TimedTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -68,6 +76,23 @@ TEMPLATES = [
     },
 ]
 
+# Production startup: keep parsed templates in memory with the cached loader,
+# and warm up templates, URLs, models, forms and database connections when
+# todo.wsgi is imported (see todoapp/warmup.py), so the first requests after
+# a deploy are not slow. Edited templates then need a restart. On by default
+# when DEBUG is off; the TODO_PRODUCTION_STARTUP environment variable (0 or 1)
+# overrides that.
+TODO_PRODUCTION_STARTUP = os.environ.get('TODO_PRODUCTION_STARTUP', '0' if DEBUG else '1') == '1'
+
+if TODO_PRODUCTION_STARTUP:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'todo.wsgi.application'
 
 
@@ -76,8 +101,92 @@ WSGI_APPLICATION = 'todo.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # django.db.backends.sqlite3, with transactions that take the write
+        # lock up front; see todoapp/backends/sqlite3/base.py.
+        'ENGINE': 'todoapp.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Keep connections open across requests instead of reconnecting, and
+        # rerunning the pragmas below, on every request.
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# Run on every new SQLite connection. WAL lets readers carry on while a write
+# is in progress; NORMAL sync is safe with WAL and much cheaper than FULL;
+# busy_timeout (ms) makes a writer wait for the lock instead of failing.
+TODO_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# Views that write run in a transaction that is retried this many times, after
+# a jittered, doubling delay starting at TODO_WRITE_RETRY_DELAY seconds, when
+# SQLite reports the database as locked.
+TODO_WRITE_RETRIES = 5
+
+TODO_WRITE_RETRY_DELAY = 0.05
+
+# Board reads (todos and labels read by GET and HEAD requests) go to one of
+# these aliases; sessions, users, writes and everything else go to 'default'.
+# To try it locally, add a second SQLite file and refresh it with
+# `manage.py sync_replica`:
+#
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'replica.sqlite3'),
+#     'TEST': {'MIRROR': 'default'},
+# }
+# TODO_DB_REPLICAS = ['replica']
+TODO_DB_REPLICAS = []
+
+# Users whose todos and labels live in a database of their own, as
+# {username: alias}; see todoapp/tenants.py. Create the tables with
+# `manage.py migrate --database <alias>`:
+#
+# DATABASES['acme'] = {
+#     'ENGINE': 'todoapp.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'acme.sqlite3'),
+# }
+# TODO_TENANT_DATABASES = {'acme': 'acme'}
+TODO_TENANT_DATABASES = {}
+
+DATABASE_ROUTERS = ['todoapp.tenants.TenantRouter', 'todoapp.replicas.ReplicaRouter']
+
+# After a POST, a visitor reads from 'default' for this many seconds, so that
+# they see their own writes even while the replicas catch up.
+TODO_REPLICA_STICKY_SECONDS = 10
+
+# Optional function(alias) returning a replica's lag in seconds; replicas
+# lagging more than TODO_REPLICA_MAX_LAG are skipped until they catch up.
+# TODO_REPLICA_LAG_CHECK = 'todoapp.replicas.sqlite_file_lag'
+TODO_REPLICA_MAX_LAG = 10
+
+
+# Logging
+# https://docs.djangoproject.com/en/1.10/topics/logging/
+
+# Print the progress and rows/s of chunked data migrations (see
+# todoapp/data_migrations.py) while `manage.py migrate` runs.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'todoapp.data_migrations': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/1.10/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
@@ -115,9 +224,81 @@ USE_L10N = True
 USE_TZ = True
 
 
+# Authentication
+# Each user has their own board; visitors sign in at /accounts/login/.
+
+LOGIN_REDIRECT_URL = 'todoapp:home'
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/1.10/howto/static-files/
 
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+
+
+# Todo board
+
+# Number of todos shown per status column before "Load more". Set to None to
+# render every todo at once. Ranked search results are always shown at once.
+TODO_BOARD_PAGE_SIZE = 50
+
+# When the board is not paginated, render it from one query grouped by status
+# in Python, instead of one ordered query per status column.
+TODO_BOARD_SINGLE_QUERY = True
+
+# Send the board's page shell straight away and stream the status columns as
+# they are queried. Streamed responses carry no template context, so tests
+# and tools that inspect it need this off.
+TODO_BOARD_STREAMING = False
+
+# Number of upcoming dates a recurring todo's card shows. They are computed
+# from the rule as the card is rendered; only the current occurrence is
+# stored.
+TODO_RECURRENCE_PREVIEW = 3
+
+# Open boards follow changes through the todoapp:events stream. Each stream
+# holds a server thread; it sends a comment every TODO_EVENTS_KEEPALIVE
+# seconds so proxies keep it open, and ends after TODO_EVENTS_MAX_SECONDS,
+# when the browser reconnects.
+TODO_EVENTS_KEEPALIVE = 15
+
+TODO_EVENTS_MAX_SECONDS = 300
+
+# Cache alias holding rendered board columns, or None to render them on every
+# request. Entries are invalidated by a version bump on every write, which
+# other processes only see through a shared cache: with DEBUG off, the system
+# checks refuse a local-memory cache here.
+TODO_BOARD_CACHE = 'default'
+
+# Seconds an owner's labels stay in a process's label registry. Label changes
+# reload the registry of the process that made them at once; other processes
+# pick them up once their copy is this old.
+TODO_LABEL_REGISTRY_TTL = 30
+
+# Dotted path to the board search backend. Defaults to the SQLite FTS5 index,
+# or to plain substring matching on other databases.
+# TODO_SEARCH_BACKEND = 'todoapp.search.IContainsSearchBackend'
+
+# Record per-view latency, query counts, SQL and template time, served in the
+# Prometheus text format at todoapp:metrics.
+TODO_METRICS = True
+
+# Directory that single-request profiles are written to, or None to turn
+# profiling off. Staff can profile a request by adding ?profile=1 (or an
+# X-Profile header); anyone else needs a token from `manage.py profile_token`,
+# valid for TODO_PROFILE_TOKEN_MAX_AGE seconds.
+TODO_PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+TODO_PROFILE_TOKEN_MAX_AGE = 3600
+
+# Number of newest profiles kept in TODO_PROFILE_DIR; older ones are deleted.
+TODO_PROFILE_MAX_FILES = 100
+
+# Completed and missed todos untouched for this many days are moved to the
+# archive table by `manage.py archive_todos`, keeping the board's table small.
+TODO_ARCHIVE_AFTER_DAYS = 30
+
+# Number of archived todos per page of the archive view.
+TODO_ARCHIVE_PAGE_SIZE = 50
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/1.10/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "todo.settings")
 
 application = get_wsgi_application()
+
+if getattr(settings, 'TODO_PRODUCTION_STARTUP', False):
+    from todoapp.warmup import warm_up
+    warm_up()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import TodoList, Label
+from .models import ArchivedTodo, TodoList, Label
 
 
-admin.site.register([TodoList, Label])
+admin.site.register([TodoList, ArchivedTodo, Label])
@@ -0,0 +1,275 @@
+"""JSON API for batch changes to todos and labels.
+
+Every endpoint takes a POST with a JSON body holding up to MAX_BATCH_SIZE
+items and answers with the ids it changed plus per-item errors, keyed by the
+item's position in the batch. The number of queries per request is fixed,
+whatever the size of the batch. Requests act on the signed-in user's todos
+and labels only, and must send Content-Type: application/json and the
+CSRF token in the X-CSRFToken header.
+"""
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Value, When
+from django.forms.models import model_to_dict
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views import View
+
+from .cache import bump_version
+from .db import retry_on_lock
+from .events import publish
+from .forms import BulkLabelForm, BulkTodoForm, TodoForm
+from .models import Label, TodoList, label_registry
+from .tenants import todo_database
+
+
+MAX_BATCH_SIZE = 500
+
+
+class BatchError(Exception):
+    pass
+
+
+def load_batch(request, key):
+    """Returns the list stored under key in the JSON request body."""
+    try:
+        items = json.loads(request.body.decode('utf-8'))[key]
+    except (ValueError, KeyError, TypeError):
+        raise BatchError('Expected a JSON object with a "{0}" list.'.format(key))
+
+    if not isinstance(items, list):
+        raise BatchError('"{0}" must be a list.'.format(key))
+    if len(items) > MAX_BATCH_SIZE:
+        raise BatchError('At most {0} items per batch.'.format(MAX_BATCH_SIZE))
+    return items
+
+
+def load_objects(request, key):
+    items = load_batch(request, key)
+    if not all(isinstance(item, dict) for item in items):
+        raise BatchError('"{0}" must be a list of objects.'.format(key))
+    return items
+
+
+def load_ids(request):
+    ids = load_batch(request, 'ids')
+    if not all(isinstance(pk, int) for pk in ids):
+        raise BatchError('"ids" must be a list of integers.')
+    return ids
+
+
+def referenced_labels(items, owner):
+    """Loads every label of owner the batch refers to with a single query."""
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item['label']))
+        except (KeyError, TypeError, ValueError, OverflowError):
+            pass
+    return Label.objects.filter(owner=owner).in_bulk(ids)
+
+
+def form_errors(form):
+    return {field: list(errors) for field, errors in form.errors.items()}
+
+
+def missing_ids(ids, existing):
+    return [{'index': index, 'errors': {'id': ['No such todo.']}}
+            for index, pk in enumerate(ids) if pk not in existing]
+
+
+def batch_response(key, ids, errors):
+    return JsonResponse({key: ids,
+                         'errors': sorted(errors, key=lambda error: error['index'])})
+
+
+def recurs_on(todo):
+    """Whether saving todo should start its next occurrence."""
+    return bool(todo.recurrence) and todo.status != TodoList.PENDING
+
+
+def check_titles(forms, errors, owner):
+    """Flags titles owner has taken, or repeated within the batch.
+
+    A todo may keep its own title. A title another todo holds is taken
+    even if that todo is renamed in the same batch: the UPDATE sets rows
+    one at a time, so the old title may still be there.
+
+    Returns the forms that are still valid.
+    """
+    titles = [form.cleaned_data['title'] for form in forms.values()]
+    taken = dict(TodoList.objects.filter(owner=owner, title__in=titles).values_list('title', 'pk'))
+    seen = set()
+    valid = {}
+
+    for index, form in forms.items():
+        title = form.cleaned_data['title']
+        if taken.get(title, form.instance.pk) != form.instance.pk or title in seen:
+            errors.append({'index': index,
+                           'errors': {'title': ['Todo list with this Title already exists.']}})
+        else:
+            seen.add(title)
+            valid[index] = form
+    return valid
+
+
+class BatchView(View):
+    """Answers anonymous requests with 401 and turns batch and integrity
+    errors into 400 and 409 responses.
+
+    Each request runs in one transaction, retried while the database is
+    locked.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        if request.content_type != 'application/json':
+            return JsonResponse({'error': 'Expected Content-Type: application/json.'}, status=415)
+        try:
+            return retry_on_lock(super().dispatch)(request, *args, **kwargs)
+        except BatchError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except IntegrityError as e:
+            return JsonResponse({'error': str(e)}, status=409)
+
+
+class TodoBulkCreateView(BatchView):
+
+    def post(self, request):
+        items = load_objects(request, 'todos')
+        labels = referenced_labels(items, request.user)
+        forms, errors = {}, []
+
+        for index, item in enumerate(items):
+            form = BulkTodoForm(item, labels=labels, owner=request.user)
+            if form.is_valid():
+                forms[index] = form
+            else:
+                errors.append({'index': index, 'errors': form_errors(form)})
+
+        forms = check_titles(forms, errors, request.user)
+        titles = [form.cleaned_data['title'] for form in forms.values()]
+        finished = [form.instance.title for form in forms.values() if recurs_on(form.instance)]
+        with transaction.atomic(using=todo_database()):
+            TodoList.objects.bulk_create(form.instance for form in forms.values())
+            # SQLite does not return the new primary keys from a bulk insert.
+            ids = dict(TodoList.objects.filter(owner=request.user, title__in=titles)
+                       .values_list('title', 'pk'))
+            if finished:
+                TodoList.objects.filter(pk__in=[ids[title] for title in finished]).recur()
+        bump_version()
+        publish('saved', ids.values(), request.user.pk)
+
+        return batch_response('created', [ids[title] for title in titles], errors)
+
+
+class TodoBulkUpdateView(BatchView):
+    """Applies partial edits to many todos in one UPDATE statement."""
+
+    def post(self, request):
+        items = load_objects(request, 'todos')
+        todos = TodoList.objects.filter(owner=request.user).in_bulk(
+            [item['id'] for item in items if isinstance(item.get('id'), int)])
+        edits, errors = {}, []
+
+        for index, item in enumerate(items):
+            todo = todos.get(item.get('id'))
+            if todo is None:
+                errors.append({'index': index, 'errors': {'id': ['No such todo.']}})
+                continue
+
+            data = model_to_dict(todo, fields=TodoForm.Meta.fields)
+            data.update(item)
+            edits[index] = (todo, data)
+
+        labels = referenced_labels((data for todo, data in edits.values()), request.user)
+        forms = {}
+        for index, (todo, data) in edits.items():
+            form = BulkTodoForm(data, instance=todo, labels=labels, owner=request.user)
+            if form.is_valid():
+                forms[index] = form
+            else:
+                errors.append({'index': index, 'errors': form_errors(form)})
+
+        forms = check_titles(forms, errors, request.user)
+        if forms:
+            changes = {}
+            for field in TodoForm.Meta.fields:
+                model_field = TodoList._meta.get_field(field)
+                changes[model_field.attname] = Case(
+                    *[When(pk=form.instance.pk, then=Value(getattr(form.instance, model_field.attname)))
+                      for form in forms.values()],
+                    output_field=model_field.target_field if model_field.is_relation else model_field)
+            finished = [form.instance.pk for form in forms.values() if recurs_on(form.instance)]
+            with transaction.atomic(using=todo_database()):
+                TodoList.objects.filter(pk__in=[form.instance.pk for form in forms.values()]).update(
+                    date_modified=timezone.now(), **changes)
+                if finished:
+                    TodoList.objects.filter(pk__in=finished).recur()
+            bump_version()
+            publish('saved', [form.instance.pk for form in forms.values()], request.user.pk)
+
+        return batch_response('updated', [form.instance.pk for form in forms.values()], errors)
+
+
+class TodoBulkCompleteView(BatchView):
+
+    def post(self, request):
+        ids = load_ids(request)
+        todo_lists = TodoList.objects.filter(owner=request.user, pk__in=ids)
+        existing = set(todo_lists.values_list('pk', flat=True))
+
+        todo_lists.complete()
+        bump_version()
+        publish('saved', existing, request.user.pk)
+
+        return batch_response('completed', [pk for pk in ids if pk in existing],
+                              missing_ids(ids, existing))
+
+
+class TodoBulkDeleteView(BatchView):
+
+    def post(self, request):
+        ids = load_ids(request)
+        todo_lists = TodoList.objects.filter(owner=request.user, pk__in=ids)
+        existing = set(todo_lists.values_list('pk', flat=True))
+
+        todo_lists.delete_rows()
+        bump_version()
+        publish('deleted', existing, request.user.pk)
+
+        return batch_response('deleted', [pk for pk in ids if pk in existing],
+                              missing_ids(ids, existing))
+
+
+class LabelBulkCreateView(BatchView):
+
+    def post(self, request):
+        items = load_objects(request, 'labels')
+        forms, errors = {}, []
+
+        for index, item in enumerate(items):
+            form = BulkLabelForm(item, instance=Label(owner=request.user))
+            if form.is_valid():
+                forms[index] = form
+            else:
+                errors.append({'index': index, 'errors': form_errors(form)})
+
+        slugs = [form.instance.slug for form in forms.values()]
+        taken = set(Label.objects.filter(owner=request.user, slug__in=slugs).values_list('slug', flat=True))
+        labels = {}
+        for index, form in forms.items():
+            if not form.instance.slug or form.instance.slug in taken or form.instance.slug in labels:
+                errors.append({'index': index, 'errors': {'name': ['This label already exists.']}})
+            else:
+                labels[form.instance.slug] = form.instance
+
+        with transaction.atomic(using=todo_database()):
+            Label.objects.bulk_create(labels.values())
+        label_registry.forget(request.user.pk)
+        bump_version()
+        ids = dict(Label.objects.filter(owner=request.user, slug__in=labels).values_list('slug', 'pk'))
+
+        return batch_response('created', [ids[slug] for slug in labels], errors)
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class TodoappConfig(AppConfig):
     name = 'todoapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .cache import check_board_cache
+        checks.register(check_board_cache)
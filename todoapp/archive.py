@@ -0,0 +1,50 @@
+"""Moves long-finished todos from TodoList to the ArchivedTodo table."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import ArchivedTodo, TodoList
+
+
+# Copied as they are from each todo to its archived row.
+ARCHIVED_FIELDS = ('id', 'owner_id', 'title', 'details', 'due_date', 'label_id', 'status',
+                   'date_created', 'date_modified')
+
+
+def archivable(days=None, now=None):
+    """Completed and missed todos last modified more than `days` ago."""
+    if days is None:
+        days = getattr(settings, 'TODO_ARCHIVE_AFTER_DAYS', 30)
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return TodoList.objects.filter(status__in=[TodoList.COMPLETED, TodoList.MISSED],
+                                   date_modified__lt=cutoff)
+
+
+def archive_finished(days=None, batch_size=500, now=None):
+    """Moves archivable todos in batches, each copied and deleted in one
+    transaction.
+
+    Batches walk the primary key, so rows that stay behind are not scanned
+    again. Returns the number of todos moved.
+    """
+    todos = archivable(days, now).order_by('pk')
+    moved = last_pk = 0
+
+    while True:
+        with transaction.atomic(using=todos.db):
+            rows = list(todos.select_for_update().filter(pk__gt=last_pk)
+                        .values(*ARCHIVED_FIELDS)[:batch_size])
+            if not rows:
+                break
+            ids = [row['id'] for row in rows]
+            ArchivedTodo.objects.bulk_create(ArchivedTodo(**row) for row in rows)
+            TodoList.objects.filter(pk__in=ids).delete_rows()
+        moved += len(rows)
+        last_pk = ids[-1]
+
+    if moved:
+        bump_version()
+    return moved
@@ -0,0 +1,16 @@
+"""SQLite backend whose transactions take the write lock when they begin.
+
+Django begins transactions with a plain (deferred) BEGIN, which only takes
+the write lock at the first write. In WAL mode a transaction that has read
+and then finds that another connection committed meanwhile cannot get the
+lock at all: SQLite fails it at once, without waiting for busy_timeout.
+BEGIN IMMEDIATE waits for the lock up front instead. Every transaction in
+this project writes, so nothing is lost by it.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
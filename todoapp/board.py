@@ -0,0 +1,129 @@
+"""Queries that lay out the home board.
+
+Every column is ordered the same way: todos with a due date by due date,
+then todos without one by date created, with the primary key breaking ties.
+Pending todos whose due date has passed are shown in the Missed column until
+the sweeper persists that, so reading the board never writes.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from django.db.models import BooleanField, Case, Q, Value, When
+from django.utils import timezone
+
+from .models import TodoList
+
+
+# Columns rendered by todo_status_snippet.html.
+BOARD_FIELDS = ('title', 'details', 'due_date', 'status', 'date_created', 'recurrence',
+                'label', 'label__name', 'label__slug')
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def status_column(todo_lists, status, today):
+    """Narrows todo_lists to the todos shown in the given status column."""
+    if status == TodoList.PENDING:
+        return todo_lists.filter(Q(due_date__isnull=True) | Q(due_date__gte=today),
+                                 status=TodoList.PENDING)
+    if status == TodoList.MISSED:
+        return todo_lists.filter(Q(status=TodoList.MISSED) |
+                                 Q(status=TodoList.PENDING, due_date__lt=today))
+    return todo_lists.filter(status=status)
+
+
+def board_status(todo, today):
+    """The column a todo is shown in."""
+    if todo.status == TodoList.PENDING and todo.due_date and todo.due_date < today:
+        return TodoList.MISSED
+    return todo.status
+
+
+def ordered_todolists(todo_lists):
+    """Todos with a due date by due date, then the rest by date created.
+
+    Both halves are range scans over the (status, due_date, date_created)
+    index, so the database does the ordering without a sort step.
+    """
+    with_due_date = todo_lists.filter(due_date__isnull=False)
+    without_due_date = todo_lists.filter(due_date__isnull=True)
+
+    return (list(with_due_date.order_by('due_date', 'date_created', 'pk')) +
+            list(without_due_date.order_by('date_created', 'pk')))
+
+
+def board_by_status(todo_lists, today, ordering=()):
+    """Fetches the whole board in one query and groups it by status.
+
+    Rows come back in board order, preceded by any extra `ordering` such as
+    the search rank, so a single pass that appends each todo to its column
+    keeps every column ordered.
+    """
+    todo_lists = todo_lists.select_related('label').only(*BOARD_FIELDS).annotate(
+        no_due_date=Case(When(due_date__isnull=True, then=Value(True)),
+                         default=Value(False), output_field=BooleanField())
+    ).order_by(*ordering + ('no_due_date', 'due_date', 'date_created', 'pk'))
+
+    columns = OrderedDict((status, []) for status, _ in TodoList.STATUS_CHOICES)
+    for todo in todo_lists:
+        columns[board_status(todo, today)].append(todo)
+
+    return [{'status': status, 'todos': todos} for status, todos in columns.items()]
+
+
+def encode_cursor(todo):
+    """Encodes the board position of a todo as an opaque, URL-safe string."""
+    created = (todo.date_created - EPOCH) // timedelta(microseconds=1)
+    due_date = todo.due_date.isoformat() if todo.due_date else ''
+    return '{0}_{1}_{2}'.format(due_date, created, todo.pk)
+
+
+def decode_cursor(cursor):
+    """Returns (due_date, date_created, pk) for a cursor, or raises ValueError."""
+    due_date, created, pk = cursor.split('_')
+    if due_date:
+        due_date = datetime.strptime(due_date, '%Y-%m-%d').date()
+    return (due_date or None,
+            EPOCH + timedelta(microseconds=int(created)),
+            int(pk))
+
+
+def after(fields, values):
+    """Keyset predicate matching rows that sort after `values` on `fields`."""
+    condition = Q()
+    for i, field in enumerate(fields):
+        step = Q(**{field + '__gt': values[i]})
+        for previous_field, value in zip(fields[:i], values):
+            step &= Q(**{previous_field: value})
+        condition |= step
+    return condition
+
+
+def column_page(todo_lists, size, cursor=None):
+    """Returns the next `size` todos of a column after cursor, and a cursor
+    for the page that follows them (None on the last page).
+
+    Pages are located with keyset predicates rather than OFFSET, so deep
+    pages cost the same as the first one.
+    """
+    todo_lists = todo_lists.select_related('label').only(*BOARD_FIELDS)
+    due_date, created, pk = decode_cursor(cursor) if cursor else (None, None, None)
+    todos = []
+
+    if cursor is None or due_date is not None:
+        with_due_date = todo_lists.filter(due_date__isnull=False)
+        if cursor is not None:
+            with_due_date = with_due_date.filter(
+                after(('due_date', 'date_created', 'pk'), (due_date, created, pk)))
+        todos = list(with_due_date.order_by('due_date', 'date_created', 'pk')[:size + 1])
+
+    if len(todos) <= size:
+        without_due_date = todo_lists.filter(due_date__isnull=True)
+        if cursor is not None and due_date is None:
+            without_due_date = without_due_date.filter(
+                after(('date_created', 'pk'), (created, pk)))
+        todos += list(without_due_date.order_by('date_created', 'pk')[:size + 1 - len(todos)])
+
+    if len(todos) > size:
+        return todos[:size], encode_cursor(todos[size - 1])
+    return todos, None
@@ -0,0 +1,168 @@
+"""Cache of rendered board columns.
+
+Entries are keyed on a data version that every write to todos or labels
+bumps, so a cached column is never stale and nothing has to expire. The
+version only reaches processes sharing the cache, so with DEBUG off the
+board cache must not be a per-process backend (see check_board_cache).
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .tenants import todo_database
+
+
+VERSION_KEY = 'todoapp:board:version'
+
+# Backends whose entries live in one process, so that a version bump in one
+# worker goes unseen by the others.
+PER_PROCESS_BACKENDS = ['django.core.cache.backends.locmem.LocMemCache']
+
+# Rendered in place of the CSRF token, which differs per visitor.
+CSRF_PLACEHOLDER = 'todoapp-csrf-token-placeholder'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def board_cache():
+    """Returns the configured cache, or None when column caching is off."""
+    alias = getattr(settings, 'TODO_BOARD_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def check_board_cache(app_configs, **kwargs):
+    """System check refusing a per-process board cache outside DEBUG."""
+    alias = getattr(settings, 'TODO_BOARD_CACHE', None)
+    if not alias or settings.DEBUG:
+        return []
+    backend = settings.CACHES[alias]['BACKEND']
+    if backend in PER_PROCESS_BACKENDS:
+        return [checks.Error(
+            "TODO_BOARD_CACHE uses {0}, which other worker processes do not "
+            "share, so they would serve stale board columns.".format(backend),
+            hint="Point TODO_BOARD_CACHE at a shared cache such as memcached, "
+                 "or set it to None.",
+            id='todoapp.E001',
+        )]
+    return []
+
+
+def data_version():
+    cache = board_cache()
+    if cache is None:
+        return None
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock rather than 1 so that an evicted counter never
+        # comes back to a version that older entries were stored under.
+        cache.add(VERSION_KEY, int(time.time() * 1000))
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Invalidates every cached column."""
+    cache = board_cache()
+    if cache is None:
+        return
+
+    _incr_version(cache)
+    using = todo_database()
+    if transaction.get_connection(using).in_atomic_block:
+        # Until the write commits, other requests still read the old rows
+        # and may cache them under the new version; bump again once it is
+        # visible.
+        transaction.on_commit(lambda: _incr_version(cache), using=using)
+
+
+def _incr_version(cache):
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        data_version()
+
+
+def record(hits, misses):
+    with _stats_lock:
+        _stats['hits'] += hits
+        _stats['misses'] += misses
+
+
+def stats():
+    """Returns the hit and miss counts of this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def column_key(version, status, *variant):
+    """Cache key for a status column; variant holds filters and board mode."""
+    digest = hashlib.md5(repr(variant).encode('utf-8')).hexdigest()
+    return 'todoapp:board:{0}:{1}:{2}'.format(version, status, digest)
+
+
+def cached(name, compute, *variant):
+    """Returns a value stored under the data version, computing it on a miss."""
+    cache = board_cache()
+    if cache is None:
+        return compute()
+
+    key = column_key(data_version(), name, *variant)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, None)
+    return value
+
+
+def render_column(column):
+    return render_to_string('todoapp/todo_status_snippet.html', {
+        'status': column['status'],
+        'status_todos': column['todos'],
+        'next_url': column.get('next_url'),
+        'count': column.get('count'),
+        'csrf_token': CSRF_PLACEHOLDER,
+    })
+
+
+class ColumnCache(object):
+    """Looks up and stores the rendered columns of one board request."""
+
+    def __init__(self, request, variant):
+        self.request = request
+        self.cache = board_cache()
+        self.version = data_version()
+        self.variant = variant
+
+    def key(self, status):
+        return column_key(self.version, status, *self.variant)
+
+    def get_many(self, statuses):
+        """Returns {status: html} for the columns found in the cache."""
+        if self.cache is None:
+            return {}
+
+        found = self.cache.get_many([self.key(status) for status in statuses])
+        columns = {status: found[self.key(status)] for status in statuses if self.key(status) in found}
+        record(len(columns), len(statuses) - len(columns))
+        return columns
+
+    def render_many(self, columns):
+        """Renders columns, stores them and returns {status: html}."""
+        rendered = {column['status']: render_column(column) for column in columns}
+        if self.cache is not None:
+            self.cache.set_many({self.key(status): html for status, html in rendered.items()}, None)
+        return rendered
+
+    def finish(self, html):
+        """Puts this visitor's CSRF token into a rendered column."""
+        return mark_safe(html.replace(CSRF_PLACEHOLDER, get_token(self.request)))
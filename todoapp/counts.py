@@ -0,0 +1,83 @@
+"""Todo counts per label and status for the board badges.
+
+The counts come from the LabelStatusCount table, which triggers keep up to
+date on SQLite. On other databases the todo table is counted instead.
+"""
+from collections import Counter
+
+from django.db import connections, transaction
+from django.db.models import Count
+
+from .models import LabelStatusCount, TodoList
+from .tenants import todo_database
+
+
+def actual_counts(owner_id=None):
+    """Counts the todo table, for one owner or, by default, everyone;
+    returns {(label id, status): count}."""
+    todo_lists = TodoList.objects.order_by()
+    if owner_id is not None:
+        todo_lists = todo_lists.filter(owner_id=owner_id)
+    rows = todo_lists.values_list('label_id', 'status').annotate(Count('pk'))
+    return {(label_id, status): count for label_id, status, count in rows}
+
+
+def stored_counts(owner_id):
+    """Returns an owner's counters as {(label id, status): count}."""
+    if connections[todo_database()].vendor != 'sqlite':
+        return actual_counts(owner_id)
+
+    rows = (LabelStatusCount.objects.filter(label__owner_id=owner_id)
+            .values_list('label_id', 'status', 'count'))
+    return {(label_id, status): count for label_id, status, count in rows if count}
+
+
+def board_counts(owner_id, today=None):
+    """An owner's counts as the board shows them, with overdue pending
+    todos as missed.
+
+    Only overdue todos the sweeper has not flagged yet are counted, through
+    the (owner, status, due_date) index.
+    """
+    counts = Counter(stored_counts(owner_id))
+    overdue = (TodoList.objects.overdue(today).filter(owner_id=owner_id)
+               .order_by().values_list('label_id').annotate(Count('pk')))
+    for label_id, count in overdue:
+        counts[label_id, TodoList.PENDING] -= count
+        counts[label_id, TodoList.MISSED] += count
+    return dict(counts)
+
+
+def status_totals(counts, label_id=None):
+    """Returns {status: count}, for one label or, by default, all of them."""
+    totals = Counter()
+    for (label, status), count in counts.items():
+        if label_id is None or label == label_id:
+            totals[status] += count
+    return totals
+
+
+def label_totals(counts):
+    """Returns {label id: count}."""
+    totals = Counter()
+    for (label, status), count in counts.items():
+        totals[label] += count
+    return totals
+
+
+def drift():
+    """Returns {(label id, status): (stored, actual)} where they differ."""
+    stored = {(label_id, status): count for label_id, status, count
+              in LabelStatusCount.objects.values_list('label_id', 'status', 'count')}
+    actual = actual_counts()
+    return {key: (stored.get(key, 0), actual.get(key, 0))
+            for key in set(stored) | set(actual) if stored.get(key, 0) != actual.get(key, 0)}
+
+
+def recount():
+    """Rebuilds the counters from the todo table."""
+    with transaction.atomic(using=todo_database()):
+        LabelStatusCount.objects.all().delete()
+        LabelStatusCount.objects.bulk_create(
+            LabelStatusCount(label_id=label_id, status=status, count=count)
+            for (label_id, status), count in actual_counts().items())
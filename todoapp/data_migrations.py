@@ -0,0 +1,58 @@
+"""Chunked, resumable data migrations.
+
+Large tables are rewritten in primary-key ranges of chunk_size rows with one
+set-based statement per range, each in its own transaction. The queryset
+must select only the rows still to be changed, so finished rows drop out of
+it: a run that is interrupted starts again after the last committed range,
+and rows are never processed twice, without any progress table.
+
+Commits only happen per chunk when the caller is not already inside a
+transaction: use it from a migration with ``atomic = False`` and a
+``RunPython(..., atomic=False)`` operation. Progress is logged to the
+todoapp.data_migrations logger, which settings.LOGGING prints to the console.
+"""
+import logging
+import time
+
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_chunks(queryset, update, name, chunk_size=1000):
+    """Calls update on queryset one primary-key range at a time.
+
+    queryset selects the rows that still need the change, on the database
+    to change them in. update gets the rows of a range as a queryset and
+    returns the number of rows it changed, e.g. ``lambda rows:
+    rows.update(...)``; afterwards they must no longer match queryset.
+    name labels the run in the log.
+
+    Returns the number of rows changed.
+    """
+    using = queryset.db
+    queryset = queryset.order_by('pk')
+    start = time.time()
+    changed = 0
+    last_pk = None
+
+    while True:
+        remaining = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        # The last pk of the next range; a short final range ends at the
+        # largest pk left.
+        bounds = list(remaining.values_list('pk', flat=True)[chunk_size - 1:chunk_size])
+        if not bounds:
+            bounds = list(remaining.reverse().values_list('pk', flat=True)[:1])
+            if not bounds:
+                break
+
+        with transaction.atomic(using=using):
+            changed += update(remaining.filter(pk__lte=bounds[0]))
+        last_pk = bounds[0]
+
+        elapsed = time.time() - start
+        logger.info('%s: %d rows up to pk %s, %.0f rows/s',
+                    name, changed, last_pk, changed / elapsed if elapsed else 0)
+
+    return changed
@@ -0,0 +1,50 @@
+"""SQLite tuning and handling of write contention."""
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+from .tenants import todo_database
+
+
+def apply_pragmas(connection):
+    """Runs the TODO_SQLITE_PRAGMAS on a new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+
+    pragmas = getattr(settings, 'TODO_SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA {0} = {1}'.format(name, value))
+
+
+def is_locked(error):
+    return 'locked' in str(error)
+
+
+def retry_on_lock(func):
+    """Runs func in a transaction, retrying it while the database is locked.
+
+    Waits TODO_WRITE_RETRY_DELAY seconds, doubled after each attempt and
+    jittered, for up to TODO_WRITE_RETRIES retries. Inside an outer
+    transaction func just runs, as only the outermost one can be retried.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        using = todo_database()
+        if transaction.get_connection(using).in_atomic_block:
+            return func(*args, **kwargs)
+
+        retries = getattr(settings, 'TODO_WRITE_RETRIES', 5)
+        delay = getattr(settings, 'TODO_WRITE_RETRY_DELAY', 0.05)
+        for attempt in range(retries + 1):
+            try:
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == retries or not is_locked(e):
+                    raise
+            time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
@@ -0,0 +1,139 @@
+"""In-process publish/subscribe of todo changes, streamed as Server-Sent Events.
+
+Writes publish a `todo` event naming the action ('saved' or 'deleted') and
+the todo ids once their transaction commits. Every open event stream gets
+its own queue, fed with the events of its owner's todos. The broker lives
+in one process, so a stream only sees the writes made by the worker serving
+it; run the event stream on a single threaded worker, or reload boards on a
+timer, when there are several.
+
+Each stream holds a thread until the client leaves or TODO_EVENTS_MAX_SECONDS
+pass; browsers then reconnect with the Last-Event-ID header, and the events
+they missed are replayed from a short history. A client too far behind, or
+one whose queue overflowed, is told to reload instead.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+
+from .tenants import todo_database
+
+
+# Events kept for clients that reconnect.
+HISTORY = 100
+
+# Events queued per stream before it is told to reload instead.
+QUEUE_SIZE = 1000
+
+# Milliseconds browsers wait before reconnecting.
+RETRY_MS = 3000
+
+
+class Broker(object):
+
+    def __init__(self, history=HISTORY):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.history = deque(maxlen=history)
+        self.last_id = 0
+
+    def publish(self, name, data, owner_id=None):
+        with self.lock:
+            self.last_id += 1
+            event = (self.last_id, name, json.dumps(data))
+            self.history.append((owner_id, event))
+            for subscription in self.subscriptions:
+                if subscription.follows(owner_id):
+                    subscription.put(event)
+
+    def subscribe(self, subscription, last_event_id=None):
+        """Adds subscription, first queueing the events it missed since
+        last_event_id, or a reload event if they are no longer known."""
+        with self.lock:
+            if last_event_id is not None:
+                oldest = self.history[0][1][0] if self.history else self.last_id + 1
+                if last_event_id > self.last_id or last_event_id < oldest - 1:
+                    subscription.put((self.last_id, 'reload', '{}'))
+                else:
+                    for owner_id, event in self.history:
+                        if event[0] > last_event_id and subscription.follows(owner_id):
+                            subscription.put(event)
+            self.subscriptions.add(subscription)
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+
+broker = Broker()
+
+
+def publish(action, ids, owner_id):
+    """Announces an owner's changed todos once the current transaction
+    commits."""
+    data = {'action': action, 'ids': list(ids)}
+    if data['ids']:
+        transaction.on_commit(lambda: broker.publish('todo', data, owner_id),
+                              using=todo_database())
+
+
+def format_event(event):
+    event_id, name, data = event
+    return 'id: {0}\nevent: {1}\ndata: {2}\n\n'.format(event_id, name, data)
+
+
+class Subscription(object):
+    """One client's event stream: iterates over SSE text until the stream's
+    time is up. Closing it, as Django does with the response, unsubscribes.
+
+    Gets the events of owner_id's todos, or with None, every event.
+    """
+
+    def __init__(self, broker, last_event_id=None, owner_id=None):
+        self.broker = broker
+        self.owner_id = owner_id
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.overflowed = False
+        self.started = False
+        self.keepalive = getattr(settings, 'TODO_EVENTS_KEEPALIVE', 15)
+        self.deadline = time.monotonic() + getattr(settings, 'TODO_EVENTS_MAX_SECONDS', 300)
+        broker.subscribe(self, last_event_id)
+
+    def follows(self, owner_id):
+        return self.owner_id is None or owner_id == self.owner_id
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.started:
+            self.started = True
+            return 'retry: {0}\n\n'.format(RETRY_MS)
+        if self.overflowed:
+            self.overflowed = False
+            self.close()
+            return format_event((self.broker.last_id, 'reload', '{}'))
+
+        timeout = min(self.keepalive, self.deadline - time.monotonic())
+        if timeout <= 0:
+            self.close()
+            raise StopIteration
+        try:
+            return format_event(self.queue.get(timeout=timeout))
+        except queue.Empty:
+            return ': keepalive\n\n'
+
+    def close(self):
+        self.broker.unsubscribe(self)
+        self.deadline = 0
@@ -1,5 +1,8 @@
 from django import forms
+from django.core.exceptions import ValidationError
 from django.forms import ModelForm
+from django.forms.models import construct_instance
+from django.utils.text import slugify
 
 from .models import TodoList, Label
 
@@ -13,10 +16,28 @@ class DateInput(forms.DateInput):
 
 
 class TodoForm(ModelForm):
+    """Edits one of owner's todos, offering only owner's labels."""
+
+    def __init__(self, *args, owner=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if owner is not None:
+            self.instance.owner = owner
+            self.fields['label'].queryset = Label.objects.filter(owner=owner)
+
+    def validate_unique(self):
+        super().validate_unique()
+        # Titles are unique per owner, which the form does not edit, so the
+        # model's unique_together check is skipped above.
+        title = self.cleaned_data.get('title')
+        if title and self.instance.owner_id is not None:
+            taken = (TodoList.objects.filter(owner_id=self.instance.owner_id, title=title)
+                     .exclude(pk=self.instance.pk))
+            if taken.exists():
+                self.add_error('title', self.instance.unique_error_message(TodoList, ['title']))
 
     class Meta:
         model = TodoList
-        fields = ['title', 'details', 'due_date', 'label', 'status']
+        fields = ['title', 'details', 'due_date', 'recurrence', 'label', 'status']
         widgets = {
             'due_date': DateInput(),
             'details': forms.Textarea(
@@ -28,4 +49,60 @@ class LabelForm(ModelForm):
 
     class Meta:
         model = Label
-        fields = ['name']
\ No newline at end of file
+        fields = ['name']
+
+
+class LabelChoiceField(forms.ModelChoiceField):
+    """Resolves labels from a preloaded {pk: label} map instead of a query."""
+
+    def __init__(self, labels, *args, **kwargs):
+        self.labels = labels
+        super().__init__(Label.objects.none(), *args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.labels[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'],
+                                  code='invalid_choice')
+
+
+class BulkTodoForm(TodoForm):
+    """TodoForm for API batches.
+
+    Labels come from a map loaded once per batch and title uniqueness is
+    checked by the caller for the whole batch, so validating an item does
+    not touch the database.
+    """
+
+    def __init__(self, *args, labels=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['label'] = LabelChoiceField(labels or {})
+
+    def _get_validation_exclusions(self):
+        # The label came from the preloaded map, so the model does not need
+        # to look it up again.
+        return super()._get_validation_exclusions() + ['label']
+
+    def validate_unique(self):
+        pass
+
+
+
+class BulkLabelForm(LabelForm):
+    """LabelForm for API batches.
+
+    Slug uniqueness is checked by the caller for the whole batch, so the
+    model's clean(), which looks up each slug, is not run and validating an
+    item does not touch the database.
+    """
+
+    def _post_clean(self):
+        self.instance = construct_instance(self, self.instance, self._meta.fields)
+        self.instance.slug = slugify(self.instance.name)
+        try:
+            self.instance.clean_fields(exclude=self._get_validation_exclusions())
+        except ValidationError as e:
+            self._update_errors(e)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todoapp.archive import archive_finished
+from todoapp.tenants import for_each_database
+
+
+class Command(BaseCommand):
+    help = "Moves completed and missed todos untouched for a while to the archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=getattr(settings, 'TODO_ARCHIVE_AFTER_DAYS', 30),
+                            help='Archive todos last modified more than this many days ago.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of todos moved per transaction.')
+
+    def handle(self, *args, **options):
+        moved = sum(for_each_database(archive_finished, options['days'],
+                                      options['batch_size']).values())
+        self.stdout.write('Archived {0} todo(s).'.format(moved))
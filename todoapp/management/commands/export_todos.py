@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from todoapp.tenants import user_database, using_database
+from todoapp.transfer import FORMATS, export
+
+
+def guess_format(path, format):
+    if format:
+        return format
+    if path.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+
+def get_owner(username):
+    """The user called username, or a CommandError."""
+    try:
+        return get_user_model()._default_manager.get_by_natural_key(username)
+    except get_user_model().DoesNotExist:
+        raise CommandError('No user named {0!r}.'.format(username))
+
+
+class Command(BaseCommand):
+    help = ("Streams the labels and todos of one owner, or of everyone in the "
+            "default database, to a CSV or NDJSON file.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='Output file, or - for standard output.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Defaults to ndjson for .ndjson/.jsonl paths, csv otherwise.')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of records written at a time.')
+        parser.add_argument('--owner', help='Username whose todos are exported.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = guess_format(path, options['format'])
+        owner = get_owner(options['owner']) if options['owner'] else None
+        start = time.time()
+
+        with using_database(user_database(owner) if owner else None):
+            if path == '-':
+                count = export(self.stdout, format, options['chunk_size'], owner)
+            else:
+                with open(path, 'w', newline='', encoding='utf-8') as stream:
+                    count = export(stream, format, options['chunk_size'], owner)
+
+        elapsed = time.time() - start
+        # Progress goes to stderr so that it never ends up in a dump on stdout.
+        self.stderr.write('Exported {0} record(s) in {1:.1f}s ({2:.0f} records/s).'.format(
+            count, elapsed, count / elapsed if elapsed else count))
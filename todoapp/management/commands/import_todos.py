@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todoapp.tenants import user_database, using_database
+from todoapp.transfer import FORMATS, Importer, TransferError
+from todoapp.management.commands.export_todos import get_owner, guess_format
+
+
+class Command(BaseCommand):
+    help = ("Loads labels and todos from a CSV or NDJSON dump made by "
+            "export_todos into one owner's. Todos whose title the owner "
+            "already has are skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        # Checked in handle(), since call_command() cannot pass required options.
+        parser.add_argument('--owner', help='Username the todos are loaded for (required).')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Defaults to ndjson for .ndjson/.jsonl paths, csv otherwise.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of todos inserted per transaction.')
+
+    def handle(self, *args, **options):
+        if not options['owner']:
+            raise CommandError('Give the username to load the todos for with --owner.')
+        owner = get_owner(options['owner'])
+        start = time.time()
+
+        with using_database(user_database(owner)), \
+                open(options['path'], newline='', encoding='utf-8') as stream:
+            importer = Importer(owner, batch_size=options['batch_size'])
+            try:
+                importer.load(stream, guess_format(options['path'], options['format']))
+            except TransferError as e:
+                raise CommandError(e)
+
+        elapsed = time.time() - start
+        self.stdout.write(
+            'Imported {0} todo(s) and {1} label(s), skipped {2} existing todo(s), '
+            'in {3:.1f}s ({4:.0f} todos/s).'.format(
+                importer.created_todos, importer.created_labels, importer.skipped_todos,
+                elapsed, importer.created_todos / elapsed if elapsed else importer.created_todos))
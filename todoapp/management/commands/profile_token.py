@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todoapp.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = ("Prints a token that lets any visitor profile a request, by passing it "
+            "as ?profile=<token> or in an X-Profile header.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
+        self.stderr.write('Valid for {0} seconds.'.format(
+            getattr(settings, 'TODO_PROFILE_TOKEN_MAX_AGE', 3600)))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from todoapp.search import get_search_backend
+from todoapp.tenants import for_each_database
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index from the todo and label tables."
+
+    def handle(self, *args, **options):
+        indexed = sum(for_each_database(get_search_backend().rebuild).values())
+        self.stdout.write('Indexed {0} todo(s).'.format(indexed))
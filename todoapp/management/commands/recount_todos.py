@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from todoapp.cache import bump_version
+from todoapp.counts import drift, recount
+from todoapp.tenants import todo_databases, using_database
+
+
+class Command(BaseCommand):
+    help = "Recomputes the per-label, per-status todo counters from the todo table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report counters that drifted, and fail if there are any.")
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for alias in todo_databases():
+            with using_database(alias):
+                drifted += self.handle_database(options['check'])
+
+        if options['check']:
+            if drifted:
+                raise CommandError('{0} counter(s) drifted.'.format(drifted))
+            self.stdout.write('Counters match the todo table.')
+            return
+
+        bump_version()
+        self.stdout.write('Recounted; fixed {0} counter(s).'.format(drifted))
+
+    def handle_database(self, check):
+        """Reports the current database's drifted counters and, unless only
+        checking, recounts; returns how many drifted."""
+        drifted = drift()
+        for (label_id, status), (stored, actual) in sorted(drifted.items()):
+            self.stdout.write('Label {0}, {1}: stored {2}, actual {3}.'.format(
+                label_id, status, stored, actual))
+        if not check:
+            recount()
+        return len(drifted)
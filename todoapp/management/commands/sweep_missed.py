@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from todoapp.sweeper import sweep_missed, next_deadline
+from todoapp.tenants import for_each_database
+
+
+class Command(BaseCommand):
+    help = ("Marks overdue pending todos as missed, then sleeps until the "
+            "next due date passes and repeats.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run a single sweep and exit.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of rows flipped per UPDATE.')
+        parser.add_argument('--max-sleep', type=int, default=300,
+                            help='Upper bound in seconds between sweeps, so '
+                                 'newly created todos are picked up.')
+
+    def handle(self, *args, **options):
+        while True:
+            swept = sum(for_each_database(sweep_missed, batch_size=options['batch_size']).values())
+            if swept:
+                self.stdout.write('Marked {0} todo(s) as missed.'.format(swept))
+
+            if options['once']:
+                return
+
+            delay = options['max_sleep']
+            deadlines = [deadline for deadline in for_each_database(next_deadline).values()
+                         if deadline is not None]
+            if deadlines:
+                deadline = min(deadlines)
+                seconds_left = (deadline - timezone.now()).total_seconds()
+                delay = max(0, min(delay, seconds_left))
+            time.sleep(delay)
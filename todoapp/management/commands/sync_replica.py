@@ -0,0 +1,29 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from todoapp.replicas import replicas
+
+
+class Command(BaseCommand):
+    help = ("Copies the primary SQLite database over each replica in TODO_DB_REPLICAS, "
+            "standing in for replication when trying replicas out locally.")
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Only SQLite replicas can be synced; use real replication.')
+
+        for alias in replicas():
+            target = settings.DATABASES[alias]['NAME']
+            copy = target + '.sync'
+            if os.path.exists(copy):
+                os.remove(copy)
+            with primary.cursor() as cursor:
+                # A consistent snapshot, including pages still in the WAL.
+                cursor.execute('VACUUM INTO %s', [copy])
+            connections[alias].close()
+            os.replace(copy, target)
+            self.stdout.write('Synced {0}.'.format(alias))
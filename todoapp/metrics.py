@@ -0,0 +1,225 @@
+"""Per-view request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request, and the cursor wrapper and template
+backend below add up the SQL and template rendering done for it. Series are
+keyed by URL name, so memory stays fixed whatever the traffic.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.utils import CursorWrapper
+from django.template.backends.django import DjangoTemplates
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Views that did not resolve, such as 404s, share one series.
+UNMATCHED = 'unmatched'
+
+_local = threading.local()
+
+
+class RequestTimer(object):
+    """What the request on this thread has spent so far."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+
+
+def current_timer():
+    return getattr(_local, 'timer', None)
+
+
+class Histogram(object):
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One count per bucket plus one for +Inf, not yet cumulative.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield '{0}_bucket{{{1},le="{2}"}} {3}'.format(name, labels, bound, cumulative)
+        yield '{0}_sum{{{1}}} {2}'.format(name, labels, self.sum)
+        yield '{0}_count{{{1}}} {2}'.format(name, labels, cumulative)
+
+
+class ViewMetrics(object):
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+
+
+class Registry(object):
+    """Metrics of this process, per view."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, seconds, timer):
+        with self.lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(timer.queries)
+            metrics.sql_seconds += timer.sql_seconds
+            metrics.template_seconds += timer.template_seconds
+
+    def clear(self):
+        with self.lock:
+            self.views = {}
+
+    def exposition(self):
+        """Returns every series in the Prometheus text format."""
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = []
+
+            def family(name, kind, help_text, samples):
+                lines.append('# HELP {0} {1}'.format(name, help_text))
+                lines.append('# TYPE {0} {1}'.format(name, kind))
+                for view, metrics in views:
+                    lines.extend(samples(name, 'view="{0}"'.format(escape(view)), metrics))
+
+            family('todo_request_duration_seconds', 'histogram', 'Request latency by view.',
+                   lambda name, labels, metrics: metrics.latency.samples(name, labels))
+            family('todo_db_queries', 'histogram', 'Database queries per request by view.',
+                   lambda name, labels, metrics: metrics.queries.samples(name, labels))
+            family('todo_db_query_seconds_total', 'counter', 'Time spent in SQL by view.',
+                   lambda name, labels, metrics: ['{0}{{{1}}} {2}'.format(
+                       name, labels, metrics.sql_seconds)])
+            family('todo_template_render_seconds_total', 'counter',
+                   'Time spent rendering templates by view.',
+                   lambda name, labels, metrics: ['{0}{{{1}}} {2}'.format(
+                       name, labels, metrics.template_seconds)])
+
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+class TimedCursorWrapper(CursorWrapper):
+    """Adds the queries it runs to the current request, if there is one."""
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self.record(start)
+
+    def executemany(self, sql, param_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, param_list)
+        finally:
+            self.record(start)
+
+    def record(self, start):
+        timer = current_timer()
+        if timer is not None:
+            timer.queries += 1
+            timer.sql_seconds += time.perf_counter() - start
+
+
+def instrument(connection):
+    """Makes every cursor of connection a TimedCursorWrapper, once."""
+    if getattr(connection, 'todo_metrics', False):
+        return
+
+    make_cursor = connection.make_cursor
+    make_debug_cursor = connection.make_debug_cursor
+    connection.make_cursor = lambda cursor: TimedCursorWrapper(make_cursor(cursor), connection)
+    connection.make_debug_cursor = lambda cursor: TimedCursorWrapper(make_debug_cursor(cursor), connection)
+    connection.todo_metrics = True
+
+
+class TimedTemplates(DjangoTemplates):
+    """Django template backend that adds render time to the current request.
+
+    Only top-level renders are timed; includes happen inside them. Queries
+    run by lazy querysets during a render count towards both SQL and
+    template time.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimedTemplate(object):
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timer = current_timer()
+        if timer is None:
+            return self.template.render(context, request)
+
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timer.template_seconds += time.perf_counter() - start
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNMATCHED
+
+
+class MetricsMiddleware(object):
+    """Records latency, queries, SQL and template time of every request.
+
+    Latency stops when the view returns, so the body of a streaming response
+    is not included. Turned off by TODO_METRICS = False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TODO_METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        for connection in connections.all():
+            instrument(connection)
+
+        timer = _local.timer = RequestTimer()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.timer = None
+        registry.record(view_name(request), time.perf_counter() - start, timer)
+        return response
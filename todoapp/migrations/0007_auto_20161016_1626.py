@@ -3,41 +3,44 @@
 from __future__ import unicode_literals
 
 from django.db import migrations
+from django.db.models import Case, F, Value, When
 
+from todoapp.data_migrations import run_in_chunks
+
+
+STATUSES = [('P', 'Pending'), ('C', 'Completed'), ('M', 'Missed')]
 
-def forward(apps, schema_editor):
 
+def rename_statuses(apps, schema_editor, names, run_name):
     TodoList = apps.get_model("todoapp", "TodoList")
 
-    for todo in TodoList.objects.all():
-        if todo.status == 'P':
-            todo.status = 'Pending'
-        elif todo.status == 'C':
-            todo.status = 'Completed'
-        elif todo.status == 'M':
-            todo.status = 'Missed'
-        todo.save()
+    def update(todo_lists):
+        return todo_lists.update(status=Case(
+            *[When(status=old, then=Value(new)) for old, new in names.items()],
+            default=F('status')))
 
-def backward(apps, schema_editor):
+    todo_lists = TodoList.objects.using(schema_editor.connection.alias).filter(status__in=names)
+    run_in_chunks(todo_lists, update, run_name)
 
-    TodoList = apps.get_model("todoapp", "TodoList")
 
-    for todo in TodoList.objects.all():
-        if todo.status == 'Pending':
-            todo.status = 'P'
-        elif todo.status == 'Completed':
-            todo.status = 'C'
-        elif todo.status == 'Missed':
-            todo.status = 'M'
-        todo.save()
+def forward(apps, schema_editor):
+    rename_statuses(apps, schema_editor, dict(STATUSES), 'todoapp.0007.forward')
+
+
+def backward(apps, schema_editor):
+    rename_statuses(apps, schema_editor, {new: old for old, new in STATUSES}, 'todoapp.0007.backward')
 
 
 class Migration(migrations.Migration):
 
+    # Each chunk commits on its own, so that a large table is never locked
+    # for the whole run and an interrupted run can resume.
+    atomic = False
+
     dependencies = [
         ('todoapp', '0006_auto_20161016_1622'),
     ]
 
     operations = [
-        migrations.RunPython(forward, backward),
+        migrations.RunPython(forward, backward, atomic=False),
     ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2026-10-18 20:25
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todoapp', '0008_auto_20161022_1802'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='todolist',
+            index_together=set([('status', 'due_date', 'date_created')]),
+        ),
+    ]
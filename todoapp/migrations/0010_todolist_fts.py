@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE todoapp_todolist_fts '
+        'USING fts5(title, details, label_name)'
+    )
+    schema_editor.execute(
+        'INSERT INTO todoapp_todolist_fts (rowid, title, details, label_name) '
+        'SELECT todo.id, todo.title, todo.details, label.name '
+        'FROM todoapp_todolist todo '
+        'JOIN todoapp_label label ON label.id = todo.label_id'
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute('DROP TABLE todoapp_todolist_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todoapp', '0009_todolist_board_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# Keep the search index in step with every write, including bulk_create,
+# QuerySet.update() and bulk deletes that never send model signals.
+TRIGGERS = {
+    'todoapp_todolist_fts_insert': (
+        'AFTER INSERT ON todoapp_todolist BEGIN '
+        'INSERT INTO todoapp_todolist_fts (rowid, title, details, label_name) '
+        'SELECT NEW.id, NEW.title, NEW.details, name FROM todoapp_label WHERE id = NEW.label_id; '
+        'END'
+    ),
+    'todoapp_todolist_fts_update': (
+        'AFTER UPDATE OF title, details, label_id ON todoapp_todolist BEGIN '
+        'DELETE FROM todoapp_todolist_fts WHERE rowid = OLD.id; '
+        'INSERT INTO todoapp_todolist_fts (rowid, title, details, label_name) '
+        'SELECT NEW.id, NEW.title, NEW.details, name FROM todoapp_label WHERE id = NEW.label_id; '
+        'END'
+    ),
+    'todoapp_todolist_fts_delete': (
+        'AFTER DELETE ON todoapp_todolist BEGIN '
+        'DELETE FROM todoapp_todolist_fts WHERE rowid = OLD.id; '
+        'END'
+    ),
+    'todoapp_label_fts_update': (
+        'AFTER UPDATE OF name ON todoapp_label BEGIN '
+        'UPDATE todoapp_todolist_fts SET label_name = NEW.name '
+        'WHERE rowid IN (SELECT id FROM todoapp_todolist WHERE label_id = NEW.id); '
+        'END'
+    ),
+}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for name, body in sorted(TRIGGERS.items()):
+        schema_editor.execute('CREATE TRIGGER {0} {1}'.format(name, body))
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for name in sorted(TRIGGERS):
+        schema_editor.execute('DROP TRIGGER {0}'.format(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todoapp', '0010_todolist_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2026-10-18 20:56
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Keep the counters in step with every write to todos, in the same statement,
+# including bulk_create, QuerySet.update() and bulk deletes.
+TRIGGERS = {
+    'todoapp_todolist_count_insert': (
+        'AFTER INSERT ON todoapp_todolist BEGIN '
+        'INSERT OR IGNORE INTO todoapp_labelstatuscount (label_id, status, count) '
+        'VALUES (NEW.label_id, NEW.status, 0); '
+        'UPDATE todoapp_labelstatuscount SET count = count + 1 '
+        'WHERE label_id = NEW.label_id AND status = NEW.status; '
+        'END'
+    ),
+    'todoapp_todolist_count_update': (
+        'AFTER UPDATE OF label_id, status ON todoapp_todolist '
+        'WHEN OLD.label_id IS NOT NEW.label_id OR OLD.status IS NOT NEW.status BEGIN '
+        'UPDATE todoapp_labelstatuscount SET count = count - 1 '
+        'WHERE label_id = OLD.label_id AND status = OLD.status; '
+        'INSERT OR IGNORE INTO todoapp_labelstatuscount (label_id, status, count) '
+        'VALUES (NEW.label_id, NEW.status, 0); '
+        'UPDATE todoapp_labelstatuscount SET count = count + 1 '
+        'WHERE label_id = NEW.label_id AND status = NEW.status; '
+        'END'
+    ),
+    'todoapp_todolist_count_delete': (
+        'AFTER DELETE ON todoapp_todolist BEGIN '
+        'UPDATE todoapp_labelstatuscount SET count = count - 1 '
+        'WHERE label_id = OLD.label_id AND status = OLD.status; '
+        'END'
+    ),
+}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        'INSERT INTO todoapp_labelstatuscount (label_id, status, count) '
+        'SELECT label_id, status, COUNT(*) FROM todoapp_todolist GROUP BY label_id, status'
+    )
+    for name, body in sorted(TRIGGERS.items()):
+        schema_editor.execute('CREATE TRIGGER {0} {1}'.format(name, body))
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for name in sorted(TRIGGERS):
+        schema_editor.execute('DROP TRIGGER {0}'.format(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todoapp', '0011_todolist_fts_triggers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabelStatusCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Completed', 'Completed'), ('Missed', 'Missed')], max_length=50)),
+                ('count', models.IntegerField(default=0)),
+                ('label', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='todoapp.Label')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='labelstatuscount',
+            unique_together=set([('label', 'status')]),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import importlib
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def triggers():
+    """The search index and counter triggers, by name."""
+    found = {}
+    for name in ('0011_todolist_fts_triggers', '0012_labelstatuscount'):
+        found.update(importlib.import_module('todoapp.migrations.' + name).TRIGGERS)
+    return found
+
+
+# SQLite rebuilds a table to change its columns or constraints, which breaks
+# triggers that refer to it, so they are dropped here and recreated by 0016
+# once the owner columns are final.
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for name in sorted(triggers()):
+        schema_editor.execute('DROP TRIGGER IF EXISTS {0}'.format(name))
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for name, body in sorted(triggers().items()):
+        schema_editor.execute('CREATE TRIGGER {0} {1}'.format(name, body))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('todoapp', '0013_archivedtodo'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, create_triggers),
+        migrations.AddField(
+            model_name='label',
+            name='owner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='todo_labels', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='todolist',
+            name='owner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='todos', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedtodo',
+            name='owner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
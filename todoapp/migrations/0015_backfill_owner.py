@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import migrations
+
+from todoapp.data_migrations import run_in_chunks
+
+
+# Rows from before todos had owners go to the first superuser, or the first
+# user, or else a new user called "owner" with no usable password.
+def default_owner(apps):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    owner = (User.objects.filter(is_superuser=True).order_by('pk').first() or
+             User.objects.order_by('pk').first())
+    if owner is None:
+        owner = User.objects.create(username='owner', password=make_password(None))
+    return owner
+
+
+def forward(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    querysets = [apps.get_model('todoapp', name).objects.using(alias).filter(owner__isnull=True)
+                 for name in ('Label', 'TodoList', 'ArchivedTodo')]
+    if not any(queryset.exists() for queryset in querysets):
+        return
+
+    owner_id = default_owner(apps).pk
+    for queryset in querysets:
+        run_in_chunks(queryset, lambda rows: rows.update(owner_id=owner_id),
+                      'todoapp.0015.{0}'.format(queryset.model._meta.model_name))
+
+
+class Migration(migrations.Migration):
+
+    # Each chunk commits on its own, so that a large table is never locked
+    # for the whole run and an interrupted run can resume.
+    atomic = False
+
+    dependencies = [
+        ('todoapp', '0014_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, migrations.RunPython.noop, atomic=False),
+    ]
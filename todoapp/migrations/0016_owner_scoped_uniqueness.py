@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import importlib
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+owner = importlib.import_module('todoapp.migrations.0014_owner')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('todoapp', '0015_backfill_owner'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='label',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='todo_labels', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='label',
+            name='slug',
+            field=models.SlugField(editable=False, max_length=150),
+        ),
+        migrations.AlterUniqueTogether(
+            name='label',
+            unique_together=set([('owner', 'slug')]),
+        ),
+        migrations.AlterField(
+            model_name='todolist',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='todos', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='todolist',
+            name='title',
+            field=models.CharField(max_length=150),
+        ),
+        migrations.AlterUniqueTogether(
+            name='todolist',
+            unique_together=set([('owner', 'title')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='todolist',
+            index_together=set([('owner', 'status', 'due_date', 'date_created'), ('status', 'due_date', 'date_created')]),
+        ),
+        migrations.AlterField(
+            model_name='archivedtodo',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(owner.create_triggers, owner.drop_triggers),
+    ]
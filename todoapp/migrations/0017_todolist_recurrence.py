@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2026-10-18 21:26
+from __future__ import unicode_literals
+
+import importlib
+
+from django.db import migrations, models
+
+
+# Adding the column rebuilds the table on SQLite; see 0014.
+owner = importlib.import_module('todoapp.migrations.0014_owner')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todoapp', '0016_owner_scoped_uniqueness'),
+    ]
+
+    operations = [
+        migrations.RunPython(owner.drop_triggers, owner.create_triggers),
+        migrations.AddField(
+            model_name='todolist',
+            name='recurrence',
+            field=models.CharField(blank=True, help_text='Repeats the todo from its due date by an iCalendar rule, such as FREQ=WEEKLY;BYDAY=MO,TH.', max_length=255),
+        ),
+        migrations.RunPython(owner.create_triggers, owner.drop_triggers),
+    ]
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Chunked data migrations used to record their progress in this table,
+    # created on first use; they now resume from the rows left to change.
+    dependencies = [
+        ('todoapp', '0017_todolist_recurrence'),
+    ]
+
+    operations = [
+        migrations.RunSQL(['DROP TABLE IF EXISTS todoapp_chunk_progress'], migrations.RunSQL.noop),
+    ]
@@ -1,14 +1,29 @@
-from django.db import models
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 
+from .events import publish
+from .recurrence import following, normalize, occurrences
+from .tenants import todo_database
+
 
 class Label(models.Model):
     """Model that defines app labels."""
 
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='todo_labels')
     name = models.CharField(max_length=150)
-    slug = models.SlugField(max_length=150, unique=True, editable=False)
+    slug = models.SlugField(max_length=150, editable=False)
+
+    class Meta:
+        unique_together = [('owner', 'slug')]
 
     def raise_validation_error(self, value):
         raise ValidationError(_("This label already exists."))
@@ -16,15 +31,16 @@ class Label(models.Model):
     def clean(self):
         self.slug = slugify(self.name)
 
-        if Label.objects.filter(slug=self.slug).exists():
-            # If pk exists, object exists in db and is being edited by user.
-            if self.pk:
-                try:
-                    self.validate_unique()
-                except ValidationError:
-                    self.raise_validation_error(self.slug)
-            else:
-                self.raise_validation_error(self.slug)
+        existing = label_registry.get(self.owner_id, self.slug)
+        if existing is not None and existing.pk == self.pk:
+            return
+
+        # Only a label keeping its own slug is settled by the registry.
+        # Anything else is checked against the database, since the registry
+        # may lag behind other processes or a rolled back transaction.
+        taken = Label.objects.filter(owner_id=self.owner_id, slug=self.slug).exclude(pk=self.pk)
+        if taken.exists():
+            self.raise_validation_error(self.slug)
 
     def save(self, *args, **kwargs):
         self.clean()
@@ -34,17 +50,115 @@ class Label(models.Model):
         return self.name
 
 
+class LabelRegistry(object):
+    """Process-wide cache of each owner's labels, keyed by slug.
+
+    Labels change rarely, so an owner's labels are loaded on first use and
+    dropped whenever one of them is saved or deleted (see signals.py), after
+    which the next lookup reloads them. Those signals only reach the process
+    that made the change, so other processes also reload an owner's labels
+    once they are TODO_LABEL_REGISTRY_TTL seconds old; until then they may
+    serve labels that were renamed or deleted elsewhere.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels = {}
+
+    def _load(self, owner_id):
+        now = time.monotonic()
+        entry = self._labels.get(owner_id)
+        if entry is None or entry[0] <= now:
+            with self._lock:
+                entry = self._labels.get(owner_id)
+                if entry is None or entry[0] <= now:
+                    labels = OrderedDict((label.slug, label) for label in
+                                         Label.objects.filter(owner_id=owner_id).order_by('pk'))
+                    entry = (now + getattr(settings, 'TODO_LABEL_REGISTRY_TTL', 30), labels)
+                    self._labels[owner_id] = entry
+        return entry[1]
+
+    def all(self, owner_id):
+        return list(self._load(owner_id).values())
+
+    def get(self, owner_id, slug, reload=False):
+        """Returns the owner's label with the given slug, or None.
+
+        With reload, a miss reloads the owner's labels once, in case the
+        label was created by another process.
+        """
+        label = self._load(owner_id).get(slug)
+        if label is None and reload:
+            self.forget(owner_id)
+            label = self._load(owner_id).get(slug)
+        return label
+
+    def forget(self, owner_id):
+        with self._lock:
+            self._labels.pop(owner_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._labels = {}
+
+
+label_registry = LabelRegistry()
+
+
+def local_today():
+    """Returns today's date in the current time zone."""
+    return timezone.localtime(timezone.now()).date()
+
+
+class TodoListQuerySet(models.QuerySet):
+
+    def overdue(self, today=None):
+        """Pending todos whose due date has already passed."""
+        return self.filter(status=TodoList.PENDING,
+                           due_date__lt=today or local_today())
+
+    def complete(self):
+        """Marks every todo completed in one UPDATE; returns the row count.
+
+        Recurring todos among them go on to their next occurrence.
+        """
+        recurring = list(self.exclude(recurrence='').values_list('pk', flat=True))
+        count = self.update(status=TodoList.COMPLETED, date_modified=timezone.now())
+        if recurring:
+            TodoList.objects.filter(pk__in=recurring).recur()
+        return count
+
+    def recur(self, today=None):
+        """Creates the next occurrence of every completed or missed recurring
+        todo; returns how many were created."""
+        finished = self.using(todo_database()).exclude(status=TodoList.PENDING).exclude(recurrence='')
+        return start_next_occurrences(list(finished), today)
+
+    def delete_rows(self):
+        """Deletes every todo in one DELETE; returns the row count.
+
+        Nothing cascades from a todo, so this skips the collector, which
+        would load every row just to send post_delete for it.
+        """
+        return self._raw_delete(self.db)
+
+
 class TodoList(models.Model):
     """Core model of the app defining the ToDo list."""
 
-    title = models.CharField(max_length=150, unique=True)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='todos')
+    title = models.CharField(max_length=150)
     details = models.TextField(blank=True)
     due_date = models.DateField(blank=True, null=True)
     label = models.ForeignKey(Label)
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
+    recurrence = models.CharField(
+        max_length=255, blank=True,
+        help_text=_('Repeats the todo from its due date by an iCalendar rule, '
+                    'such as FREQ=WEEKLY;BYDAY=MO,TH.'))
 
-    objects = models.Manager()
+    objects = TodoListQuerySet.as_manager()
 
     PENDING = 'Pending'
     COMPLETED = 'Completed'
@@ -58,5 +172,118 @@ class TodoList(models.Model):
     status = models.CharField(max_length=50, choices=STATUS_CHOICES,
                               default=PENDING)
 
+    class Meta:
+        unique_together = [('owner', 'title')]
+        index_together = [
+            # Board columns of one owner, in board order.
+            ('owner', 'status', 'due_date', 'date_created'),
+            # The sweeper's scan for overdue todos across every owner.
+            ('status', 'due_date', 'date_created'),
+        ]
+
+    def clean(self):
+        if not self.recurrence:
+            return
+        if self.due_date is None:
+            raise ValidationError({'due_date': _('A recurring todo needs a due date.')})
+        try:
+            self.recurrence = normalize(self.recurrence, self.due_date)
+        except ValueError as e:
+            raise ValidationError({'recurrence': str(e)})
+
+    def save(self, *args, **kwargs):
+        if self.recurrence:
+            # Validated by clean(); a bad rule here is a programming error.
+            self.recurrence = normalize(self.recurrence, self.due_date)
+        # A todo belongs to the owner of its label unless told otherwise.
+        if self.owner_id is None and self.label_id is not None:
+            self.owner_id = self.label.owner_id
+        super().save(*args, **kwargs)
+        if self.recurrence and self.status != TodoList.PENDING:
+            start_next_occurrences([self])
+
+    def upcoming(self, today=None):
+        """The dates of the occurrences after this one, computed, not stored.
+
+        Returns at most TODO_RECURRENCE_PREVIEW dates, none of them past.
+        """
+        if not self.recurrence or self.due_date is None:
+            return []
+        start = max(self.due_date + timedelta(days=1), today or local_today())
+        return occurrences(self.recurrence, self.due_date, start,
+                           getattr(settings, 'TODO_RECURRENCE_PREVIEW', 3))
+
+    def __str__(self):
+        return self.title
+
+
+def dated_title(todo):
+    """The title of a finished occurrence, which hands its own title on."""
+    suffix = ' ({0})'.format(todo.due_date.isoformat())
+    return todo.title[:TodoList._meta.get_field('title').max_length - len(suffix)] + suffix
+
+
+def start_next_occurrences(todos, today=None):
+    """Creates the next occurrence of each finished recurring todo in todos;
+    returns how many were created.
+
+    The next occurrence is due on the rule's first date after the finished
+    one, skipping dates already past, and takes over its title and rule. The
+    finished todo stays where it is, its title dated, and no longer recurs.
+    """
+    today = today or local_today()
+    created = 0
+    with transaction.atomic(using=todo_database()):
+        for todo in todos:
+            start = max(todo.due_date + timedelta(days=1), today)
+            dates = occurrences(todo.recurrence, todo.due_date, start, 1)
+            title = dated_title(todo) if dates else todo.title
+            TodoList.objects.filter(pk=todo.pk).update(title=title, recurrence='')
+            publish('saved', [todo.pk], todo.owner_id)
+
+            if dates:
+                TodoList.objects.create(owner_id=todo.owner_id, title=todo.title, details=todo.details,
+                                        due_date=dates[0], label_id=todo.label_id,
+                                        recurrence=following(todo.recurrence))
+                created += 1
+            todo.title, todo.recurrence = title, ''
+    return created
+
+
+class LabelStatusCount(models.Model):
+    """Number of todos per label and status, for the board badges.
+
+    On SQLite, triggers on the todo table keep the counts in step with every
+    write in the same transaction; see migration 0012.
+    """
+
+    label = models.ForeignKey(Label, related_name='+')
+    status = models.CharField(max_length=50, choices=TodoList.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [('label', 'status')]
+
+    def __str__(self):
+        return '{0} {1}: {2}'.format(self.label, self.status, self.count)
+
+
+class ArchivedTodo(models.Model):
+    """A finished todo moved out of TodoList by the archive_todos command.
+
+    Keeps the todo's id and timestamps. Titles need not be unique, since a
+    new todo may reuse the title of an archived one.
+    """
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    title = models.CharField(max_length=150)
+    details = models.TextField(blank=True)
+    due_date = models.DateField(blank=True, null=True)
+    label = models.ForeignKey(Label, related_name='+')
+    status = models.CharField(max_length=50, choices=TodoList.STATUS_CHOICES)
+    date_created = models.DateTimeField()
+    date_modified = models.DateTimeField()
+    date_archived = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
         return self.title
@@ -0,0 +1,126 @@
+"""Opt-in cProfile runs of single requests.
+
+A request is profiled when it carries ``?profile=...`` or an ``X-Profile``
+header and either comes from a staff user (any value) or the value is a
+token from ``manage.py profile_token``. The profile is written to
+TODO_PROFILE_DIR as a pstats file that the admin profile page lists; only
+the newest TODO_PROFILE_MAX_FILES are kept.
+"""
+import cProfile
+import os
+import pstats
+import re
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.text import slugify
+
+
+TOKEN_SALT = 'todoapp.profiling'
+
+PROFILE_NAME = re.compile(r'^[\w-]+\.prof$')
+
+
+def profile_dir():
+    return getattr(settings, 'TODO_PROFILE_DIR', None)
+
+
+def make_token():
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def valid_token(token):
+    max_age = getattr(settings, 'TODO_PROFILE_TOKEN_MAX_AGE', 3600)
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def requested(request):
+    """Returns whether request asks for a profile and may have one."""
+    value = request.GET.get('profile') or request.META.get('HTTP_X_PROFILE')
+    if not value:
+        return False
+
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_staff) or valid_token(value)
+
+
+def profile_name(request):
+    return '{0:%Y%m%d-%H%M%S}-{1}-{2}.prof'.format(
+        datetime.now(), slugify(request.path)[:50] or 'root', uuid.uuid4().hex[:6])
+
+
+def stored_profiles(directory):
+    """Names of the stored profiles, newest first."""
+    return sorted((name for name in os.listdir(directory) if PROFILE_NAME.match(name)), reverse=True)
+
+
+def prune_profiles(directory):
+    """Deletes all but the newest TODO_PROFILE_MAX_FILES profiles."""
+    keep = getattr(settings, 'TODO_PROFILE_MAX_FILES', 100)
+    for name in stored_profiles(directory)[keep:]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            # Already pruned by another request.
+            pass
+
+
+def top_functions(path, limit=15):
+    """Returns the slowest functions of a profile by cumulative time."""
+    stats = pstats.Stats(path)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return stats.total_tt, [
+        {'function': pstats.func_std_string(function), 'calls': calls,
+         'own': own_time, 'cumulative': cumulative}
+        for function, (primitive_calls, calls, own_time, cumulative, callers) in rows[:limit]]
+
+
+def list_profiles(limit=20, functions=10):
+    """Describes the newest stored profiles, newest first."""
+    directory = profile_dir()
+    if not directory or not os.path.isdir(directory):
+        return []
+
+    profiles = []
+    for name in stored_profiles(directory)[:limit]:
+        try:
+            total, top = top_functions(os.path.join(directory, name), functions)
+        except (OSError, EOFError, ValueError, TypeError):
+            # Truncated or corrupt, e.g. still being written or pruned.
+            continue
+        profiles.append({'name': name, 'total': total, 'functions': top})
+    return profiles
+
+
+class ProfileMiddleware(object):
+    """Runs requests that ask for it under cProfile.
+
+    Requests that do not ask cost one lookup in GET and META. Turned off by
+    TODO_PROFILE_DIR = None.
+    """
+
+    def __init__(self, get_response):
+        if not profile_dir():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not requested(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+
+        os.makedirs(profile_dir(), exist_ok=True)
+        name = profile_name(request)
+        profiler.dump_stats(os.path.join(profile_dir(), name))
+        prune_profiles(profile_dir())
+        response['X-Profile'] = name
+        return response
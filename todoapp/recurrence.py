@@ -0,0 +1,200 @@
+"""Recurrence rules for repeating todos.
+
+A recurring todo holds an RFC 5545 rule such as FREQ=WEEKLY;BYDAY=MO and is
+the occurrence due on its due date. Once it is completed or missed, the next
+occurrence is created as a new todo (see TodoListQuerySet.recur); the ones
+after that are never stored, the board computes them as it shows them.
+
+Rules are expanded from a date close to the window asked for rather than
+from the first occurrence, so the cost follows the number of occurrences
+returned, not the rule's history. For that to be exact, stored rules spell
+out the day parts dateutil would otherwise take from the start date; see
+normalize(). Expansion never looks further than HORIZON_YEARS ahead, and a
+rule needs a date within that horizon of its due date to be accepted.
+"""
+import calendar
+import re
+from datetime import MAXYEAR, date, datetime, time, timedelta
+from itertools import islice
+
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rrulestr
+
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+# Parts a rule may have, in the order they are stored. Due dates have no
+# time of day, so neither do rules.
+PARTS = ('FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYMONTH', 'BYWEEKNO', 'BYYEARDAY',
+         'BYMONTHDAY', 'BYDAY', 'BYSETPOS', 'WKST')
+
+# Without any of these, dateutil picks the day from the start date.
+DAY_PARTS = ('BYWEEKNO', 'BYYEARDAY', 'BYMONTHDAY', 'BYDAY')
+
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+# How far ahead of a date the next occurrence is looked for.
+HORIZON_YEARS = 10
+
+# Rough length of each frequency in days, to bound INTERVAL by the horizon.
+PERIOD_DAYS = {'DAILY': 1, 'WEEKLY': 7, 'MONTHLY': 31, 'YEARLY': 366}
+
+UNTIL_FORMAT = re.compile(r'\d{8}(T\d{6}Z?)?$')
+
+
+def parse(rule):
+    """Splits rule into a {part: value} dict; raises ValueError."""
+    parts = {}
+    for item in rule.strip().upper().split(';'):
+        name, _, value = item.strip().partition('=')
+        if name not in PARTS or name in parts or not value:
+            raise ValueError('Unexpected {0!r} in the rule.'.format(item))
+        parts[name] = value
+
+    if parts.get('FREQ') not in FREQUENCIES:
+        raise ValueError('FREQ must be one of {0}.'.format(', '.join(FREQUENCIES)))
+    for name in ('INTERVAL', 'COUNT'):
+        if not parts.get(name, '1').isdigit() or int(parts.get(name, '1')) < 1:
+            raise ValueError('{0} must be a positive number.'.format(name))
+    if 'UNTIL' in parts:
+        try:
+            until_date(parts)
+        except ValueError:
+            raise ValueError('UNTIL must be a date such as 20121231.')
+    return parts
+
+
+def until_date(parts):
+    if not UNTIL_FORMAT.match(parts['UNTIL']):
+        raise ValueError(parts['UNTIL'])
+    return datetime.strptime(parts['UNTIL'][:8], '%Y%m%d').date()
+
+
+def format_rule(parts):
+    return ';'.join('{0}={1}'.format(name, parts[name]) for name in PARTS if name in parts)
+
+
+def horizon(day):
+    """The last date looked at for occurrences from day on."""
+    try:
+        return day + relativedelta(years=HORIZON_YEARS)
+    except ValueError:
+        return date.max
+
+
+def calendar_twin(first, last):
+    """A year close to MAXYEAR from which the years first to last repeat:
+    same leap years, so the same weekdays, with one year's margin around.
+    """
+    span = last - first
+    for year in range(MAXYEAR - span - 1, MAXYEAR - span - 401, -1):
+        if (date(year, 1, 1).weekday() == date(first, 1, 1).weekday() and
+                all(calendar.isleap(first + k) == calendar.isleap(year + k) for k in range(-1, span + 2))):
+            return year
+    # The Gregorian calendar repeats every 400 years, so this is not reached.
+    raise ValueError('No calendar twin for {0}-{1}.'.format(first, last))
+
+
+def expand(parts, first, last):
+    """Iterates over the dates of the rule from first to last, both included.
+
+    COUNT is left out: it counts the occurrences still to be created, one
+    todo at a time, rather than dates from first.
+
+    dateutil only stops at UNTIL once it has found a date past it, so a rule
+    no date matches searches on until the year 9999. The rule is therefore
+    expanded in the years just before then that share their calendar with
+    first to last, where that search runs out right after last.
+    """
+    if 'UNTIL' in parts:
+        last = min(last, until_date(parts))
+    if last < first:
+        return
+
+    shift = calendar_twin(first.year, last.year) - first.year
+    rule = rrulestr(format_rule({name: value for name, value in parts.items()
+                                 if name not in ('COUNT', 'UNTIL')}),
+                    dtstart=datetime.combine(first.replace(year=first.year + shift), time.min))
+    end = last.replace(year=last.year + shift)
+    for moment in rule:
+        day = moment.date()
+        if day > end:
+            return
+        yield day.replace(year=day.year - shift)
+
+
+def normalize(rule, due_date):
+    """Returns rule in its stored form for a todo due on due_date.
+
+    The day parts that follow from due_date are spelt out, so the rule
+    means the same whichever date it is expanded from. Raises ValueError.
+    """
+    if due_date is None:
+        raise ValueError('A recurring todo needs a due date.')
+    parts = parse(rule)
+    if not any(name in parts for name in DAY_PARTS):
+        if parts['FREQ'] == 'WEEKLY':
+            parts['BYDAY'] = WEEKDAYS[due_date.weekday()]
+        elif parts['FREQ'] == 'MONTHLY':
+            parts['BYMONTHDAY'] = str(due_date.day)
+        elif parts['FREQ'] == 'YEARLY':
+            parts.setdefault('BYMONTH', str(due_date.month))
+            parts['BYMONTHDAY'] = str(due_date.day)
+
+    if int(parts.get('INTERVAL', 1)) * PERIOD_DAYS[parts['FREQ']] > HORIZON_YEARS * 365:
+        raise ValueError('Occurrences must be at most {0} years apart.'.format(HORIZON_YEARS))
+    try:
+        first = next(expand(parts, due_date, horizon(due_date)), None)
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid rule.')
+    if first is None:
+        raise ValueError('The rule has no date in the {0} years from the due date.'.format(HORIZON_YEARS))
+    return format_rule(parts)
+
+
+def expansion_start(parts, due_date, start):
+    """The date to expand the rule from to reach start quickly.
+
+    It is due_date moved on by whole intervals, so it keeps the rule's
+    phase, and falls on or before start, in the same interval.
+    """
+    if start <= due_date:
+        return due_date
+
+    interval = int(parts.get('INTERVAL', 1))
+    freq = parts['FREQ']
+    if freq == 'DAILY':
+        return due_date + timedelta(days=(start - due_date).days // interval * interval)
+    if freq == 'WEEKLY':
+        return due_date + timedelta(weeks=(start - due_date).days // 7 // interval * interval)
+    if freq == 'MONTHLY':
+        months = (start.year - due_date.year) * 12 + start.month - due_date.month
+        return due_date.replace(day=1) + relativedelta(months=months // interval * interval)
+    years = start.year - due_date.year
+    return due_date.replace(month=1, day=1) + relativedelta(years=years // interval * interval)
+
+
+def occurrences(rule, due_date, start, count):
+    """Returns up to count dates of rule on or after start, for the series
+    whose current occurrence is due on due_date.
+
+    Costs the dates returned plus at most one interval of the rule, and
+    never looks past the horizon from start.
+    """
+    parts = parse(rule)
+    if 'COUNT' in parts:
+        # The current occurrence is one of them.
+        count = min(count, int(parts['COUNT']) - 1)
+    if count <= 0:
+        return []
+
+    dates = expand(parts, expansion_start(parts, due_date, start), horizon(start))
+    return list(islice((day for day in dates if day >= start), count))
+
+
+def following(rule):
+    """The rule carried by the next occurrence: one fewer to go, if counted."""
+    parts = parse(rule)
+    if 'COUNT' in parts:
+        parts['COUNT'] = str(int(parts['COUNT']) - 1)
+    return format_rule(parts)
@@ -0,0 +1,131 @@
+"""Read replicas for board reads.
+
+ReplicaMiddleware picks a replica for each GET or HEAD request, and
+ReplicaRouter sends that request's reads of todos and labels to it.
+Everything else (sessions, users and other apps' tables, writes,
+reads in a transaction on the primary or after a write, reads during unsafe
+requests, management commands) uses the primary.
+
+After a request that wrote to the primary, whatever its method, or any
+unsafe one, the visitor gets a cookie that pins their requests to the
+primary for TODO_REPLICA_STICKY_SECONDS, so the redirect back to the board
+shows their own change even if the replicas lag behind.
+"""
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+
+
+STICKY_COOKIE = 'todo_primary'
+
+# Seconds a replica's lag check result is reused.
+LAG_CHECK_INTERVAL = 5
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_local = threading.local()
+_lag_checks = {}
+
+
+def replicas():
+    return getattr(settings, 'TODO_DB_REPLICAS', [])
+
+
+def in_sync(alias):
+    """Returns whether alias lags by no more than TODO_REPLICA_MAX_LAG."""
+    check = getattr(settings, 'TODO_REPLICA_LAG_CHECK', None)
+    if not check:
+        return True
+
+    checked_at, ok = _lag_checks.get(alias, (None, True))
+    if checked_at is None or time.time() - checked_at > LAG_CHECK_INTERVAL:
+        lag = import_string(check)(alias)
+        ok = lag is not None and lag <= getattr(settings, 'TODO_REPLICA_MAX_LAG', 10)
+        _lag_checks[alias] = (time.time(), ok)
+    return ok
+
+
+def sqlite_file_lag(alias):
+    """Lag check for a replica that is a copy of the primary SQLite file.
+
+    Returns how much older the copy is than the primary, in seconds.
+    """
+    databases = settings.DATABASES
+    try:
+        primary = os.path.getmtime(databases[DEFAULT_DB_ALIAS]['NAME'])
+        replica = os.path.getmtime(databases[alias]['NAME'])
+    except OSError:
+        return None
+    return max(primary - replica, 0)
+
+
+def choose_replica():
+    """Returns a replica that is in sync, or None."""
+    candidates = [alias for alias in replicas() if in_sync(alias)]
+    return random.choice(candidates) if candidates else None
+
+
+def in_primary_transaction():
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class ReplicaRouter(object):
+
+    def db_for_read(self, model, **hints):
+        # Sessions and users stay on the primary, so a new session is never
+        # missing from a lagging replica; a transaction on the primary must
+        # see its own writes.
+        if model._meta.app_label != 'todoapp' or in_primary_transaction():
+            return DEFAULT_DB_ALIAS
+        return getattr(_local, 'replica', None) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Saves and deletes of instances name them; updates and the views'
+        # writes run in a transaction.
+        if 'instance' in hints or in_primary_transaction():
+            _local.wrote = True
+            _local.replica = None
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return db not in replicas()
+
+
+class ReplicaMiddleware(object):
+    """Lets safe requests read from a replica unless pinned to the primary.
+
+    Reads made while a streaming response is consumed, after the view has
+    returned, go to the primary.
+    """
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        if safe and STICKY_COOKIE not in request.COOKIES:
+            _local.replica = choose_replica()
+        _local.wrote = False
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = _local.wrote
+            _local.replica = None
+            _local.wrote = False
+
+        if wrote or not safe:
+            response.set_cookie(STICKY_COOKIE, '1', httponly=True,
+                                max_age=getattr(settings, 'TODO_REPLICA_STICKY_SECONDS', 10))
+        return response
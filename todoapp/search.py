@@ -0,0 +1,78 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import TodoList
+from .tenants import todo_database
+
+
+def match_expression(q):
+    """Turns free text into an FTS5 query that prefix-matches every word."""
+    return ' '.join('"{0}"*'.format(word) for word in re.findall(r'\w+', q))
+
+
+class IContainsSearchBackend(object):
+    """Substring search over title, details and label name, without an index."""
+
+    # Extra leading ordering for ranked results.
+    ordering = ()
+
+    def filter(self, todo_lists, q):
+        return todo_lists.filter(Q(title__icontains=q) |
+                                 Q(details__icontains=q) |
+                                 Q(label__name__icontains=q))
+
+    def rebuild(self):
+        return 0
+
+
+class FTS5SearchBackend(object):
+    """Ranked, prefix-matching search backed by an SQLite FTS5 table.
+
+    The table is created by migration 0010 and keyed on the todo's id.
+    Triggers from migration 0011 keep it in sync with every write to the
+    todo and label tables, bulk statements included.
+    """
+
+    table = 'todoapp_todolist_fts'
+    ordering = ('search_rank',)
+
+    # bm25 weights for the title, details and label_name columns.
+    weights = (10.0, 1.0, 5.0)
+
+    def filter(self, todo_lists, q):
+        expression = match_expression(q)
+        if not expression:
+            return todo_lists.none()
+
+        return todo_lists.extra(
+            select={'search_rank': 'bm25({0}, {1}, {2}, {3})'.format(self.table, *self.weights)},
+            tables=[self.table],
+            where=['{0}.rowid = {1}.id'.format(self.table, TodoList._meta.db_table),
+                   '{0} MATCH %s'.format(self.table)],
+            params=[expression],
+        )
+
+    def rebuild(self):
+        """Re-indexes every todo and returns how many were indexed."""
+        with connections[todo_database()].cursor() as cursor:
+            cursor.execute('DELETE FROM {0}'.format(self.table))
+            cursor.execute(
+                'INSERT INTO {0} (rowid, title, details, label_name) '
+                'SELECT todo.id, todo.title, todo.details, label.name '
+                'FROM todoapp_todolist todo '
+                'JOIN todoapp_label label ON label.id = todo.label_id'.format(self.table))
+            return cursor.rowcount
+
+
+def get_search_backend():
+    """Returns the configured backend, defaulting to FTS5 on SQLite."""
+    path = getattr(settings, 'TODO_SEARCH_BACKEND', None)
+    if path is None:
+        if connections[todo_database()].vendor == 'sqlite':
+            return FTS5SearchBackend()
+        return IContainsSearchBackend()
+    return import_string(path)()
@@ -0,0 +1,37 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .db import apply_pragmas
+from .events import publish
+from .models import Label, TodoList, label_registry
+
+
+@receiver(post_save, sender=TodoList)
+@receiver(post_delete, sender=TodoList)
+@receiver(post_save, sender=Label)
+@receiver(post_delete, sender=Label)
+def invalidate_board(sender, **kwargs):
+    bump_version()
+
+
+@receiver(post_save, sender=TodoList)
+def announce_saved(sender, instance, **kwargs):
+    publish('saved', [instance.pk], instance.owner_id)
+
+
+@receiver(post_delete, sender=TodoList)
+def announce_deleted(sender, instance, **kwargs):
+    publish('deleted', [instance.pk], instance.owner_id)
+
+
+@receiver(post_save, sender=Label)
+@receiver(post_delete, sender=Label)
+def reload_labels(sender, instance, **kwargs):
+    label_registry.forget(instance.owner_id)
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    apply_pragmas(connection)
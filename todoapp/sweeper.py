@@ -0,0 +1,40 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Min
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import TodoList, local_today
+
+
+def sweep_missed(batch_size=500, today=None):
+    """Flags overdue pending todos as missed in batched UPDATEs, starting
+    the next occurrence of recurring ones.
+
+    Returns the number of rows that were updated.
+    """
+    overdue = TodoList.objects.overdue(today).order_by('pk')
+    swept = 0
+
+    while True:
+        ids = list(overdue.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            if swept:
+                bump_version()
+            return swept
+        batch = TodoList.objects.filter(pk__in=ids)
+        swept += batch.update(status=TodoList.MISSED, date_modified=timezone.now())
+        batch.recur(today)
+
+
+def next_deadline(today=None):
+    """Returns the moment the next pending todo becomes overdue, or None."""
+    today = today or local_today()
+    due_date = TodoList.objects.filter(
+        status=TodoList.PENDING, due_date__gte=today
+    ).aggregate(Min('due_date'))['due_date__min']
+
+    if due_date is None:
+        return None
+    # A todo is missed once the whole of its due date has gone by.
+    return timezone.make_aware(datetime.combine(due_date + timedelta(days=1), time.min))
@@ -0,0 +1,105 @@
+"""Optional per-tenant databases for todos and labels.
+
+TODO_TENANT_DATABASES maps usernames to database aliases. TenantMiddleware
+routes each signed-in user's requests to their alias, so one large team's
+todos live in their own SQLite file and never slow down anyone else's
+queries. Everyone else, and users and sessions, stay in the default
+database.
+
+Management commands that work on todos run once per database, with
+using_database().
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, router
+
+
+_local = threading.local()
+
+
+def tenant_databases():
+    return getattr(settings, 'TODO_TENANT_DATABASES', {})
+
+
+def user_database(user):
+    """The tenant database of user, or None for the default routing."""
+    return tenant_databases().get(user.get_username())
+
+
+def todo_databases():
+    """Every database holding todos: the default one, then each tenant's."""
+    return [DEFAULT_DB_ALIAS] + sorted(set(tenant_databases().values()))
+
+
+def todo_database():
+    """The database the current request or command writes todos to."""
+    from .models import TodoList
+    return router.db_for_write(TodoList)
+
+
+@contextmanager
+def using_database(alias):
+    """Routes todo and label queries to alias for the duration."""
+    previous = getattr(_local, 'alias', None)
+    _local.alias = alias
+    try:
+        yield
+    finally:
+        _local.alias = previous
+
+
+def for_each_database(func, *args, **kwargs):
+    """Calls func once per todo database; returns {alias: result}."""
+    results = {}
+    for alias in todo_databases():
+        with using_database(alias):
+            results[alias] = func(*args, **kwargs)
+    return results
+
+
+class TenantRouter(object):
+    """Sends the todo app's models to the current tenant's database.
+
+    Returns None outside a tenant, leaving the choice to the next router.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'todoapp':
+            return getattr(_local, 'alias', None)
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Todos and labels point at users in the default database.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in tenant_databases().values():
+            return app_label == 'todoapp'
+        return None
+
+
+class TenantMiddleware(object):
+    """Routes a signed-in user's queries to their tenant database.
+
+    Goes after AuthenticationMiddleware. Queries made while a streaming
+    response is consumed, after the view has returned, need using_database()
+    around them.
+    """
+
+    def __init__(self, get_response):
+        if not tenant_databases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, 'user', None)
+        alias = user_database(user) if user is not None else None
+        if alias is None:
+            return self.get_response(request)
+        with using_database(alias):
+            return self.get_response(request)
@@ -0,0 +1,198 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from todoapp.models import Label, TodoList, label_registry
+from todoapp.search import get_search_backend
+
+
+# Queries every signed-in request makes for its session and user.
+AUTH_QUERIES = 2
+
+class BulkApiTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.label = Label.objects.create(owner=self.user, name='chore')
+        self.todo_one = TodoList.objects.create(title='todo_one', label=self.label)
+        self.todo_two = TodoList.objects.create(title='todo_two', label=self.label)
+
+    def post(self, name, data):
+        response = self.client.post(reverse(name), json.dumps(data), content_type='application/json')
+        return response.status_code, json.loads(response.content.decode('utf-8'))
+
+    def test_create_todos(self):
+        """Tests that valid todos are created and invalid ones reported by index."""
+        todos = [
+            {'title': 'new_one', 'label': self.label.id, 'status': TodoList.PENDING, 'due_date': '2012-08-14'},
+            {'title': 'todo_one', 'label': self.label.id, 'status': TodoList.PENDING},
+            {'title': 'new_two', 'label': 999, 'status': TodoList.PENDING},
+            {'title': 'new_one', 'label': self.label.id, 'status': TodoList.PENDING},
+            {'title': 'new_three', 'label': self.label.id, 'status': TodoList.COMPLETED},
+        ]
+        status, body = self.post('todoapp:api_create_todos', {'todos': todos})
+
+        self.assertEqual(status, 200)
+        self.assertEqual([error['index'] for error in body['errors']], [1, 2, 3])
+        self.assertIn('label', body['errors'][1]['errors'])
+        created = TodoList.objects.in_bulk(body['created'])
+        self.assertEqual(sorted(todo.title for todo in created.values()), ['new_one', 'new_three'])
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Tests that a batch of twenty costs the same queries as a batch of two."""
+        def batch(size, prefix):
+            return {'todos': [{'title': '{0}_{1}'.format(prefix, i), 'label': self.label.id,
+                               'status': TodoList.PENDING} for i in range(size)]}
+
+        with self.assertNumQueries(AUTH_QUERIES + 6):
+            self.post('todoapp:api_create_todos', batch(2, 'small'))
+        with self.assertNumQueries(AUTH_QUERIES + 6):
+            self.post('todoapp:api_create_todos', batch(20, 'large'))
+
+        ids = list(TodoList.objects.filter(title__startswith='large').values_list('pk', flat=True))
+        with self.assertNumQueries(AUTH_QUERIES + 3):
+            self.post('todoapp:api_complete_todos', {'ids': ids})
+        with self.assertNumQueries(AUTH_QUERIES + 2):
+            self.post('todoapp:api_delete_todos', {'ids': ids})
+
+    def test_update_todos(self):
+        """Tests that partial edits are applied and indexed for search."""
+        todos = [
+            {'id': self.todo_one.id, 'title': 'renamed', 'status': TodoList.COMPLETED},
+            {'id': self.todo_two.id, 'title': 'renamed'},
+            {'id': 999, 'title': 'missing'},
+        ]
+        status, body = self.post('todoapp:api_update_todos', {'todos': todos})
+
+        self.assertEqual(body['updated'], [self.todo_one.id])
+        self.assertEqual([error['index'] for error in body['errors']], [1, 2])
+
+        self.todo_one.refresh_from_db()
+        self.assertEqual(self.todo_one.title, 'renamed')
+        self.assertEqual(self.todo_one.status, TodoList.COMPLETED)
+        self.assertEqual(self.todo_one.label, self.label)
+
+        backend = get_search_backend()
+        self.assertEqual(list(backend.filter(TodoList.objects.all(), 'renamed')), [self.todo_one])
+
+    def test_update_to_title_of_another_todo_in_batch(self):
+        """Tests that taking the title of a todo in the same batch is a
+        per-item error, not a failed batch."""
+        todos = [
+            {'id': self.todo_one.id, 'title': 'todo_two'},
+            {'id': self.todo_two.id, 'status': TodoList.COMPLETED},
+        ]
+        status, body = self.post('todoapp:api_update_todos', {'todos': todos})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['updated'], [self.todo_two.id])
+        self.assertEqual([error['index'] for error in body['errors']], [0])
+        self.assertEqual(TodoList.objects.get(pk=self.todo_one.pk).title, 'todo_one')
+
+    def test_complete_and_delete_todos(self):
+        """Tests that todos are completed and deleted by id, reporting unknown ids."""
+        status, body = self.post('todoapp:api_complete_todos', {'ids': [self.todo_one.id, 999]})
+
+        self.assertEqual(body['completed'], [self.todo_one.id])
+        self.assertEqual(body['errors'], [{'index': 1, 'errors': {'id': ['No such todo.']}}])
+        self.todo_one.refresh_from_db()
+        self.assertEqual(self.todo_one.status, TodoList.COMPLETED)
+
+        status, body = self.post('todoapp:api_delete_todos', {'ids': [self.todo_one.id, self.todo_two.id]})
+
+        self.assertEqual(body['deleted'], [self.todo_one.id, self.todo_two.id])
+        self.assertFalse(TodoList.objects.exists())
+        self.assertEqual(list(get_search_backend().filter(TodoList.objects.all(), 'todo')), [])
+
+    def test_create_labels(self):
+        """Tests that labels are created with slugs unique across the batch and the table."""
+        labels = [{'name': 'Work'}, {'name': 'Chore'}, {'name': 'work'}, {'name': ''}]
+        status, body = self.post('todoapp:api_create_labels', {'labels': labels})
+
+        self.assertEqual([error['index'] for error in body['errors']], [1, 2, 3])
+        self.assertEqual(Label.objects.get(pk=body['created'][0]).slug, 'work')
+
+    def test_label_query_count_does_not_grow_with_batch(self):
+        """Tests that twenty labels cost the same queries as two."""
+        def batch(size, prefix):
+            return {'labels': [{'name': '{0} {1}'.format(prefix, i)} for i in range(size)]}
+
+        with self.assertNumQueries(AUTH_QUERIES + 5):
+            self.post('todoapp:api_create_labels', batch(2, 'small'))
+        with self.assertNumQueries(AUTH_QUERIES + 5):
+            self.post('todoapp:api_create_labels', batch(20, 'large'))
+        self.assertEqual(Label.objects.filter(owner=self.user).count(), 23)
+
+    def test_create_labels_keeps_other_owners_cached(self):
+        """Tests that a batch only drops its own owner's cached labels."""
+        other = User.objects.create_user('bob')
+        Label.objects.create(owner=other, name='chore')
+        self.assertEqual(len(label_registry.all(other.pk)), 1)
+        self.assertEqual(len(label_registry.all(self.user.pk)), 1)
+
+        self.post('todoapp:api_create_labels', {'labels': [{'name': 'Work'}]})
+
+        with self.assertNumQueries(0):
+            label_registry.all(other.pk)
+        self.assertEqual([label.slug for label in label_registry.all(self.user.pk)], ['chore', 'work'])
+
+    def test_malformed_batch(self):
+        """Tests that malformed bodies are rejected."""
+        self.assertEqual(self.post('todoapp:api_create_todos', {'todo': []})[0], 400)
+        self.assertEqual(self.post('todoapp:api_create_todos', {'todos': [1]})[0], 400)
+        self.assertEqual(self.post('todoapp:api_delete_todos', {'ids': ['1']})[0], 400)
+        self.assertEqual(self.post('todoapp:api_delete_todos', {'ids': list(range(501))})[0], 400)
+
+    def test_anonymous_requests_are_refused(self):
+        self.client.logout()
+        self.assertEqual(self.post('todoapp:api_delete_todos', {'ids': [self.todo_one.id]})[0], 401)
+        self.assertTrue(TodoList.objects.filter(pk=self.todo_one.pk).exists())
+
+    def test_cross_site_requests_are_refused(self):
+        """Tests that batches need the CSRF token header and a JSON content type."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        client.get(reverse('todoapp:home'))
+        token = client.cookies['csrftoken'].value
+        body = json.dumps({'ids': [self.todo_one.id]})
+        url = reverse('todoapp:api_complete_todos')
+
+        self.assertEqual(client.post(url, body, content_type='application/json').status_code, 403)
+        self.assertEqual(client.post(url, body, content_type='text/plain', HTTP_X_CSRFTOKEN=token).status_code,
+                         415)
+        self.assertEqual(TodoList.objects.get(pk=self.todo_one.pk).status, TodoList.PENDING)
+
+        response = client.post(url, body, content_type='application/json', HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TodoList.objects.get(pk=self.todo_one.pk).status, TodoList.COMPLETED)
+
+    def test_other_users_todos_and_labels_are_out_of_reach(self):
+        """Tests that batches only see the signed-in user's rows, and that
+        titles and slugs are unique per owner."""
+        other = User.objects.create_user('bob')
+        other_label = Label.objects.create(owner=other, name='chore')
+        other_todo = TodoList.objects.create(title='todo_one', label=other_label)
+
+        status, body = self.post('todoapp:api_create_todos', {'todos': [
+            {'title': 'todo_two', 'label': self.label.id, 'status': TodoList.PENDING},
+            {'title': 'stolen', 'label': other_label.id, 'status': TodoList.PENDING}]})
+        self.assertEqual([error['index'] for error in body['errors']], [0, 1])
+
+        status, body = self.post('todoapp:api_complete_todos', {'ids': [other_todo.id]})
+        self.assertEqual(body['completed'], [])
+        status, body = self.post('todoapp:api_update_todos', {'todos': [{'id': other_todo.id, 'title': 'x'}]})
+        self.assertEqual(body['updated'], [])
+        other_todo.refresh_from_db()
+        self.assertEqual((other_todo.title, other_todo.status), ('todo_one', TodoList.PENDING))
+
+        self.client.force_login(other)
+        status, body = self.post('todoapp:api_create_todos', {'todos': [
+            {'title': 'todo_two', 'label': other_label.id, 'status': TodoList.PENDING}]})
+        self.assertEqual(body['errors'], [])
+        self.assertEqual(TodoList.objects.get(pk=body['created'][0]).owner, other)
+        status, body = self.post('todoapp:api_create_labels', {'labels': [{'name': 'Work'}]})
+        self.assertEqual(Label.objects.get(pk=body['created'][0]).owner, other)
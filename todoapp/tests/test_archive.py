@@ -0,0 +1,100 @@
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from todoapp.archive import archive_finished
+from todoapp.counts import drift
+from todoapp.models import ArchivedTodo, Label, TodoList
+
+
+NOW = timezone.make_aware(datetime(2012, 3, 1))
+
+
+class ArchiveTest(TestCase):
+    """Tests that only long-finished todos move to the archive."""
+
+    def setUp(self):
+        self.label = Label.objects.create(owner=User.objects.create_user('alice'), name='chore')
+        old = timezone.make_aware(datetime(2012, 1, 1))
+        for title, status, modified in [('old_done', TodoList.COMPLETED, old),
+                                        ('old_missed', TodoList.MISSED, old),
+                                        ('old_pending', TodoList.PENDING, old),
+                                        ('recent_done', TodoList.COMPLETED, NOW)]:
+            todo = TodoList.objects.create(title=title, label=self.label, status=status,
+                                           details='details of ' + title)
+            TodoList.objects.filter(pk=todo.pk).update(date_modified=modified)
+
+    def test_moves_finished_todos(self):
+        todo = TodoList.objects.get(title='old_done')
+
+        self.assertEqual(archive_finished(days=30, batch_size=1, now=NOW), 2)
+
+        self.assertQuerysetEqual(TodoList.objects.all(),
+                                 ['<TodoList: old_pending>', '<TodoList: recent_done>'],
+                                 ordered=False)
+        archived = ArchivedTodo.objects.get(title='old_done')
+        self.assertEqual((archived.pk, archived.owner_id, archived.status, archived.details,
+                          archived.date_created),
+                         (todo.pk, todo.owner_id, todo.status, todo.details, todo.date_created))
+        self.assertEqual(ArchivedTodo.objects.count(), 2)
+        self.assertEqual(drift(), {})
+        self.assertEqual(archive_finished(days=30, now=NOW), 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_todos', '--days', '0', stdout=out)
+
+        self.assertIn('Archived 3 todo(s).', out.getvalue())
+        self.assertEqual(TodoList.objects.get().title, 'old_pending')
+
+
+@override_settings(TODO_ARCHIVE_PAGE_SIZE=2)
+class ArchiveViewTest(TestCase):
+    """Tests that the archive view searches and pages archived todos."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.client.force_login(self.user)
+        self.label = Label.objects.create(owner=self.user, name='chore')
+        for i in range(5):
+            ArchivedTodo.objects.create(owner=self.user, title='archived {0}'.format(i), label=self.label,
+                                        status=TodoList.COMPLETED, date_created=NOW,
+                                        date_modified=NOW)
+
+    def test_pages_newest_first(self):
+        response = self.client.get(reverse('todoapp:archive'))
+        self.assertEqual([todo.title for todo in response.context['todos']],
+                         ['archived 4', 'archived 3'])
+
+        response = self.client.get(response.context['next_url'])
+        self.assertEqual([todo.title for todo in response.context['todos']],
+                         ['archived 2', 'archived 1'])
+
+    def test_search(self):
+        response = self.client.get(reverse('todoapp:archive'), {'q': 'archived 3'})
+
+        self.assertEqual([todo.title for todo in response.context['todos']], ['archived 3'])
+        self.assertIsNone(response.context['next_url'])
+
+    def test_shows_own_archive(self):
+        other = User.objects.create_user('bob')
+        ArchivedTodo.objects.create(owner=other, title='archived 5', status=TodoList.COMPLETED,
+                                    label=Label.objects.create(owner=other, name='chore'),
+                                    date_created=NOW, date_modified=NOW)
+
+        response = self.client.get(reverse('todoapp:archive'))
+        self.assertEqual([todo.title for todo in response.context['todos']],
+                         ['archived 4', 'archived 3'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('todoapp:archive'), {'before': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_home_board_ignores_archive(self):
+        response = self.client.get(reverse('todoapp:home'))
+        self.assertNotContains(response, 'archived 1')
@@ -0,0 +1,115 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from todoapp.counts import actual_counts, board_counts, drift, status_totals, stored_counts
+from todoapp.models import Label, LabelStatusCount, TodoList
+from todoapp.sweeper import sweep_missed
+
+
+class CountersTest(TestCase):
+    """Tests that the counters follow every kind of write to the todo table."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.chore = Label.objects.create(owner=self.user, name='chore')
+        self.work = Label.objects.create(owner=self.user, name='work')
+
+    def assertCountsMatch(self):
+        self.assertEqual(stored_counts(self.user.pk), actual_counts(self.user.pk))
+        self.assertEqual(drift(), {})
+
+    def test_create_update_and_delete(self):
+        todo = TodoList.objects.create(title='one', label=self.chore)
+        TodoList.objects.create(title='two', label=self.chore)
+        self.assertEqual(stored_counts(self.user.pk), {(self.chore.pk, TodoList.PENDING): 2})
+
+        todo.status = TodoList.COMPLETED
+        todo.save()
+        todo.label = self.work
+        todo.save()
+        self.assertEqual(stored_counts(self.user.pk), {(self.chore.pk, TodoList.PENDING): 1,
+                                           (self.work.pk, TodoList.COMPLETED): 1})
+
+        todo.delete()
+        self.assertCountsMatch()
+
+    def test_bulk_writes(self):
+        TodoList.objects.bulk_create(
+            TodoList(owner=self.user, title='todo {0}'.format(i), label=self.chore) for i in range(10))
+        TodoList.objects.filter(title__in=['todo 1', 'todo 2']).complete()
+        TodoList.objects.filter(title='todo 3').update(label=self.work)
+        TodoList.objects.filter(title__in=['todo 4', 'todo 5']).delete_rows()
+
+        self.assertEqual(stored_counts(self.user.pk), {(self.chore.pk, TodoList.PENDING): 5,
+                                           (self.chore.pk, TodoList.COMPLETED): 2,
+                                           (self.work.pk, TodoList.PENDING): 1})
+        self.assertCountsMatch()
+
+    def test_sweeper(self):
+        TodoList.objects.create(title='late', label=self.chore, due_date=date(2012, 1, 1))
+        sweep_missed(today=date(2012, 1, 14))
+
+        self.assertEqual(stored_counts(self.user.pk), {(self.chore.pk, TodoList.MISSED): 1})
+
+    def test_board_counts_treat_overdue_as_missed(self):
+        TodoList.objects.create(title='late', label=self.chore, due_date=date(2012, 1, 1))
+        TodoList.objects.create(title='later', label=self.chore, due_date=date(2012, 2, 1))
+
+        totals = status_totals(board_counts(self.user.pk, date(2012, 1, 14)))
+        self.assertEqual(totals[TodoList.PENDING], 1)
+        self.assertEqual(totals[TodoList.MISSED], 1)
+
+    def test_counts_are_per_owner(self):
+        other = User.objects.create_user('bob')
+        errand = Label.objects.create(owner=other, name='chore')
+        TodoList.objects.create(title='mine', label=self.chore)
+        TodoList.objects.create(title='theirs', label=errand, due_date=date(2012, 1, 1))
+
+        self.assertEqual(board_counts(self.user.pk, date(2012, 1, 14)),
+                         {(self.chore.pk, TodoList.PENDING): 1})
+        self.assertEqual(board_counts(other.pk, date(2012, 1, 14)),
+                         {(errand.pk, TodoList.PENDING): 0, (errand.pk, TodoList.MISSED): 1})
+        self.assertCountsMatch()
+
+
+class RecountCommandTest(TestCase):
+    """Tests that recount_todos finds and fixes drifted counters."""
+
+    def setUp(self):
+        label = Label.objects.create(owner=User.objects.create_user('alice'), name='chore')
+        TodoList.objects.create(title='one', label=label)
+        LabelStatusCount.objects.filter(label=label).update(count=7)
+
+    def test_check_reports_drift(self):
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('recount_todos', '--check', stdout=out)
+        self.assertIn('stored 7, actual 1', out.getvalue())
+
+    def test_recount_fixes_drift(self):
+        out = StringIO()
+        call_command('recount_todos', stdout=out)
+
+        self.assertIn('fixed 1 counter(s)', out.getvalue())
+        self.assertEqual(drift(), {})
+        call_command('recount_todos', '--check', stdout=out)
+
+
+class BadgeTest(TestCase):
+    """Tests that the board shows the counts next to labels and columns."""
+
+    def test_badges(self):
+        user = User.objects.create_user('alice')
+        label = Label.objects.create(owner=user, name='chore')
+        for i in range(3):
+            TodoList.objects.create(title='todo {0}'.format(i), label=label)
+
+        self.client.force_login(user)
+        response = self.client.get(reverse('todoapp:home'))
+        self.assertEqual(response.context['label_chips'], [(label, 3)])
+        self.assertContains(response, '(3)')
@@ -0,0 +1,108 @@
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from todoapp.data_migrations import run_in_chunks
+from todoapp.models import Label, TodoList
+
+
+class RunInChunksTest(TestCase):
+    """Tests that chunked runs cover every row once and can resume."""
+
+    def setUp(self):
+        label = Label.objects.create(owner=User.objects.create_user('alice'), name='label_one')
+        TodoList.objects.bulk_create(TodoList(owner=label.owner, title='todo_{0}'.format(i), label=label)
+                                     for i in range(10))
+        self.pending = TodoList.objects.filter(status=TodoList.PENDING)
+        self.chunks = []
+
+    def complete(self, todo_lists):
+        self.chunks.append(sorted(todo_lists.values_list('pk', flat=True)))
+        return todo_lists.update(status=TodoList.COMPLETED)
+
+    def test_updates_every_row_in_chunks(self):
+        with self.assertLogs('todoapp.data_migrations', 'INFO') as logs:
+            done = run_in_chunks(self.pending, self.complete, 'test', chunk_size=4)
+
+        self.assertEqual(done, 10)
+        self.assertEqual([len(chunk) for chunk in self.chunks], [4, 4, 2])
+        self.assertFalse(TodoList.objects.exclude(status=TodoList.COMPLETED).exists())
+        self.assertEqual(len(logs.output), 3)
+        self.assertRegex(logs.output[-1], r'test: 10 rows up to pk \d+, \d+ rows/s')
+
+    def test_resumes_after_last_finished_chunk(self):
+        def fail_on_second_chunk(todo_lists):
+            if self.chunks:
+                raise RuntimeError('interrupted')
+            return self.complete(todo_lists)
+
+        with self.assertRaises(RuntimeError), self.assertLogs('todoapp.data_migrations', 'INFO'):
+            run_in_chunks(self.pending, fail_on_second_chunk, 'test', chunk_size=4)
+        self.assertEqual(TodoList.objects.filter(status=TodoList.COMPLETED).count(), 4)
+
+        with self.assertLogs('todoapp.data_migrations', 'INFO'):
+            done = run_in_chunks(self.pending, self.complete, 'test', chunk_size=4)
+
+        self.assertEqual(done, 6)
+        # No row was handed to update twice.
+        pks = [pk for chunk in self.chunks for pk in chunk]
+        self.assertEqual(sorted(pks), sorted(TodoList.objects.values_list('pk', flat=True)))
+
+
+class StatusMigrationTest(TestCase):
+    """Tests the chunked rewrite of migration 0007."""
+
+    migration = import_module('todoapp.migrations.0007_auto_20161016_1626')
+
+    def test_forward_and_backward(self):
+        label = Label.objects.create(owner=User.objects.create_user('alice'), name='label_one')
+        for status in ('P', 'C', 'M'):
+            TodoList.objects.create(title=status, label=label, status=status)
+
+        with self.assertLogs('todoapp.data_migrations', 'INFO'):
+            self.migration.forward(apps, connection.schema_editor())
+        self.assertEqual(dict(TodoList.objects.values_list('title', 'status')),
+                         {'P': 'Pending', 'C': 'Completed', 'M': 'Missed'})
+
+        with self.assertLogs('todoapp.data_migrations', 'INFO'):
+            self.migration.backward(apps, connection.schema_editor())
+        self.assertEqual(dict(TodoList.objects.values_list('title', 'status')),
+                         {'P': 'P', 'C': 'C', 'M': 'M'})
+
+    def test_rewrites_the_migrated_database(self):
+        """Tests that `migrate --database <alias>` rewrites that database's
+        rows, in both directions."""
+        schema_editor = mock.Mock()
+        schema_editor.connection.alias = 'acme'
+
+        for direction in (self.migration.forward, self.migration.backward):
+            with mock.patch.object(self.migration, 'run_in_chunks') as run_in_chunks:
+                direction(apps, schema_editor)
+            self.assertEqual(run_in_chunks.call_args[0][0].db, 'acme')
+
+
+class OwnerBackfillTest(TestCase):
+    """Tests how migration 0015 picks the owner of rows from before owners."""
+
+    migration = import_module('todoapp.migrations.0015_backfill_owner')
+
+    def test_prefers_first_superuser(self):
+        User.objects.create_user('alice')
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+        self.assertEqual(self.migration.default_owner(apps).pk, admin.pk)
+
+    def test_creates_owner_without_users(self):
+        owner = self.migration.default_owner(apps)
+
+        self.assertEqual(owner.username, 'owner')
+        self.assertFalse(User.objects.get(pk=owner.pk).has_usable_password())
+
+    def test_nothing_to_backfill(self):
+        self.migration.forward(apps, connection.schema_editor())
+
+        self.assertFalse(User.objects.exists())
@@ -0,0 +1,82 @@
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from todoapp.cache import data_version, bump_version
+from todoapp.db import retry_on_lock
+
+
+class PragmaTest(TestCase):
+    """Tests that new SQLite connections get the configured pragmas."""
+
+    def test_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class ImmediateTransactionTest(TransactionTestCase):
+    """Tests that transactions take the write lock when they begin."""
+
+    def test_begin_immediate(self):
+        with CaptureQueriesContext(connection) as context, transaction.atomic():
+            pass
+        self.assertEqual(context.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+
+class Flaky(object):
+    """Raises the given errors on successive calls, then returns 'done'."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.in_transaction = []
+
+    def __call__(self):
+        self.calls += 1
+        self.in_transaction.append(connection.in_atomic_block)
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'done'
+
+
+@override_settings(TODO_WRITE_RETRIES=2, TODO_WRITE_RETRY_DELAY=0)
+class RetryOnLockTest(TransactionTestCase):
+    """Tests that locked writes are retried in a fresh transaction."""
+
+    def test_retries_until_unlocked(self):
+        func = Flaky(OperationalError('database is locked'), OperationalError('database is locked'))
+
+        self.assertEqual(retry_on_lock(func)(), 'done')
+        self.assertEqual(func.calls, 3)
+        self.assertEqual(func.in_transaction, [True, True, True])
+
+    def test_gives_up_after_retries(self):
+        func = Flaky(*[OperationalError('database is locked')] * 3)
+
+        with self.assertRaises(OperationalError):
+            retry_on_lock(func)()
+        self.assertEqual(func.calls, 3)
+
+    def test_other_errors_are_not_retried(self):
+        func = Flaky(OperationalError('no such table: todoapp_todolist'))
+
+        with self.assertRaises(OperationalError):
+            retry_on_lock(func)()
+        self.assertEqual(func.calls, 1)
+
+    def test_nested_calls_are_not_retried(self):
+        func = Flaky(OperationalError('database is locked'))
+
+        with self.assertRaises(OperationalError), transaction.atomic():
+            retry_on_lock(func)()
+        self.assertEqual(func.calls, 1)
+
+    def test_version_is_bumped_again_on_commit(self):
+        version = data_version()
+        with transaction.atomic():
+            bump_version()
+            self.assertEqual(data_version(), version + 1)
+        self.assertEqual(data_version(), version + 2)
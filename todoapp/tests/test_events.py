@@ -0,0 +1,82 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from todoapp.events import Broker, Subscription
+from todoapp.models import Label, TodoList
+
+
+def events(chunks):
+    """Parses SSE chunks into (id, name, data) tuples, skipping the rest."""
+    parsed = []
+    for chunk in chunks:
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n') if ': ' in line)
+        if 'event' in fields:
+            parsed.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return parsed
+
+
+@override_settings(TODO_EVENTS_KEEPALIVE=0.01, TODO_EVENTS_MAX_SECONDS=0.05)
+class BrokerTest(SimpleTestCase):
+    """Tests delivery, replay and the end of event streams."""
+
+    def setUp(self):
+        self.broker = Broker(history=2)
+
+    def test_stream(self):
+        subscription = Subscription(self.broker)
+        self.broker.publish('todo', {'action': 'saved', 'ids': [1]})
+
+        chunks = list(subscription)
+        self.assertTrue(chunks[0].startswith('retry: '))
+        self.assertEqual(events(chunks), [(1, 'todo', {'action': 'saved', 'ids': [1]})])
+        self.assertIn(': keepalive\n\n', chunks)
+        self.assertEqual(self.broker.subscriptions, set())
+
+    def test_reconnect_replays_missed_events(self):
+        for i in range(3):
+            self.broker.publish('todo', {'action': 'saved', 'ids': [i]})
+
+        self.assertEqual([event[0] for event in events(Subscription(self.broker, 2))], [3])
+        self.assertEqual(events(Subscription(self.broker, 0))[0][1], 'reload')
+        self.assertEqual(events(Subscription(self.broker, 9))[0][1], 'reload')
+
+    def test_streams_follow_their_owner(self):
+        self.broker.publish('todo', {'action': 'saved', 'ids': [1]}, owner_id=1)
+        subscription = Subscription(self.broker, 0, owner_id=2)
+        self.broker.publish('todo', {'action': 'saved', 'ids': [2]}, owner_id=2)
+        self.broker.publish('todo', {'action': 'saved', 'ids': [3]}, owner_id=1)
+
+        self.assertEqual([data['ids'] for _, _, data in events(subscription)], [[2]])
+
+    def test_overflow_asks_for_reload(self):
+        subscription = Subscription(self.broker)
+        subscription.overflowed = True
+
+        self.assertEqual(events(subscription)[0][1], 'reload')
+
+
+@override_settings(TODO_EVENTS_KEEPALIVE=0.01, TODO_EVENTS_MAX_SECONDS=0.2)
+class EventStreamViewTest(TransactionTestCase):
+    """Tests that committed writes reach their owner's open event streams."""
+
+    def test_writes_are_streamed(self):
+        user = User.objects.create_user('alice')
+        self.client.force_login(user)
+        label = Label.objects.create(owner=user, name='label_one')
+        todo = TodoList.objects.create(title='todo_one', label=label)
+
+        response = self.client.get(reverse('todoapp:events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        self.client.get(reverse('todoapp:complete_todo', kwargs={'pk': todo.pk}))
+        self.client.post(reverse('todoapp:bulk_action'), {'action': 'delete', 'ids': [todo.pk]})
+        other = Label.objects.create(owner=User.objects.create_user('bob'), name='label_one')
+        TodoList.objects.create(title='todo_one', label=other)
+
+        received = events(chunk.decode('utf-8') for chunk in response.streaming_content)
+        self.assertEqual([data for _, _, data in received],
+                         [{'action': 'saved', 'ids': [todo.pk]},
+                          {'action': 'deleted', 'ids': [todo.pk]}])
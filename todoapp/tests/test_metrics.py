@@ -0,0 +1,86 @@
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from todoapp.metrics import Histogram, registry
+from todoapp.models import Label, TodoList
+
+
+def sample(text, name, view):
+    """Returns the value of one sample in a Prometheus exposition."""
+    match = re.search(r'^{0}{{view="{1}"}} (\S+)$'.format(re.escape(name), re.escape(view)),
+                      text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+class HistogramTest(TestCase):
+    """Tests that histogram buckets are cumulative and include their bound."""
+
+    def test_samples(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 7):
+            histogram.observe(value)
+
+        self.assertEqual(list(histogram.samples('x', 'view="v"')), [
+            'x_bucket{view="v",le="1"} 2',
+            'x_bucket{view="v",le="5"} 3',
+            'x_bucket{view="v",le="+Inf"} 4',
+            'x_sum{view="v"} 11',
+            'x_count{view="v"} 4',
+        ])
+
+
+@override_settings(TODO_METRICS=True)
+class MetricsMiddlewareTest(TestCase):
+    """Tests the per-view metrics and the endpoint serving them."""
+
+    def setUp(self):
+        self.client = Client()
+        registry.clear()
+        user = User.objects.create_user('alice')
+        self.client.force_login(user)
+        label = Label.objects.create(owner=user, name='label_one')
+        TodoList.objects.create(title='todo_one', label=label)
+
+    def metrics(self):
+        response = self.client.get(reverse('todoapp:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_records_latency_queries_and_template_time(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('todoapp:home'))
+        queries = len(context.captured_queries)
+
+        text = self.metrics()
+        view = 'todoapp:home'
+        self.assertEqual(sample(text, 'todo_request_duration_seconds_count', view), 1)
+        self.assertGreater(sample(text, 'todo_request_duration_seconds_sum', view), 0)
+        self.assertEqual(sample(text, 'todo_db_queries_sum', view), queries)
+        self.assertGreater(sample(text, 'todo_db_query_seconds_total', view), 0)
+        self.assertGreater(sample(text, 'todo_template_render_seconds_total', view), 0)
+        self.assertIn('todo_request_duration_seconds_bucket{view="todoapp:home",le="+Inf"} 1', text)
+
+    def test_views_are_kept_apart(self):
+        self.client.get(reverse('todoapp:home'))
+        self.client.get(reverse('todoapp:home'))
+        self.client.get(reverse('todoapp:cache_stats'))
+        self.client.get('/todo/no-such-page')
+
+        text = self.metrics()
+        self.assertEqual(sample(text, 'todo_request_duration_seconds_count', 'todoapp:home'), 2)
+        self.assertEqual(sample(text, 'todo_request_duration_seconds_count', 'todoapp:cache_stats'), 1)
+        self.assertEqual(sample(text, 'todo_template_render_seconds_total', 'todoapp:cache_stats'), 0)
+        self.assertEqual(sample(text, 'todo_request_duration_seconds_count', 'unmatched'), 1)
+
+    @override_settings(TODO_METRICS=False)
+    def test_can_be_switched_off(self):
+        self.client.get(reverse('todoapp:home'))
+
+        self.assertEqual(registry.views, {})
+        self.assertEqual(self.client.get(reverse('todoapp:metrics')).status_code, 404)
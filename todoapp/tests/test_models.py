@@ -1,18 +1,22 @@
-from django.test import TestCase
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
 from django.core.exceptions import ValidationError
 
-from todoapp.models import Label
+from todoapp.models import Label, label_registry
 
 
 class LabelTestCase(TestCase):
     """Tests Label method."""
 
     def setUp(self):
-        self.label1 = Label.objects.create(name='Chore')
-        self.label2 = Label.objects.create(name='Work')
+        self.user = User.objects.create_user('alice')
+        self.label1 = Label.objects.create(owner=self.user, name='Chore')
+        self.label2 = Label.objects.create(owner=self.user, name='Work')
 
     def test_duplicate_label_cannot_be_saved(self):
-        label = Label(name='chore')
+        label = Label(owner=self.user, name='chore')
 
         self.assertRaises(ValidationError, label.save)
 
@@ -26,3 +30,64 @@ class LabelTestCase(TestCase):
         self.label1.name = 'work'
 
         self.assertRaises(ValidationError, self.label1.save)
+
+    def test_editing_label_without_renaming_does_not_query(self):
+        """Tests that the registry settles a label keeping its own slug."""
+        label_registry.all(self.user.pk)
+        self.label1.name = 'CHORE'
+
+        with self.assertNumQueries(0):
+            self.label1.clean()
+
+    def test_registry_follows_saves_and_deletes(self):
+        """Tests that the registry is reloaded after labels change."""
+        self.assertEqual(label_registry.get(self.user.pk, 'chore'), self.label1)
+
+        self.label1.name = 'travel'
+        self.label1.save()
+        self.assertIsNone(label_registry.get(self.user.pk, 'chore'))
+        self.assertEqual(label_registry.get(self.user.pk, 'travel').name, 'travel')
+
+        self.label2.delete()
+        self.assertEqual(label_registry.all(self.user.pk), [self.label1])
+
+    def test_same_label_for_another_owner(self):
+        """Tests that label names are unique per owner only."""
+        other = User.objects.create_user('bob')
+        label = Label(owner=other, name='chore')
+        label.save()
+
+        self.assertEqual(label_registry.get(other.pk, 'chore'), label)
+        self.assertEqual(label_registry.get(self.user.pk, 'chore'), self.label1)
+
+    def test_new_label_keeps_other_owners_cached(self):
+        """Tests that saving a label checks the database, and reloads only
+        its owner's labels."""
+        other = User.objects.create_user('bob')
+        label_registry.all(self.user.pk)
+        label_registry.all(other.pk)
+
+        # Two existence checks and the INSERT.
+        with self.assertNumQueries(3):
+            Label(owner=other, name='chore').clean()
+            Label.objects.create(owner=other, name='travel')
+        with self.assertNumQueries(0):
+            label_registry.all(self.user.pk)
+
+        # A label the registry has not seen yet is still caught.
+        Label.objects.filter(pk=self.label2.pk).update(slug='travel', name='Travel')
+        self.assertRaises(ValidationError, Label(owner=self.user, name='travel').save)
+
+    @override_settings(TODO_LABEL_REGISTRY_TTL=30)
+    def test_registry_reloads_labels_changed_elsewhere(self):
+        """Tests that labels changed without this process's signals, as by
+        another process, are reloaded once the TTL has passed."""
+        with mock.patch('todoapp.models.time.monotonic', return_value=1000):
+            self.assertEqual(label_registry.get(self.user.pk, 'work'), self.label2)
+            Label.objects.filter(pk=self.label2.pk).update(name='Travel', slug='travel')
+            with self.assertNumQueries(0):
+                self.assertEqual(label_registry.get(self.user.pk, 'work'), self.label2)
+
+        with mock.patch('todoapp.models.time.monotonic', return_value=1030):
+            self.assertIsNone(label_registry.get(self.user.pk, 'work'))
+            self.assertEqual(label_registry.get(self.user.pk, 'travel').name, 'Travel')
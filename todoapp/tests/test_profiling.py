@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from freezegun import freeze_time
+
+from todoapp.profiling import make_token
+
+
+class ProfileMiddlewareTest(TestCase):
+    """Tests that only staff and token holders can profile a request."""
+
+    def setUp(self):
+        self.client = Client()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        override = override_settings(TODO_PROFILE_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.staff = User.objects.create_user('staff', password='password', is_staff=True)
+
+    def profiles(self):
+        return os.listdir(self.directory)
+
+    def test_anonymous_requests_are_not_profiled(self):
+        response = self.client.get(reverse('todoapp:home'), {'profile': '1'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(self.profiles(), [])
+
+    def test_staff_can_profile_a_request(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('todoapp:home'), {'profile': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.profiles(), [response['X-Profile']])
+
+        response = self.client.get(reverse('todoapp:profiles'))
+        profile = response.context['profiles'][0]
+        self.assertEqual(profile['name'], self.profiles()[0])
+        self.assertContains(response, profile['functions'][0]['function'])
+
+    def test_token_allows_profiling(self):
+        response = self.client.get(reverse('todoapp:home'), HTTP_X_PROFILE=make_token())
+        self.assertEqual(self.profiles(), [response['X-Profile']])
+
+        response = self.client.get(reverse('todoapp:home'), HTTP_X_PROFILE=make_token() + 'x')
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(len(self.profiles()), 1)
+
+    @override_settings(TODO_PROFILE_MAX_FILES=2)
+    def test_only_newest_profiles_are_kept(self):
+        self.client.force_login(self.staff)
+        names = []
+        for i in range(3):
+            with freeze_time(datetime(2012, 1, 10, 12, 0, i)):
+                names.append(self.client.get(reverse('todoapp:home'), {'profile': '1'})['X-Profile'])
+
+        self.assertEqual(sorted(self.profiles()), names[1:])
+
+    def test_unreadable_profiles_are_skipped(self):
+        """Tests that a truncated profile does not break the profile page."""
+        self.client.force_login(self.staff)
+        name = self.client.get(reverse('todoapp:home'), {'profile': '1'})['X-Profile']
+        with open(os.path.join(self.directory, '20991231-000000-broken-abcdef.prof'), 'wb') as profile:
+            profile.write(b'{')
+
+        response = self.client.get(reverse('todoapp:profiles'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([profile['name'] for profile in response.context['profiles']], [name])
+
+    def test_profile_page_requires_staff(self):
+        response = self.client.get(reverse('todoapp:profiles'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('admin:login'), response['Location'])
+
+    def test_can_be_switched_off(self):
+        self.client.force_login(self.staff)
+        with override_settings(TODO_PROFILE_DIR=None):
+            response = self.client.get(reverse('todoapp:home'), {'profile': '1'})
+
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(self.profiles(), [])
@@ -0,0 +1,156 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from freezegun import freeze_time
+
+from todoapp.forms import TodoForm
+from todoapp.models import Label, TodoList
+from todoapp.recurrence import following, normalize, occurrences
+from todoapp.sweeper import sweep_missed
+
+
+class RuleTest(SimpleTestCase):
+    """Tests parsing and expanding recurrence rules."""
+
+    def test_normalize_spells_out_days_from_due_date(self):
+        # 2012-01-10 is a Tuesday.
+        self.assertEqual(normalize('freq=weekly', date(2012, 1, 10)), 'FREQ=WEEKLY;BYDAY=TU')
+        self.assertEqual(normalize('FREQ=MONTHLY;INTERVAL=2', date(2012, 1, 31)),
+                         'FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=31')
+        self.assertEqual(normalize('FREQ=YEARLY', date(2012, 2, 29)),
+                         'FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29')
+        self.assertEqual(normalize('FREQ=WEEKLY;BYDAY=MO,TH', date(2012, 1, 10)),
+                         'FREQ=WEEKLY;BYDAY=MO,TH')
+
+    def test_normalize_rejects_bad_rules(self):
+        for rule in ('FREQ=HOURLY', 'FREQ=DAILY;INTERVAL=0', 'FREQ=DAILY;COUNT=x',
+                     'FREQ=WEEKLY;BYDAY=XX', 'BYDAY=MO', 'FREQ=DAILY;FREQ=DAILY', 'FREQ=DAILY;DTSTART=1'):
+            with self.assertRaises(ValueError, msg=rule):
+                normalize(rule, date(2012, 1, 10))
+
+    def test_normalize_rejects_rules_without_dates_in_horizon(self):
+        for rule in ('FREQ=DAILY;BYMONTH=2;BYMONTHDAY=30', 'FREQ=DAILY;INTERVAL=7;BYDAY=MO',
+                     'FREQ=YEARLY;INTERVAL=11', 'FREQ=DAILY;UNTIL=20120101', 'FREQ=DAILY;UNTIL=2012'):
+            with self.assertRaises(ValueError, msg=rule):
+                normalize(rule, date(2012, 1, 10))
+
+    def test_occurrences_stop_at_horizon(self):
+        """Tests that a rule with no dates ahead is given up on at the horizon."""
+        self.assertEqual(occurrences('FREQ=DAILY;BYMONTH=2;BYMONTHDAY=30', date(2012, 1, 10),
+                                     date(2012, 1, 11), 3), [])
+        self.assertEqual(occurrences('FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29', date(2012, 2, 29),
+                                     date(2012, 3, 1), 2), [date(2016, 2, 29), date(2020, 2, 29)])
+
+        # 2100 is not a leap year.
+        rule = normalize('FREQ=YEARLY', date(2096, 2, 29))
+        self.assertEqual(occurrences(rule, date(2096, 2, 29), date(2096, 3, 1), 2), [date(2104, 2, 29)])
+
+    def test_occurrences_keep_phase_across_long_gap(self):
+        """Tests that expanding from far after the due date keeps the rule's
+        interval and day."""
+        rule = normalize('FREQ=WEEKLY;INTERVAL=2', date(2012, 1, 10))
+        self.assertEqual(occurrences(rule, date(2012, 1, 10), date(2012, 1, 11), 2),
+                         [date(2012, 1, 24), date(2012, 2, 7)])
+        self.assertEqual(occurrences(rule, date(2012, 1, 10), date(2030, 1, 1), 2),
+                         [date(2030, 1, 1), date(2030, 1, 15)])
+
+        rule = normalize('FREQ=MONTHLY', date(2012, 1, 31))
+        self.assertEqual(occurrences(rule, date(2012, 1, 31), date(2012, 2, 1), 3),
+                         [date(2012, 3, 31), date(2012, 5, 31), date(2012, 7, 31)])
+
+    def test_occurrences_stop_at_count_and_until(self):
+        self.assertEqual(occurrences('FREQ=DAILY;COUNT=3', date(2012, 1, 10), date(2012, 1, 11), 5),
+                         [date(2012, 1, 11), date(2012, 1, 12)])
+        self.assertEqual(occurrences('FREQ=DAILY;COUNT=1', date(2012, 1, 10), date(2012, 1, 11), 5), [])
+        self.assertEqual(occurrences('FREQ=DAILY;UNTIL=20120112', date(2012, 1, 10), date(2012, 1, 11), 5),
+                         [date(2012, 1, 11), date(2012, 1, 12)])
+
+    def test_following_counts_down(self):
+        self.assertEqual(following('FREQ=DAILY;COUNT=3'), 'FREQ=DAILY;COUNT=2')
+        self.assertEqual(following('FREQ=DAILY'), 'FREQ=DAILY')
+
+
+class RecurringTodoTest(TestCase):
+    """Tests that finishing a recurring todo starts its next occurrence."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='secret')
+        self.label = Label.objects.create(owner=self.user, name='chore')
+        self.todo_list = TodoList.objects.create(title='bins', label=self.label, due_date=date(2012, 1, 10),
+                                                 recurrence='FREQ=WEEKLY')
+
+    def occurrence_titles(self):
+        return list(TodoList.objects.order_by('due_date').values_list('title', 'status', 'due_date'))
+
+    def test_rule_is_stored_normalized(self):
+        self.assertEqual(self.todo_list.recurrence, 'FREQ=WEEKLY;BYDAY=TU')
+        self.assertEqual(TodoList.objects.count(), 1)
+
+    @freeze_time("2012-01-09 12:00:01")
+    def test_complete_creates_next_occurrence(self):
+        TodoList.objects.filter(pk=self.todo_list.pk).complete()
+
+        self.assertEqual(self.occurrence_titles(), [
+            ('bins (2012-01-10)', TodoList.COMPLETED, date(2012, 1, 10)),
+            ('bins', TodoList.PENDING, date(2012, 1, 17)),
+        ])
+        self.assertEqual(TodoList.objects.get(title='bins (2012-01-10)').recurrence, '')
+        self.assertEqual(TodoList.objects.get(title='bins').recurrence, 'FREQ=WEEKLY;BYDAY=TU')
+
+    @freeze_time("2012-03-01 12:00:01")
+    def test_sweep_skips_past_occurrences(self):
+        """Tests that a long-missed todo recurs once, on its next date from today."""
+        self.assertEqual(sweep_missed(), 1)
+
+        self.assertEqual(self.occurrence_titles(), [
+            ('bins (2012-01-10)', TodoList.MISSED, date(2012, 1, 10)),
+            ('bins', TodoList.PENDING, date(2012, 3, 6)),
+        ])
+        self.assertEqual(sweep_missed(), 0)
+
+    @freeze_time("2012-01-09 12:00:01")
+    def test_last_counted_occurrence_does_not_recur(self):
+        TodoList.objects.filter(pk=self.todo_list.pk).update(recurrence='FREQ=WEEKLY;BYDAY=TU;COUNT=2')
+        TodoList.objects.filter(pk=self.todo_list.pk).complete()
+        TodoList.objects.filter(status=TodoList.PENDING).complete()
+
+        self.assertEqual(self.occurrence_titles(), [
+            ('bins (2012-01-10)', TodoList.COMPLETED, date(2012, 1, 10)),
+            ('bins', TodoList.COMPLETED, date(2012, 1, 17)),
+        ])
+
+    @freeze_time("2012-01-09 12:00:01")
+    def test_card_shows_upcoming_dates(self):
+        self.client.login(username='alice', password='secret')
+        response = self.client.get(reverse('todoapp:home'))
+
+        self.assertContains(response, 'Repeats, next: Jan. 17, 2012, Jan. 24, 2012, Jan. 31, 2012')
+        self.assertEqual(TodoList.objects.count(), 1)
+
+    def test_save_normalizes_without_validating(self):
+        """Tests that plain saves normalize the rule, and raise ValueError
+        rather than ValidationError for a rule that clean() would refuse."""
+        self.todo_list.recurrence = 'freq=monthly'
+        self.todo_list.save()
+        self.assertEqual(TodoList.objects.get(pk=self.todo_list.pk).recurrence, 'FREQ=MONTHLY;BYMONTHDAY=10')
+
+        for due_date, rule in ((date(2012, 1, 10), 'FREQ=SOMETIMES'), (None, 'FREQ=DAILY')):
+            self.todo_list.due_date, self.todo_list.recurrence = due_date, rule
+            with self.assertRaises(ValueError):
+                self.todo_list.save()
+
+    def test_form_validates_rule(self):
+        data = {'title': 'water plants', 'label': self.label.pk, 'status': TodoList.PENDING}
+
+        form = TodoForm(dict(data, recurrence='FREQ=DAILY'), owner=self.user)
+        self.assertIn('due_date', form.errors)
+
+        form = TodoForm(dict(data, recurrence='FREQ=SOMETIMES', due_date='2012-01-10'), owner=self.user)
+        self.assertIn('recurrence', form.errors)
+
+        form = TodoForm(dict(data, recurrence='freq=monthly', due_date='2012-01-10'), owner=self.user)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.save().recurrence, 'FREQ=MONTHLY;BYMONTHDAY=10')
@@ -0,0 +1,105 @@
+from django.http import HttpResponse
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from todoapp import replicas
+from todoapp.models import Label, TodoList
+from todoapp.replicas import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter
+
+
+def no_lag(alias):
+    return 0
+
+
+def far_behind(alias):
+    return 60
+
+
+@override_settings(TODO_DB_REPLICAS=['replica'], TODO_REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Tests which database each kind of request reads from.
+
+    Not a TestCase: its transaction would keep every read on the primary.
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        replicas._lag_checks.clear()
+
+    def read_from(self, request):
+        """Returns the read alias seen by the view, and the response."""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(TodoList))
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(request)
+        return seen[0], response
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(TodoList), 'default')
+        self.assertEqual(self.router.db_for_write(TodoList), 'default')
+
+    def test_get_reads_from_replica(self):
+        alias, response = self.read_from(self.factory.get('/todo/'))
+
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(self.router.db_for_read(TodoList), 'default')
+
+    def test_post_uses_primary_and_pins_visitor(self):
+        alias, response = self.read_from(self.factory.post('/todo/new'))
+
+        self.assertEqual(alias, 'default')
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 5)
+
+        request = self.factory.get('/todo/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        alias, response = self.read_from(request)
+        self.assertEqual(alias, 'default')
+
+    def test_write_during_get_uses_primary_and_pins_visitor(self):
+        """Tests that a GET that writes, like completing a todo, reads its
+        own write and pins the visitor."""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(TodoList))
+            with transaction.atomic():
+                self.router.db_for_write(TodoList)
+                seen.append(self.router.db_for_read(TodoList))
+            seen.append(self.router.db_for_read(TodoList))
+            return HttpResponse()
+
+        response = ReplicaMiddleware(view)(self.factory.get('/todo/1/complete'))
+
+        self.assertEqual(seen, ['replica', 'default', 'default'])
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 5)
+
+    def test_sessions_and_users_read_from_primary(self):
+        """Tests that a visitor just logged in, whose sticky cookie has
+        expired, finds their session and user even on a lagging replica."""
+        seen = []
+
+        def view(request):
+            seen.extend(self.router.db_for_read(model) for model in (Session, User, TodoList, Label))
+            return HttpResponse()
+
+        ReplicaMiddleware(view)(self.factory.get('/todo/'))
+        self.assertEqual(seen, ['default', 'default', 'replica', 'replica'])
+
+    def test_lagging_replica_is_skipped(self):
+        with override_settings(TODO_REPLICA_LAG_CHECK='todoapp.tests.test_replicas.far_behind'):
+            self.assertEqual(self.read_from(self.factory.get('/todo/'))[0], 'default')
+
+        replicas._lag_checks.clear()
+        with override_settings(TODO_REPLICA_LAG_CHECK='todoapp.tests.test_replicas.no_lag'):
+            self.assertEqual(self.read_from(self.factory.get('/todo/'))[0], 'replica')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'todoapp'))
+        self.assertFalse(self.router.allow_migrate('replica', 'todoapp'))
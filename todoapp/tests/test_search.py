@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from todoapp.models import Label, TodoList
+from todoapp.search import FTS5SearchBackend, IContainsSearchBackend, match_expression
+
+
+class MatchExpressionTest(TestCase):
+
+    def test_every_word_is_prefix_matched(self):
+        """Tests that free text becomes quoted prefix terms."""
+        self.assertEqual(match_expression('buy "milk'), '"buy"* "milk"*')
+        self.assertEqual(match_expression(' -*" '), '')
+
+
+class FTS5SearchBackendTest(TestCase):
+
+    def setUp(self):
+        self.backend = FTS5SearchBackend()
+        user = User.objects.create_user('alice')
+        self.chore = Label.objects.create(owner=user, name='chore')
+        self.work = Label.objects.create(owner=user, name='work')
+
+        self.groceries = TodoList.objects.create(title='groceries', label=self.chore, details='milk and bread')
+        self.milk = TodoList.objects.create(title='milkman invoice', label=self.work)
+        TodoList.objects.create(title='laundry', label=self.chore)
+
+    def search(self, q):
+        todo_lists = self.backend.filter(TodoList.objects.all(), q)
+        return [todo.title for todo in todo_lists.order_by(*self.backend.ordering)]
+
+    def test_prefix_matching(self):
+        """Tests that partial words match."""
+        self.assertEqual(self.search('laund'), ['laundry'])
+
+    def test_results_are_ranked(self):
+        """Tests that title matches rank above details matches."""
+        self.assertEqual(self.search('milk'), ['milkman invoice', 'groceries'])
+
+    def test_label_names_are_searchable(self):
+        """Tests that todos can be found by their label name."""
+        self.assertEqual(sorted(self.search('chore')), ['groceries', 'laundry'])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Tests that edits, label renames and deletes keep the index in sync."""
+        self.groceries.details = 'eggs'
+        self.groceries.save()
+        self.assertEqual(self.search('bread'), [])
+        self.assertEqual(self.search('eggs'), ['groceries'])
+
+        self.work.name = 'office'
+        self.work.save()
+        self.assertEqual(self.search('office'), ['milkman invoice'])
+
+        self.milk.delete()
+        self.assertEqual(self.search('invoice'), [])
+
+        self.chore.delete()
+        self.assertEqual(self.search('eggs'), [])
+
+    def test_rebuild_command(self):
+        """Tests that the index can be rebuilt from scratch."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM todoapp_todolist_fts')
+        self.assertEqual(self.search('laundry'), [])
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+
+        self.assertIn('Indexed 3 todo(s).', out.getvalue())
+        self.assertEqual(self.search('laundry'), ['laundry'])
+
+    def test_backends_agree_on_whole_words(self):
+        """Tests that the indexed and unindexed backends find the same todos."""
+        for q in ['milk', 'chore', 'laundry', 'work']:
+            indexed = self.backend.filter(TodoList.objects.all(), q)
+            unindexed = IContainsSearchBackend().filter(TodoList.objects.all(), q)
+            self.assertEqual(set(indexed), set(unindexed))
@@ -0,0 +1,55 @@
+from datetime import date, datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from freezegun import freeze_time
+
+from todoapp.models import Label, TodoList
+from todoapp.sweeper import sweep_missed, next_deadline
+
+
+class SweeperTest(TestCase):
+
+    def setUp(self):
+        label = Label.objects.create(owner=User.objects.create_user('alice'), name='chore')
+
+        TodoList.objects.create(title='overdue_one', label=label, due_date=date(2012, 1, 10))
+        TodoList.objects.create(title='overdue_two', label=label, due_date=date(2012, 1, 13))
+        TodoList.objects.create(title='due_today', label=label, due_date=date(2012, 1, 14))
+        TodoList.objects.create(title='due_later', label=label, due_date=date(2012, 2, 1))
+        TodoList.objects.create(title='no_due_date', label=label)
+        TodoList.objects.create(title='done', label=label, status=TodoList.COMPLETED,
+                                due_date=date(2012, 1, 1))
+
+    @freeze_time("2012-01-14 12:00:01")
+    def test_sweep_marks_only_overdue_pending_todos(self):
+        """Tests that only pending todos past their due date become missed."""
+        self.assertEqual(sweep_missed(batch_size=1), 2)
+
+        missed = TodoList.objects.filter(status=TodoList.MISSED)
+        self.assertQuerysetEqual(missed, ['<TodoList: overdue_one>', '<TodoList: overdue_two>'],
+                                 ordered=False)
+        self.assertEqual(TodoList.objects.get(title='done').status, TodoList.COMPLETED)
+        self.assertEqual(sweep_missed(), 0)
+
+    @freeze_time("2012-01-14 12:00:01")
+    def test_next_deadline_is_end_of_earliest_due_date(self):
+        """Tests that the sweeper wakes up when the next due date has passed."""
+        self.assertEqual(next_deadline(), timezone.make_aware(datetime(2012, 1, 15)))
+
+    @freeze_time("2012-03-01 12:00:01")
+    def test_next_deadline_without_upcoming_todos(self):
+        """Tests that there is no deadline once every due date has passed."""
+        self.assertIsNone(next_deadline())
+
+    @freeze_time("2012-01-14 12:00:01")
+    def test_sweep_command_runs_once(self):
+        """Tests that the management command sweeps and reports."""
+        out = StringIO()
+        call_command('sweep_missed', '--once', stdout=out)
+
+        self.assertIn('Marked 2 todo(s) as missed.', out.getvalue())
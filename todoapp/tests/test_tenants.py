@@ -0,0 +1,49 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from todoapp.models import TodoList
+from todoapp.tenants import (TenantMiddleware, TenantRouter, for_each_database, todo_database,
+                             todo_databases, using_database)
+
+
+@override_settings(TODO_TENANT_DATABASES={'acme': 'acme', 'globex': 'globex'})
+class TenantRouterTest(SimpleTestCase):
+    """Tests that todo queries follow the current tenant's database."""
+
+    def test_todos_follow_current_database(self):
+        router = TenantRouter()
+        self.assertIsNone(router.db_for_read(TodoList))
+
+        with using_database('acme'):
+            self.assertEqual(router.db_for_read(TodoList), 'acme')
+            self.assertEqual(router.db_for_write(TodoList), 'acme')
+            self.assertIsNone(router.db_for_read(User))
+        self.assertIsNone(router.db_for_write(TodoList))
+
+    def test_tenant_databases_hold_only_todos(self):
+        router = TenantRouter()
+
+        self.assertTrue(router.allow_migrate('acme', 'todoapp'))
+        self.assertFalse(router.allow_migrate('acme', 'auth'))
+        self.assertIsNone(router.allow_migrate('default', 'auth'))
+
+    def test_for_each_database(self):
+        self.assertEqual(todo_databases(), ['default', 'acme', 'globex'])
+        self.assertEqual(for_each_database(lambda: TenantRouter().db_for_write(TodoList)),
+                         {'default': 'default', 'acme': 'acme', 'globex': 'globex'})
+
+    def test_middleware_routes_by_username(self):
+        seen = []
+        middleware = TenantMiddleware(lambda request: seen.append(todo_database()))
+
+        for user in (User(username='acme'), User(username='alice'), AnonymousUser()):
+            request = RequestFactory().get('/todo/')
+            request.user = user
+            middleware(request)
+        self.assertEqual(seen, ['acme', 'default', 'default'])
+
+    @override_settings(TODO_TENANT_DATABASES={})
+    def test_middleware_unused_without_tenants(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            TenantMiddleware(lambda request: None)
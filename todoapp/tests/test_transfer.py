@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from todoapp.models import Label, TodoList
+
+
+class TransferCommandsTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        self.user = User.objects.create_user('alice')
+        chore = Label.objects.create(owner=self.user, name='Chore')
+        Label.objects.create(owner=self.user, name='Unused')
+        TodoList.objects.create(title='laundry', label=chore, details='whites,\n"colours"')
+        TodoList.objects.create(title='taxes', label=chore, status=TodoList.MISSED, due_date=date(2012, 4, 15))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def snapshot(self):
+        return (sorted(Label.objects.values_list('slug', 'name')),
+                sorted(TodoList.objects.values_list('title', 'details', 'due_date', 'status', 'label__slug')))
+
+    def round_trip(self, filename):
+        path = os.path.join(self.directory, filename)
+        before = self.snapshot()
+        call_command('export_todos', path, chunk_size=1, stderr=StringIO())
+
+        TodoList.objects.all().delete()
+        Label.objects.all().delete()
+        out = StringIO()
+        call_command('import_todos', path, owner='alice', batch_size=1, stdout=out)
+
+        self.assertEqual(self.snapshot(), before)
+        self.assertIn('Imported 2 todo(s) and 2 label(s)', out.getvalue())
+
+    def test_csv_round_trip(self):
+        """Tests that a CSV dump restores every label and todo."""
+        self.round_trip('dump.csv')
+
+    def test_ndjson_round_trip(self):
+        """Tests that an NDJSON dump restores every label and todo."""
+        self.round_trip('dump.ndjson')
+
+    def test_existing_todos_are_skipped(self):
+        """Tests that importing into a populated database skips known titles."""
+        path = os.path.join(self.directory, 'dump.csv')
+        call_command('export_todos', path, stderr=StringIO())
+        TodoList.objects.get(title='laundry').delete()
+
+        out = StringIO()
+        call_command('import_todos', path, owner='alice', stdout=out)
+
+        self.assertIn('Imported 1 todo(s) and 0 label(s), skipped 1 existing todo(s)', out.getvalue())
+        self.assertEqual(TodoList.objects.count(), 2)
+
+    def test_invalid_record(self):
+        """Tests that a bad record aborts the import with its line number."""
+        path = os.path.join(self.directory, 'dump.ndjson')
+        with open(path, 'w') as stream:
+            stream.write('{"kind": "todo", "title": "x", "label_slug": "chore", "status": "Done"}\n')
+
+        with self.assertRaisesRegex(CommandError, 'Line 1: unknown status'):
+            call_command('import_todos', path, owner='alice', stdout=StringIO())
+
+    def test_dumps_move_todos_between_owners(self):
+        """Tests that an owner's dump loads into another owner's todos."""
+        other = User.objects.create_user('bob')
+        TodoList.objects.create(title='theirs', label=Label.objects.create(owner=other, name='Errand'))
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_todos', path, owner='alice', stderr=StringIO())
+
+        out = StringIO()
+        call_command('import_todos', path, owner='bob', stdout=out)
+
+        self.assertIn('Imported 2 todo(s) and 2 label(s)', out.getvalue())
+        self.assertEqual(sorted(other.todos.values_list('title', 'label__slug')),
+                         [('laundry', 'chore'), ('taxes', 'chore'), ('theirs', 'errand')])
+        self.assertEqual(self.user.todos.count(), 2)
+
+    def test_unknown_owner(self):
+        with self.assertRaisesRegex(CommandError, "No user named 'carol'"):
+            call_command('import_todos', os.path.join(self.directory, 'dump.csv'),
+                         owner='carol', stdout=StringIO())
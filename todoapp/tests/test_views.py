@@ -1,21 +1,38 @@
+import json
+import re
 from datetime import datetime
-
-from django.test import Client, TestCase
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from freezegun import freeze_time
 
-from todoapp.models import Label, TodoList
+from todoapp.cache import CSRF_PLACEHOLDER, check_board_cache, stats as cache_stats
+from todoapp.models import Label, TodoList, label_registry
+from todoapp.tenants import TenantRouter
+from todoapp.views import HomeView
+
+
+# Queries every signed-in request makes for its session and user.
+AUTH_QUERIES = 2
 
 
 class HomeViewTest(TestCase):
 
     def setUp(self):
+        self.user = User.objects.create_user('alice')
         self.client = Client()
-        self.label_1 = Label.objects.create(name='label_one')
-        self.label_2 = Label.objects.create(name='label_two')
+        self.client.force_login(self.user)
+        self.label_1 = Label.objects.create(owner=self.user, name='label_one')
+        self.label_2 = Label.objects.create(owner=self.user, name='label_two')
 
-        Label.objects.create(name='all')
+        Label.objects.create(owner=self.user, name='all')
 
         # Freezing time here to get specific date for date created
         # We need this to be able to sort todo_lists internally by date created for those without due date
@@ -103,14 +120,451 @@ class HomeViewTest(TestCase):
             for todo in status_column['todos']:
                 self.assertIn('one', '{0},{1},{2}'.format(todo.title, todo.details, todo.label.name))
 
+    @freeze_time("2012-08-15 12:00:01")
+    def test_overdue_todos_are_shown_as_missed(self):
+        """Tests that pending todos past their due date are listed as missed."""
+        response = self.client.get(reverse('todoapp:home'))
+        todos_by_status = response.context['todos_by_status']
+
+        pending_titles = [todo.title for todo in todos_by_status[0]['todos']]
+        missed_titles = [todo.title for todo in todos_by_status[2]['todos']]
+        self.assertEqual(pending_titles, ['todo_four', 'todo_one', 'todo_two'])
+        self.assertIn('todo_three', missed_titles)
+        self.assertEqual(len(missed_titles), 5)
+
+    @freeze_time("2012-08-15 12:00:01")
+    def test_home_page_does_not_write(self):
+        """Tests that rendering the board issues no write queries."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('todoapp:home'))
+
+        self.assertEqual(response.status_code, 200)
+        writes = [query['sql'] for query in queries if not query['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+        self.assertEqual(TodoList.objects.get(title='todo_three').status, TodoList.PENDING)
+
+    @freeze_time("2012-08-15 12:00:01")
+    def test_sweep_does_not_change_board(self):
+        """Tests that persisting missed todos leaves the board unchanged."""
+        before = self.client.get(reverse('todoapp:home')).context['todos_by_status']
+        call_command('sweep_missed', '--once', stdout=StringIO())
+        after = self.client.get(reverse('todoapp:home')).context['todos_by_status']
+
+        for column_before, column_after in zip(before, after):
+            self.assertEqual([todo.pk for todo in column_before['todos']],
+                             [todo.pk for todo in column_after['todos']])
+
+    @freeze_time("2012-08-15 12:00:01")
+    @override_settings(TODO_BOARD_PAGE_SIZE=None)
+    def test_home_page_query_count_is_fixed(self):
+        """Tests that the board takes the same number of queries however much it holds."""
+        label_registry.all(self.user.pk)
+        # Validator, counters, overdue adjustment of the counters and board.
+        with self.assertNumQueries(AUTH_QUERIES + 4):
+            self.client.get(reverse('todoapp:home'))
+
+        for i in range(10):
+            label = Label.objects.create(owner=self.user, name='extra_label_{0}'.format(i))
+            TodoList.objects.create(title='extra_todo_{0}'.format(i), label=label)
+            TodoList.objects.create(title='extra_done_{0}'.format(i), label=label, status=TodoList.COMPLETED)
+
+        label_registry.all(self.user.pk)
+        with self.assertNumQueries(AUTH_QUERIES + 4):
+            self.client.get(reverse('todoapp:home'))
+        # The counts are cached with the data version.
+        with self.assertNumQueries(AUTH_QUERIES + 2):
+            self.client.get(reverse('todoapp:home'), {'label': 'label_one', 'q': 'todo'})
+
+    def test_labels_are_loaded_once(self):
+        """Tests that label chips and the label filter do not query labels."""
+        self.client.get(reverse('todoapp:home'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('todoapp:home'), {'label': 'label_two'})
+
+        self.assertContains(response, 'label_one')
+        self.assertFalse([query for query in queries if 'FROM "todoapp_label"' in query['sql']])
+        self.assertFalse([query for query in queries if '"todoapp_label"."name" =' in query['sql']])
+
+    @freeze_time("2012-08-15 12:00:01")
+    @override_settings(TODO_BOARD_PAGE_SIZE=None)
+    def test_single_query_board_matches_per_column_board(self):
+        """Tests that both board modes put the same todos in the same order."""
+        single = self.client.get(reverse('todoapp:home')).context['todos_by_status']
+        with override_settings(TODO_BOARD_SINGLE_QUERY=False):
+            per_column = self.client.get(reverse('todoapp:home')).context['todos_by_status']
+
+        for single_column, column in zip(single, per_column):
+            self.assertEqual(single_column['status'], column['status'])
+            self.assertEqual([todo.pk for todo in single_column['todos']],
+                             [todo.pk for todo in column['todos']])
+
+
+@override_settings(TODO_BOARD_PAGE_SIZE=3)
+class StatusColumnViewTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.client = Client()
+        self.client.force_login(self.user)
+        label = Label.objects.create(owner=self.user, name='chore')
+
+        for day in range(1, 4):
+            with freeze_time(datetime(2012, 1, day)):
+                TodoList.objects.create(title='later_{0}'.format(day), label=label, due_date=datetime(2012, 3, 1))
+                TodoList.objects.create(title='undated_{0}'.format(day), label=label)
+                TodoList.objects.create(title='soon_{0}'.format(day), label=label,
+                                        due_date=datetime(2012, 2, day))
+        TodoList.objects.create(title='done', label=label, status=TodoList.COMPLETED)
+
+    def pending_titles(self, data=None):
+        """Follows the "load more" links of the pending column and returns every title."""
+        column = self.client.get(reverse('todoapp:home'), data).context['todos_by_status'][0]
+        titles = [todo.title for todo in column['todos']]
+        next_url = column.get('next_url')
+
+        while next_url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(next_url)
+            self.assertFalse([query for query in queries if 'OFFSET' in query['sql']])
+
+            titles += [todo.title for todo in response.context['status_todos']]
+            next_url = response.context['next_url']
+        return titles
+
+    @freeze_time("2012-01-15 12:00:01")
+    def test_pages_follow_board_order(self):
+        """Tests that paging through a column visits every todo once, in board order."""
+        self.assertEqual(self.pending_titles(),
+                         ['soon_1', 'soon_2', 'soon_3', 'later_1', 'later_2', 'later_3',
+                          'undated_1', 'undated_2', 'undated_3'])
+
+    @freeze_time("2012-01-15 12:00:01")
+    @override_settings(TODO_SEARCH_BACKEND='todoapp.search.IContainsSearchBackend')
+    def test_pages_keep_filters(self):
+        """Tests that the next page keeps the search of the first page."""
+        self.assertEqual(self.pending_titles({'q': 'later'}),
+                         ['later_1', 'later_2', 'later_3'])
+
+    @freeze_time("2012-01-15 12:00:01")
+    def test_ranked_search_is_not_paged(self):
+        """Tests that ranked search results come back whole, best match first."""
+        TodoList.objects.filter(title='undated_3').update(title='soon soon')
+        TodoList.objects.filter(title='later_1').update(details='soon')
+
+        titles = self.pending_titles({'q': 'soon'})
+        self.assertEqual(titles[0], 'soon soon')
+        self.assertEqual(titles[-1], 'later_1')
+        self.assertEqual(sorted(titles[1:4]), ['soon_1', 'soon_2', 'soon_3'])
+
+        response = self.client.get(reverse('todoapp:status_column', args=[TodoList.PENDING]), {'q': 'soon'})
+        self.assertEqual([todo.title for todo in response.context['status_todos']], titles)
+
+    @freeze_time("2012-01-15 12:00:01")
+    def test_home_page_query_count_is_bounded(self):
+        """Tests that a full first page needs one query, short pages need two."""
+        with self.assertNumQueries(AUTH_QUERIES + 9):
+            response = self.client.get(reverse('todoapp:home'))
+
+        self.assertEqual(len(response.context['todos_by_status'][0]['todos']), 3)
+        self.assertContains(response, 'Load more')
+
+    def test_invalid_cursor(self):
+        """Tests that a malformed cursor is rejected."""
+        response = self.client.get(reverse('todoapp:status_column', args=[TodoList.PENDING]), {'after': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_status(self):
+        """Tests that only board statuses have a column."""
+        response = self.client.get(reverse('todoapp:status_column', args=['Archived']))
+        self.assertEqual(response.status_code, 404)
+
+
+class BoardCacheTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.label = Label.objects.create(owner=self.user, name='chore')
+        self.todo = TodoList.objects.create(title='laundry', label=self.label)
+
+    def test_repeat_request_is_served_from_cache(self):
+        """Tests that unchanged columns are not queried or rendered again."""
+        self.client.get(reverse('todoapp:home'))
+        before = cache_stats()
+
+        with self.assertNumQueries(AUTH_QUERIES + 1):
+            response = self.client.get(reverse('todoapp:home'))
+
+        after = cache_stats()
+        self.assertEqual(after['hits'] - before['hits'], 3)
+        self.assertEqual(after['misses'], before['misses'])
+        self.assertContains(response, 'laundry')
+
+    def test_writes_invalidate_cache(self):
+        """Tests that saving or deleting todos and labels shows up on the next request."""
+        self.client.get(reverse('todoapp:home'))
+
+        self.todo.title = 'ironing'
+        self.todo.save()
+        self.assertContains(self.client.get(reverse('todoapp:home')), 'ironing')
+
+        self.label.name = 'housework'
+        self.label.save()
+        self.assertContains(self.client.get(reverse('todoapp:home')), 'housework')
+
+        self.todo.delete()
+        self.assertNotContains(self.client.get(reverse('todoapp:home')), 'ironing')
+
+    def test_filters_are_cached_separately(self):
+        """Tests that a search does not reuse the unfiltered columns."""
+        TodoList.objects.create(title='taxes', label=self.label)
+        self.client.get(reverse('todoapp:home'))
+
+        response = self.client.get(reverse('todoapp:home'), {'q': 'taxes'})
+        self.assertContains(response, 'taxes')
+        self.assertNotContains(response, 'laundry')
+
+    def test_cached_columns_carry_visitor_csrf_token(self):
+        """Tests that each visitor gets a working CSRF token in cached cards."""
+        self.client.get(reverse('todoapp:home'))
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.get(reverse('todoapp:home'))
+
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        token = re.search(r"name='csrfmiddlewaretoken' value='([^']+)'", response.content.decode('utf-8'))
+        response = client.post(reverse('todoapp:delete_todo', kwargs={'pk': self.todo.pk}),
+                               {'csrfmiddlewaretoken': token.group(1)})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(TodoList.objects.exists())
+
+    def test_stats_endpoint(self):
+        """Tests that hit and miss counters are exposed."""
+        response = self.client.get(reverse('todoapp:cache_stats'))
+        self.assertEqual(set(json.loads(response.content.decode('utf-8'))), {'hits', 'misses', 'version'})
+
+    def test_per_process_cache_is_refused_outside_debug(self):
+        """Tests that the system checks refuse a local-memory board cache
+        unless DEBUG is on, as other workers would miss its version bumps."""
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                              'LOCATION': '/tmp/todoapp-cache'}}
+
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([error.id for error in check_board_cache(None)], ['todoapp.E001'])
+        with override_settings(DEBUG=False, CACHES=locmem, TODO_BOARD_CACHE=None):
+            self.assertEqual(check_board_cache(None), [])
+        with override_settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(check_board_cache(None), [])
+        with override_settings(DEBUG=False, CACHES=shared):
+            self.assertEqual(check_board_cache(None), [])
+
+
+@override_settings(TODO_BOARD_STREAMING=True)
+class StreamingBoardTest(TestCase):
+    """Tests that the streamed board sends the shell first, then the columns."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.client = Client()
+        self.client.force_login(self.user)
+        label = Label.objects.create(owner=self.user, name='chore')
+        TodoList.objects.create(title='laundry', label=label)
+        TodoList.objects.create(title='ironing', label=label, status=TodoList.COMPLETED)
+
+    def test_shell_comes_first(self):
+        response = self.client.get(reverse('todoapp:home'))
+
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 5)
+        self.assertIn('materialize.min.css', chunks[0])
+        self.assertIn('?label=chore', chunks[0])
+        self.assertNotIn('laundry', chunks[0])
+        self.assertIn('laundry', chunks[1])
+        self.assertIn('ironing', chunks[2])
+        self.assertIn('No missed ToDO', chunks[3])
+        self.assertIn('</html>', chunks[4])
+
+    def test_matches_rendered_board(self):
+        streamed = b''.join(self.client.get(reverse('todoapp:home')).streaming_content).decode()
+        with override_settings(TODO_BOARD_STREAMING=False):
+            rendered = self.client.get(reverse('todoapp:home')).content.decode()
+
+        def normalize(html):
+            html = re.sub(r"name='csrfmiddlewaretoken' value='[^']+'", '', html)
+            return re.sub(r'\s+', ' ', html)
+        self.assertEqual(normalize(streamed), normalize(rendered))
+
+    def test_sets_csrf_cookie(self):
+        response = self.client.get(reverse('todoapp:home'))
+        b''.join(response.streaming_content)
+
+        self.assertIn('csrftoken', response.cookies)
+
+    @override_settings(TODO_TENANT_DATABASES={'alice': 'default'})
+    def test_columns_read_from_tenant_database(self):
+        """Tests that columns queried as the response streams still follow
+        the user's tenant database."""
+        seen = []
+        columns = HomeView.columns
+
+        def spy(view, *args, **kwargs):
+            seen.append(TenantRouter().db_for_read(TodoList))
+            return columns(view, *args, **kwargs)
+
+        with mock.patch.object(HomeView, 'columns', spy):
+            b''.join(self.client.get(reverse('todoapp:home')).streaming_content)
+        self.assertEqual(seen, ['default'] * 3)
+
+    def test_repeat_request_is_served_from_cache(self):
+        b''.join(self.client.get(reverse('todoapp:home')).streaming_content)
+
+        with self.assertNumQueries(AUTH_QUERIES + 1):
+            b''.join(self.client.get(reverse('todoapp:home')).streaming_content)
+
+    def test_unchanged_board_returns_304(self):
+        etag = self.client.get(reverse('todoapp:home'))['ETag']
+        response = self.client.get(reverse('todoapp:home'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+
+class ConditionalGetTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.label = Label.objects.create(owner=self.user, name='chore')
+        self.todo = TodoList.objects.create(title='laundry', label=self.label)
+
+    def revalidate(self, response, data=None):
+        return self.client.get(reverse('todoapp:home'), data, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_board_returns_304_with_one_query(self):
+        """Tests that revalidating an unchanged board costs a single query."""
+        response = self.client.get(reverse('todoapp:home'))
+
+        with self.assertNumQueries(AUTH_QUERIES + 1):
+            revalidated = self.revalidate(response)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_if_modified_since_alone(self):
+        """Tests that no Last-Modified is sent, since deletes and label
+        changes do not move it, so If-Modified-Since alone gets the board."""
+        response = self.client.get(reverse('todoapp:home'))
+        self.assertNotIn('Last-Modified', response)
+
+        self.todo.delete()
+        revalidated = self.client.get(reverse('todoapp:home'),
+                                      HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(revalidated.status_code, 200)
+
+    def test_changes_return_full_board(self):
+        """Tests that edits, deletes and label renames invalidate the ETag."""
+        def changed(change):
+            response = self.client.get(reverse('todoapp:home'))
+            change()
+            return self.revalidate(response).status_code == 200
+
+        self.assertTrue(changed(lambda: TodoList.objects.create(title='taxes', label=self.label)))
+        self.assertTrue(changed(lambda: TodoList.objects.filter(title='taxes').delete()))
+        self.assertTrue(changed(lambda: setattr(self.label, 'name', 'housework') or self.label.save()))
+
+    def test_new_csrf_token_returns_full_board(self):
+        """Tests that a board cached before the CSRF token rotated, as it
+        does at login, is not revalidated, so its forms keep working."""
+        self.user.set_password('secret')
+        self.user.save()
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.get(reverse('todoapp:home'))
+        self.assertEqual(client.get(reverse('todoapp:home'), HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                         304)
+
+        client.post(reverse('login'), {'username': 'alice', 'password': 'secret',
+                                       'csrfmiddlewaretoken': client.cookies['csrftoken'].value})
+        revalidated = client.get(reverse('todoapp:home'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 200)
+
+        token = re.search(r"name='csrfmiddlewaretoken' value='([^']+)'", revalidated.content.decode()).group(1)
+        response = client.post(reverse('todoapp:bulk_action'),
+                               {'action': 'complete', 'ids': [self.todo.pk], 'csrfmiddlewaretoken': token})
+        self.assertEqual(response.status_code, 302)
+
+    def test_filters_have_their_own_etag(self):
+        """Tests that a filtered board is not validated against the unfiltered one."""
+        response = self.client.get(reverse('todoapp:home'))
+        self.assertEqual(self.revalidate(response, {'q': 'laundry'}).status_code, 200)
+
+    def test_board_changes_at_midnight(self):
+        """Tests that the board is revalidated once overdue todos move to missed."""
+        self.todo.due_date = datetime(2012, 1, 14)
+        self.todo.save()
+        with freeze_time("2012-01-14 23:59:59"):
+            response = self.client.get(reverse('todoapp:home'))
+        with freeze_time("2012-01-15 00:00:01"):
+            self.assertEqual(self.revalidate(response).status_code, 200)
+
+
+class BulkActionViewTest(TestCase):
+    """Tests the board's complete and delete actions on selected todos."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.client = Client()
+        self.client.force_login(self.user)
+        label = Label.objects.create(owner=self.user, name='label_one')
+        self.todos = [TodoList.objects.create(title='todo_{0}'.format(i), label=label)
+                      for i in range(3)]
+        self.ids = [self.todos[0].pk, self.todos[1].pk]
+
+    def test_board_has_selection_form(self):
+        response = self.client.get(reverse('todoapp:home'))
+        self.assertContains(response, 'id="bulk-actions"')
+        self.assertContains(response, 'name="ids" value="{0}" form="bulk-actions"'.format(self.ids[0]))
+
+    def test_complete_selected(self):
+        self.client.get(reverse('todoapp:home'))
+
+        # The recurring todos among them, then the UPDATE.
+        with self.assertNumQueries(AUTH_QUERIES + 2):
+            response = self.client.post(reverse('todoapp:bulk_action'),
+                                        {'action': 'complete', 'ids': self.ids})
+        self.assertRedirects(response, reverse('todoapp:home'), fetch_redirect_response=False)
+
+        self.assertEqual(list(TodoList.objects.filter(status=TodoList.COMPLETED)
+                                              .order_by('pk').values_list('pk', flat=True)), self.ids)
+        board = self.client.get(reverse('todoapp:home')).context['todos_by_status']
+        self.assertEqual([todo.title for todo in board[0]['todos']], ['todo_2'])
+
+    def test_delete_selected(self):
+        with self.assertNumQueries(AUTH_QUERIES + 1):
+            self.client.post(reverse('todoapp:bulk_action'), {'action': 'delete', 'ids': self.ids})
+
+        self.assertEqual(list(TodoList.objects.values_list('title', flat=True)), ['todo_2'])
+
+    def test_invalid_requests(self):
+        for data in ({'ids': self.ids}, {'action': 'archive', 'ids': self.ids},
+                     {'action': 'delete', 'ids': ['one']}):
+            response = self.client.post(reverse('todoapp:bulk_action'), data)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(TodoList.objects.count(), 3)
+
 
 class CreateUpdateTodoViewTest(TestCase):
 
     def setUp(self):
+        self.user = User.objects.create_user('alice')
         self.client = Client()
+        self.client.force_login(self.user)
 
-        Label.objects.create(name='all')
-        self.label_1 = Label.objects.create(name='label_one')
+        Label.objects.create(owner=self.user, name='all')
+        self.label_1 = Label.objects.create(owner=self.user, name='label_one')
 
         self.todo_list = TodoList.objects.create(title='todo_one', label=self.label_1, status=TodoList.PENDING)
         self.todo_list2 = TodoList.objects.create(title='todo_two', label=self.label_1, status=TodoList.PENDING)
@@ -167,6 +621,24 @@ class CreateUpdateTodoViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(self.todo_list.status, TodoList.COMPLETED)
 
+    def test_complete_todo_is_one_update(self):
+        """Tests that completing a todo updates it in place and refreshes the board."""
+        self.client.get(reverse('todoapp:home'))
+
+        # The UPDATE, after checking whether the todo recurs.
+        with self.assertNumQueries(AUTH_QUERIES + 2):
+            response = self.client.get(reverse('todoapp:complete_todo', kwargs={'pk': self.todo_list.id}))
+        self.assertEqual(response.status_code, 302)
+
+        board = self.client.get(reverse('todoapp:home')).context['todos_by_status']
+        completed = [todo.title for todo in board[1]['todos']]
+        self.assertEqual(completed, ['todo_one'])
+
+    def test_complete_missing_todo(self):
+        """Tests that completing an unknown todo is a 404."""
+        response = self.client.get(reverse('todoapp:complete_todo', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+
     def test_create_label(self):
         """Tests that you can create label successfully. """
         data = {'name': 'label_two'}
@@ -174,3 +646,110 @@ class CreateUpdateTodoViewTest(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'label_two')
+
+
+class PartialUpdateTest(TestCase):
+    """Tests that AJAX writes answer with the changed card instead of a redirect."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.client = Client(HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.client.force_login(self.user)
+        self.label = Label.objects.create(owner=self.user, name='label_one')
+        self.todo = TodoList.objects.create(title='todo_one', label=self.label)
+
+    def test_complete_returns_card(self):
+        response = self.client.get(reverse('todoapp:complete_todo', kwargs={'pk': self.todo.pk}))
+        data = response.json()
+
+        self.assertEqual((data['id'], data['status']), (self.todo.pk, TodoList.COMPLETED))
+        self.assertIn('id="todo-{0}"'.format(self.todo.pk), data['html'])
+        self.assertNotIn('mark complete', data['html'])
+
+    def test_edit_returns_card_or_errors(self):
+        url = reverse('todoapp:edit_todo', kwargs={'pk': self.todo.pk})
+        data = {'title': 'todo_one_edited', 'label': self.label.pk, 'status': TodoList.PENDING,
+                'due_date': '2000-01-01'}
+        card = self.client.post(url, data).json()
+
+        self.assertEqual(card['status'], TodoList.MISSED)
+        self.assertIn('todo_one_edited', card['html'])
+
+        response = self.client.post(url, dict(data, title=''))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.json()['errors'])
+
+    def test_delete(self):
+        response = self.client.post(reverse('todoapp:delete_todo', kwargs={'pk': self.todo.pk}))
+
+        self.assertEqual(response.json(), {'id': self.todo.pk, 'deleted': True})
+
+    def test_card_view(self):
+        response = self.client.get(reverse('todoapp:todo_card', kwargs={'pk': self.todo.pk}))
+        self.assertEqual(response.json()['status'], TodoList.PENDING)
+
+        response = self.client.get(reverse('todoapp:todo_card', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+
+
+class OwnerTest(TestCase):
+    """Tests that each user sees and changes only their own todos and labels."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.other = User.objects.create_user('bob')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        self.label = Label.objects.create(owner=self.user, name='chore')
+        self.todo = TodoList.objects.create(title='laundry', label=self.label)
+        self.other_label = Label.objects.create(owner=self.other, name='chore')
+        self.other_todo = TodoList.objects.create(title='laundry', label=self.other_label)
+
+    def test_anonymous_visitors_are_sent_to_login(self):
+        response = Client().get(reverse('todoapp:home'))
+        self.assertRedirects(response, '{0}?next={1}'.format(reverse('login'), reverse('todoapp:home')))
+
+    def test_board_shows_own_todos(self):
+        response = self.client.get(reverse('todoapp:home'), {'label': 'chore'})
+
+        todos = [todo for column in response.context['todos_by_status'] for todo in column['todos']]
+        self.assertEqual(todos, [self.todo])
+        self.assertEqual(response.context['labels'], [self.label])
+        self.assertEqual(response.context['label_chips'], [(self.label, 1)])
+
+    def test_other_users_todos_cannot_be_changed(self):
+        urls = [reverse('todoapp:edit_todo', args=[self.other_todo.pk]),
+                reverse('todoapp:todo_card', args=[self.other_todo.pk]),
+                reverse('todoapp:complete_todo', args=[self.other_todo.pk])]
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.post(reverse('todoapp:delete_todo', args=[self.other_todo.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.client.post(reverse('todoapp:bulk_action'), {'action': 'delete', 'ids': [self.other_todo.pk]})
+
+        self.other_todo.refresh_from_db()
+        self.assertEqual(self.other_todo.status, TodoList.PENDING)
+
+    def test_titles_are_unique_per_owner(self):
+        data = {'title': 'laundry', 'label': self.label.pk, 'status': TodoList.PENDING}
+        response = self.client.post(reverse('todoapp:new_todo'), data)
+        self.assertFormError(response, 'form', 'title', 'Todo list with this Title already exists.')
+
+        response = self.client.post(reverse('todoapp:edit_todo', args=[self.todo.pk]), data)
+        self.assertEqual(response.status_code, 302)
+
+    def test_other_users_labels_cannot_be_used(self):
+        data = {'title': 'dishes', 'label': self.other_label.pk, 'status': TodoList.PENDING}
+        response = self.client.post(reverse('todoapp:new_todo'), data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(TodoList.objects.filter(title='dishes').exists())
+
+    def test_label_slugs_are_unique_per_owner(self):
+        response = self.client.post(reverse('todoapp:new_label'), {'name': 'Chore'})
+        self.assertFormError(response, 'form', None, 'This label already exists.')
+
+        response = self.client.post(reverse('todoapp:new_label'), {'name': 'errand'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Label.objects.get(slug='errand').owner, self.user)
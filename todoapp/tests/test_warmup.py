@@ -0,0 +1,34 @@
+import os
+
+from django.conf import settings
+from django.db import connection
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import get_resolver
+
+from todoapp.warmup import warm_up
+
+CACHED_TEMPLATES = [{
+    'BACKEND': 'todoapp.metrics.TimedTemplates',
+    'DIRS': [os.path.join(settings.BASE_DIR, 'templates')],
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])],
+    },
+}]
+
+
+class WarmUpTest(TestCase):
+    """Tests that the warm-up leaves templates, URLs and the database ready."""
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_warm_up(self):
+        timings = warm_up()
+
+        self.assertEqual(set(timings), {'warm_templates', 'warm_urls', 'warm_database', 'warm_orm'})
+        self.assertIsNotNone(connection.connection)
+        self.assertTrue(get_resolver()._populated)
+        loader = engines.all()[0].engine.template_loaders[0]
+        self.assertIn('todoapp/home.html', loader.get_template_cache)
@@ -0,0 +1,201 @@
+"""Streaming CSV / NDJSON dumps of labels and todos.
+
+A dump is a sequence of records. Label records come first so that labels
+without todos survive a round trip; todo records refer to their label by
+slug. Dumps hold one owner's labels and todos, or everyone's for a backup,
+and are always loaded into one owner's. Neither direction ever holds more
+than one chunk of rows in memory.
+"""
+import csv
+import json
+from datetime import datetime
+
+from django.db import transaction
+
+from .cache import bump_version
+from .models import Label, TodoList, label_registry
+from .recurrence import normalize
+from .tenants import todo_database
+
+
+FORMATS = ('csv', 'ndjson')
+
+FIELDS = ('kind', 'title', 'details', 'due_date', 'status', 'label_slug', 'label_name',
+          'recurrence')
+
+TODO_FIELDS = ('title', 'details', 'due_date', 'status', 'label__slug', 'label__name', 'recurrence')
+
+
+class TransferError(Exception):
+    pass
+
+
+def records(owner=None):
+    """Yields owner's labels, then their todos, as dicts keyed by FIELDS.
+
+    Without an owner, yields everyone's.
+    """
+    labels = Label.objects.order_by('pk')
+    todo_lists = TodoList.objects.order_by('pk')
+    if owner is not None:
+        labels = labels.filter(owner=owner)
+        todo_lists = todo_lists.filter(owner=owner)
+
+    for slug, name in labels.values_list('slug', 'name').iterator():
+        yield {'kind': 'label', 'label_slug': slug, 'label_name': name}
+
+    todo_lists = todo_lists.values_list(*TODO_FIELDS)
+    for title, details, due_date, status, slug, name, recurrence in todo_lists.iterator():
+        yield {'kind': 'todo', 'title': title, 'details': details,
+               'due_date': due_date.isoformat() if due_date else '',
+               'status': status, 'label_slug': slug, 'label_name': name,
+               'recurrence': recurrence}
+
+
+def export(stream, format='csv', chunk_size=1000, owner=None):
+    """Writes a dump of owner's todos, or everyone's, to stream, flushing
+    every chunk_size records.
+
+    Returns the number of records written.
+    """
+    buffer = []
+    if format == 'csv':
+        writer = csv.DictWriter(_ListWriter(buffer), fieldnames=FIELDS, restval='')
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(record):
+            buffer.append(json.dumps(record) + '\n')
+
+    count = 0
+    for record in records(owner):
+        write(record)
+        count += 1
+        if len(buffer) >= chunk_size:
+            stream.write(''.join(buffer))
+            del buffer[:]
+    if buffer:
+        stream.write(''.join(buffer))
+    return count
+
+
+class _ListWriter(object):
+    """File-like object that csv writers append lines to."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def write(self, line):
+        self.lines.append(line)
+
+
+def read(stream, format='csv'):
+    """Yields (line number, record) pairs from a dump."""
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    raise TransferError('Line {0}: invalid JSON.'.format(line_number))
+
+
+class Importer(object):
+    """Loads a dump into owner's todos in batches, one transaction per batch.
+
+    Labels are resolved through a single slug -> id map; labels the dump
+    refers to but does not define are created on the fly. Todos whose title
+    owner already has are skipped.
+    """
+
+    def __init__(self, owner, batch_size=1000):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.label_ids = dict(Label.objects.filter(owner=owner).values_list('slug', 'pk'))
+        self.label_names = {}
+        self.todos = []
+        self.created_labels = 0
+        self.created_todos = 0
+        self.skipped_todos = 0
+
+    def load(self, stream, format='csv'):
+        for line_number, record in read(stream, format):
+            kind = record.get('kind')
+            if kind == 'label':
+                self.add_label(record)
+            elif kind == 'todo':
+                todo = self.todo(line_number, record)
+                self.todos.append((record['label_slug'], todo))
+                if len(self.todos) >= self.batch_size:
+                    self.flush()
+            else:
+                raise TransferError('Line {0}: unknown record kind {1!r}.'.format(line_number, kind))
+        self.flush()
+
+    def add_label(self, record):
+        slug = record.get('label_slug')
+        if slug and slug not in self.label_ids:
+            self.label_names[slug] = record.get('label_name') or slug
+
+    def todo(self, line_number, record):
+        status = record.get('status') or TodoList.PENDING
+        if status not in dict(TodoList.STATUS_CHOICES):
+            raise TransferError('Line {0}: unknown status {1!r}.'.format(line_number, status))
+        if not record.get('title') or not record.get('label_slug'):
+            raise TransferError('Line {0}: title and label_slug are required.'.format(line_number))
+
+        due_date = record.get('due_date') or None
+        if due_date:
+            try:
+                due_date = datetime.strptime(due_date, '%Y-%m-%d').date()
+            except ValueError:
+                raise TransferError('Line {0}: invalid due date {1!r}.'.format(line_number, due_date))
+
+        recurrence = record.get('recurrence') or ''
+        if recurrence:
+            if due_date is None:
+                raise TransferError('Line {0}: a recurring todo needs a due date.'.format(line_number))
+            try:
+                recurrence = normalize(recurrence, due_date)
+            except ValueError:
+                raise TransferError('Line {0}: invalid recurrence {1!r}.'.format(line_number, recurrence))
+
+        self.add_label(record)
+        return TodoList(owner=self.owner, title=record['title'], details=record.get('details') or '',
+                        due_date=due_date, status=status, recurrence=recurrence)
+
+    def flush(self):
+        """Creates pending labels and the batch of todos in one transaction."""
+        if not self.todos and not self.label_names:
+            return
+
+        with transaction.atomic(using=todo_database()):
+            if self.label_names:
+                Label.objects.bulk_create(Label(owner=self.owner, slug=slug, name=name)
+                                          for slug, name in self.label_names.items())
+                self.label_ids.update(Label.objects.filter(owner=self.owner,
+                                                           slug__in=self.label_names)
+                                                   .values_list('slug', 'pk'))
+                self.created_labels += len(self.label_names)
+                self.label_names = {}
+                label_registry.clear()
+
+            titles = [todo.title for slug, todo in self.todos]
+            existing = set(TodoList.objects.filter(owner=self.owner, title__in=titles)
+                                           .values_list('title', flat=True))
+            batch = {}
+            for slug, todo in self.todos:
+                if todo.title in existing or todo.title in batch:
+                    self.skipped_todos += 1
+                    continue
+                todo.label_id = self.label_ids[slug]
+                batch[todo.title] = todo
+            TodoList.objects.bulk_create(batch.values())
+
+        self.created_todos += len(batch)
+        self.todos = []
+        bump_version()
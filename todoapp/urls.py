@@ -1,11 +1,26 @@
 from django.conf.urls import url
+from django.contrib import admin
+from .api import (TodoBulkCreateView, TodoBulkUpdateView, TodoBulkCompleteView,
+                  TodoBulkDeleteView, LabelBulkCreateView,)
 from .views import (HomeView, CreateUpdateTodoView, DeleteTodoView,
-                    CompleteTodoView, CreateLabelView,)
+                    CompleteTodoView, BulkActionView, CreateLabelView,
+                    StatusColumnView, BoardCacheStatsView, MetricsView,
+                    ProfileListView, ArchiveView, TodoCardView, EventStreamView,)
 
 
 app_name = 'todoapp'
 urlpatterns = [
     url(r'^$', HomeView.as_view(), name='home'),
+    url(r'^column/(?P<status>\w+)$', StatusColumnView.as_view(),
+        name='status_column'),
+    url(r'^cache_stats$', BoardCacheStatsView.as_view(),
+        name='cache_stats'),
+    url(r'^metrics$', MetricsView.as_view(), name='metrics'),
+    url(r'^profiles$', admin.site.admin_view(ProfileListView.as_view()),
+        name='profiles'),
+    url(r'^events$', EventStreamView.as_view(), name='events'),
+    url(r'^(?P<pk>[0-9]+)/card$', TodoCardView.as_view(), name='todo_card'),
+    url(r'^archive$', ArchiveView.as_view(), name='archive'),
     url(r'^new$', CreateUpdateTodoView.as_view(), name='new_todo'),
     url(r'^(?P<pk>[0-9]+)/edit$',
         CreateUpdateTodoView.as_view(),
@@ -16,5 +31,16 @@ urlpatterns = [
     url(r'^(?P<pk>[0-9]+)/complete$',
         CompleteTodoView.as_view(),
         name='complete_todo'),
+    url(r'^bulk$', BulkActionView.as_view(), name='bulk_action'),
     url(r'^new_label$', CreateLabelView.as_view(), name='new_label'),
+    url(r'^api/todos/create$', TodoBulkCreateView.as_view(),
+        name='api_create_todos'),
+    url(r'^api/todos/update$', TodoBulkUpdateView.as_view(),
+        name='api_update_todos'),
+    url(r'^api/todos/complete$', TodoBulkCompleteView.as_view(),
+        name='api_complete_todos'),
+    url(r'^api/todos/delete$', TodoBulkDeleteView.as_view(),
+        name='api_delete_todos'),
+    url(r'^api/labels/create$', LabelBulkCreateView.as_view(),
+        name='api_create_labels'),
 ]
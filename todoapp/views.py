@@ -1,99 +1,393 @@
-from datetime import datetime
-
+import hashlib
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Count, Max
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
+from django.middleware.csrf import get_token
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.views import View
-from django.db.models import Q
 from django.urls import reverse
-
-from .models import Label, TodoList
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag, urlencode
+from django.utils.decorators import method_decorator
+from django.utils.text import slugify
+
+from .board import (board_by_status, board_status, column_page, ordered_todolists,
+                    status_column)
+from .cache import ColumnCache, bump_version, cached, data_version, stats as cache_stats
+from .counts import board_counts, label_totals, status_totals
+from .db import retry_on_lock
+from .events import Subscription, broker, publish
+from .metrics import registry as metrics_registry
+from .models import ArchivedTodo, Label, TodoList, label_registry, local_today
+from .profiling import list_profiles
 from .forms import SearchForm, TodoForm, LabelForm
+from .search import IContainsSearchBackend, get_search_backend
+from .tenants import todo_database, using_database
+
+
+# Stands in for the columns when the page shell is rendered for streaming.
+COLUMNS_PLACEHOLDER = 'todoapp-board-columns-placeholder'
+
+
+def board_todolists(request):
+    """Applies the label filter and search from the query string to the
+    signed-in user's todos.
+
+    Returns the filtered todos and any extra ordering the search imposes.
+    """
+    todo_lists = TodoList.objects.filter(owner=request.user)
+
+    selected_label = request.GET.get('label')
+    if selected_label:
+        label = label_registry.get(request.user.pk, slugify(selected_label), reload=True)
+        todo_lists = todo_lists.filter(label_id=label.pk) if label else todo_lists.none()
+
+    ordering = ()
+    q = request.GET.get('q')
+    if q:
+        form = SearchForm(request.GET)
+        if form.is_valid():
+            q = form.cleaned_data.get('q')
+            search_backend = get_search_backend()
+            todo_lists = search_backend.filter(todo_lists, q)
+            ordering = search_backend.ordering
+
+    return todo_lists, ordering
+
+
+def next_page_url(request, status, cursor):
+    """URL of the status column fragment holding the page after cursor."""
+    if cursor is None:
+        return None
+
+    params = {key: request.GET[key] for key in ('label', 'q') if request.GET.get(key)}
+    params['after'] = cursor
+    return '{0}?{1}'.format(reverse('todoapp:status_column', args=[status]),
+                            urlencode(params))
+
+
+def card_response(request, todo):
+    """One card as JSON, for patching the board in place: the todo's id,
+    the column it belongs in and its markup."""
+    status = board_status(todo, local_today())
+    html = render_to_string('todoapp/todo_cards.html',
+                            {'status': status, 'status_todos': [todo]}, request)
+    return JsonResponse({'id': todo.pk, 'status': status, 'html': html})
+
+
+class HomeView(LoginRequiredMixin, View):
+
+    def columns(self, request, statuses, today, single_query=None):
+        """Queries the given status columns."""
+        todo_lists, ordering = board_todolists(request)
+
+        # Ranked search results come in one piece: the rank moves with every
+        # write, so it makes no stable cursor.
+        page_size = getattr(settings, 'TODO_BOARD_PAGE_SIZE', None)
+        if page_size and not ordering:
+            todos_by_status = []
+            for status in statuses:
+                todos, cursor = column_page(status_column(todo_lists, status, today), page_size)
+                todos_by_status.append({'status': status, 'todos': todos,
+                                        'next_url': next_page_url(request, status, cursor)})
+            return todos_by_status
+
+        if single_query is None:
+            single_query = getattr(settings, 'TODO_BOARD_SINGLE_QUERY', True)
+        if single_query or ordering:
+            return [column for column in board_by_status(todo_lists, today, ordering)
+                    if column['status'] in statuses]
+
+        todo_lists = todo_lists.select_related('label')
+        return [{'status': status, 'todos': ordered_todolists(status_column(todo_lists, status, today))}
+                for status in statuses]
+
+    def etag(self, request, variant):
+        """Returns the ETag of the board.
+
+        Costs one aggregate query. Besides the newest change to a todo, the
+        ETag covers the row count, which catches deletes, and the data
+        version, which catches label changes. No Last-Modified is sent, as
+        no timestamp moves with those. The page embeds the CSRF token, so
+        the ETag covers it too: a page kept after login rotates the token
+        would fail every form post.
+        """
+        todo_lists, _ = board_todolists(request)
+        state = todo_lists.aggregate(last_modified=Max('date_modified'), count=Count('pk'))
+
+        get_token(request)
+        return hashlib.md5(repr((variant, state['last_modified'], state['count'], data_version(),
+                                 request.META['CSRF_COOKIE'])).encode('utf-8')).hexdigest()
+
+    def get(self, request):
+        today = local_today()
+        variant = (
+            request.user.pk, request.GET.get('label'), request.GET.get('q'), today,
+            getattr(settings, 'TODO_BOARD_PAGE_SIZE', None),
+            getattr(settings, 'TODO_BOARD_SINGLE_QUERY', True),
+            getattr(settings, 'TODO_BOARD_STREAMING', False),
+        )
+
+        etag = self.etag(request, variant)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if getattr(settings, 'TODO_BOARD_STREAMING', False):
+                response = self.stream_board(request, today, variant)
+            else:
+                response = self.render_board(request, today, variant)
+        response['ETag'] = quote_etag(etag)
+        return response
+
+    def counts(self, request, today):
+        """Returns the labels, the label chips with their counts, and the
+        column counts.
+
+        Column counts are None while searching, which the counters cannot
+        answer.
+        """
+        owner_id = request.user.pk
+        counts = cached('counts', lambda: board_counts(owner_id, today), owner_id, today)
+        labels = label_registry.all(owner_id)
+        per_label = label_totals(counts)
+        label_chips = [(label, per_label[label.pk]) for label in labels]
+
+        if request.GET.get('q'):
+            return labels, label_chips, None
+        selected_label = request.GET.get('label')
+        if selected_label:
+            label = label_registry.get(owner_id, slugify(selected_label), reload=True)
+            return labels, label_chips, status_totals(counts, label.pk if label else 0)
+        return labels, label_chips, status_totals(counts)
+
+    def add_counts(self, columns, column_counts):
+        for column in columns:
+            column['count'] = None if column_counts is None else column_counts[column['status']]
+        return columns
+
+    def render_board(self, request, today, variant):
+        labels, label_chips, column_counts = self.counts(request, today)
+        statuses = [status for status, _ in TodoList.STATUS_CHOICES]
+
+        column_cache = ColumnCache(request, variant)
+        html = column_cache.get_many(statuses)
+        missing = [status for status in statuses if status not in html]
+
+        columns = {}
+        if missing:
+            columns = {column['status']: column for column in
+                       self.add_counts(self.columns(request, missing, today), column_counts)}
+            html.update(column_cache.render_many(columns.values()))
+
+        # Columns served from the cache carry only their status and markup.
+        todos_by_status = [dict(columns.get(status, {'status': status}),
+                                html=column_cache.finish(html[status]))
+                           for status in statuses]
+
+        context = {
+            'labels': labels,
+            'label_chips': label_chips,
+            'todos_by_status': todos_by_status
+        }
+        return render(request, 'todoapp/home.html', context)
+
+    def stream_board(self, request, today, variant):
+        """Sends the page shell at once, then each column as it is ready.
+
+        Columns are queried one at a time, so the single-query board does
+        not apply.
+        """
+        labels, label_chips, column_counts = self.counts(request, today)
+        context = {
+            'labels': labels,
+            'label_chips': label_chips,
+            'todos_by_status': [{'html': COLUMNS_PLACEHOLDER}],
+        }
+        head, tail = render_to_string('todoapp/home.html', context, request).split(COLUMNS_PLACEHOLDER)
+        column_cache = ColumnCache(request, variant)
+        # The columns are rendered after the middleware has run, which is too
+        # late for the CSRF cookie to be set unless the token is used now,
+        # and for TenantMiddleware to route their queries.
+        get_token(request)
+        alias = todo_database()
+
+        def board():
+            yield head
+            for status, _ in TodoList.STATUS_CHOICES:
+                with using_database(alias):
+                    html = column_cache.get_many([status]).get(status)
+                    if html is None:
+                        columns = self.add_counts(
+                            self.columns(request, [status], today, single_query=False), column_counts)
+                        html = column_cache.render_many(columns)[status]
+                yield column_cache.finish(html)
+            yield tail
+
+        return StreamingHttpResponse(board())
+
+
+class BoardCacheStatsView(View):
+    """Reports how often board columns were served from the cache."""
+
+    def get(self, request):
+        return JsonResponse(dict(cache_stats(), version=data_version()))
 
 
-def sort_todolists(todolists):
-    lists_with_due_date = []
-    lists_without_due_date = []
+class MetricsView(View):
+    """Serves the request metrics of this process to Prometheus."""
 
-    for todolist in todolists:
-        if todolist.due_date:
-            lists_with_due_date.append(todolist)
+    def get(self, request):
+        if not getattr(settings, 'TODO_METRICS', False):
+            raise Http404
+        return HttpResponse(metrics_registry.exposition(),
+                            content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ProfileListView(View):
+    """Lists the newest request profiles with their slowest functions."""
+
+    def get(self, request):
+        context = dict(admin.site.each_context(request), profiles=list_profiles())
+        return render(request, 'todoapp/profiles.html', context)
+
+
+class StatusColumnView(LoginRequiredMixin, View):
+    """Renders the next page of cards of one status column."""
+
+    def get(self, request, status):
+        if status not in dict(TodoList.STATUS_CHOICES):
+            raise Http404
+        todo_lists, ordering = board_todolists(request)
+        today = local_today()
+
+        if ordering:
+            # Ranked search results are not paged; see HomeView.columns.
+            todos = [column for column in board_by_status(todo_lists, today, ordering)
+                     if column['status'] == status][0]['todos']
+            cursor = None
         else:
-            lists_without_due_date.append(todolist)
+            page_size = getattr(settings, 'TODO_BOARD_PAGE_SIZE', None) or 50
+            column = status_column(todo_lists, status, today)
+            try:
+                todos, cursor = column_page(column, page_size, request.GET.get('after'))
+            except (ValueError, OverflowError):
+                return HttpResponseBadRequest('Invalid cursor.')
 
-    lists_with_due_date.sort(key=lambda todolist: todolist.due_date)
-    lists_without_due_date.sort(key=lambda todolist: todolist.date_created)
+        context = {
+            'status': status,
+            'status_todos': todos,
+            'next_url': next_page_url(request, status, cursor)
+        }
+        return render(request, 'todoapp/todo_cards.html', context)
 
-    return lists_with_due_date + lists_without_due_date
 
+class ArchiveView(LoginRequiredMixin, View):
+    """Pages through archived todos, newest first, with their own search.
 
-class HomeView(View):
+    The archive has no full-text index, so search is a substring match.
+    """
 
     def get(self, request):
-        labels = Label.objects.all()
-        todo_lists = TodoList.objects.all()
+        todos = ArchivedTodo.objects.filter(owner=request.user).select_related('label').order_by('-pk')
 
         selected_label = request.GET.get('label')
         if selected_label:
-            todo_lists = todo_lists.filter(label__name=selected_label)
+            label = label_registry.get(request.user.pk, slugify(selected_label), reload=True)
+            todos = todos.filter(label_id=label.pk) if label else todos.none()
 
-        q = request.GET.get('q')
-        if q:
+        if request.GET.get('q'):
             form = SearchForm(request.GET)
             if form.is_valid():
-                q = form.cleaned_data.get('q')
-                todo_lists = todo_lists.filter(Q(title__icontains=q) |
-                                               Q(details__icontains=q) |
-                                               Q(label__name__icontains=q)
-                                               )
-
-        pending_todos = todo_lists.filter(status=TodoList.PENDING)
-        skipped_todos = pending_todos.filter(due_date__isnull=False,
-                                             due_date__lt=datetime.now())
-        # Update skipped todos to missed
-        skipped_todos.update(status=TodoList.MISSED)
-        missed_todos = todo_lists.filter(status=TodoList.MISSED)
-        completed_todos = todo_lists.filter(status=TodoList.COMPLETED)
-
-        todos_by_status = [
-            {'status': TodoList.PENDING, 'todos': sort_todolists(pending_todos)},
-            {'status': TodoList.COMPLETED, 'todos': sort_todolists(completed_todos)},
-            {'status': TodoList.MISSED, 'todos': sort_todolists(missed_todos)}
-        ]
+                todos = IContainsSearchBackend().filter(todos, form.cleaned_data['q'])
+
+        before = request.GET.get('before')
+        if before:
+            try:
+                todos = todos.filter(pk__lt=int(before))
+            except ValueError:
+                return HttpResponseBadRequest('Invalid cursor.')
+
+        page_size = getattr(settings, 'TODO_ARCHIVE_PAGE_SIZE', 50)
+        todos = list(todos[:page_size + 1])
+        next_url = None
+        if len(todos) > page_size:
+            todos = todos[:page_size]
+            params = {key: request.GET[key] for key in ('label', 'q') if request.GET.get(key)}
+            params['before'] = todos[-1].pk
+            next_url = '{0}?{1}'.format(reverse('todoapp:archive'), urlencode(params))
 
         context = {
-            'labels': labels,
-            'todos_by_status': todos_by_status
+            'labels': label_registry.all(request.user.pk),
+            'todos': todos,
+            'next_url': next_url,
         }
-        return render(request, 'todoapp/home.html', context)
+        return render(request, 'todoapp/archive.html', context)
+
+
+class TodoCardView(LoginRequiredMixin, View):
+    """Serves one card, for boards patching themselves from the event stream."""
+
+    def get(self, request, pk):
+        todo_lists = TodoList.objects.filter(owner=request.user).select_related('label')
+        return card_response(request, get_object_or_404(todo_lists, pk=pk))
 
 
-class CreateUpdateTodoView(View):
+class EventStreamView(LoginRequiredMixin, View):
+    """Streams changes to the user's todos as Server-Sent Events; see
+    todoapp/events.py."""
+
+    def get(self, request):
+        try:
+            last_event_id = int(request.META['HTTP_LAST_EVENT_ID'])
+        except (KeyError, ValueError):
+            last_event_id = None
+
+        response = StreamingHttpResponse(Subscription(broker, last_event_id, request.user.pk),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Tells nginx not to buffer the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class CreateUpdateTodoView(LoginRequiredMixin, View):
 
     def get(self, request, *args, **kwargs):
         pk = kwargs.get('pk')
-        form = TodoForm()
+        form = TodoForm(owner=request.user)
 
         if pk is not None:
-            todo = get_object_or_404(TodoList, pk=pk)
-            form = TodoForm(instance=todo)
+            todo = get_object_or_404(TodoList, pk=pk, owner=request.user)
+            form = TodoForm(instance=todo, owner=request.user)
 
         context = {
             'form': form
         }
         return render(request, 'todoapp/create_edit.html', context)
 
+    @method_decorator(retry_on_lock)
     def post(self, request, *args, **kwargs):
         pk = kwargs.get('pk')
 
         if pk is not None:
-            todo = get_object_or_404(TodoList, pk=pk)
-            form = TodoForm(request.POST, instance=todo)
+            todo = get_object_or_404(TodoList, pk=pk, owner=request.user)
+            form = TodoForm(request.POST, instance=todo, owner=request.user)
         else:
-            form = TodoForm(request.POST)
+            form = TodoForm(request.POST, owner=request.user)
 
         if form.is_valid():
-            form.save()
+            todo = form.save()
+            if request.is_ajax():
+                return card_response(request, todo)
             return redirect(reverse('todoapp:home'))
 
+        if request.is_ajax():
+            return JsonResponse({'errors': form.errors}, status=400)
+
         context = {
             'form': form
         }
@@ -101,29 +395,62 @@ class CreateUpdateTodoView(View):
         return render(request, 'todoapp/create_edit.html', context)
 
 
-class DeleteTodoView(View):
+class DeleteTodoView(LoginRequiredMixin, View):
 
+    @method_decorator(retry_on_lock)
     def post(self, request, *args, **kwargs):
         pk = kwargs.get('pk')
 
-        todo = get_object_or_404(TodoList, pk=pk)
+        todo = get_object_or_404(TodoList, pk=pk, owner=request.user)
         todo.delete()
+        if request.is_ajax():
+            return JsonResponse({'id': int(pk), 'deleted': True})
         return redirect(reverse('todoapp:home'))
 
 
-class CompleteTodoView(View):
+class CompleteTodoView(LoginRequiredMixin, View):
 
+    @method_decorator(retry_on_lock)
     def get(self, request, *args, **kwargs):
         pk = kwargs.get('pk')
 
-        todo = get_object_or_404(TodoList, pk=pk)
+        # Only the status changes, so update just that rather than loading
+        # the todo and saving every column back.
+        if not TodoList.objects.filter(pk=pk, owner=request.user).complete():
+            raise Http404
+        bump_version()
+        publish('saved', [int(pk)], request.user.pk)
+        if request.is_ajax():
+            return card_response(request, TodoList.objects.select_related('label').get(pk=pk))
+        return redirect(reverse('todoapp:home'))
+
 
-        todo.status = TodoList.COMPLETED
-        todo.save()
+class BulkActionView(LoginRequiredMixin, View):
+    """Completes or deletes the todos selected on the board in one statement."""
+
+    # Each action maps to the queryset method and the event it publishes.
+    actions = {
+        'complete': (lambda todo_lists: todo_lists.complete(), 'saved'),
+        'delete': (lambda todo_lists: todo_lists.delete_rows(), 'deleted'),
+    }
+
+    @method_decorator(retry_on_lock)
+    def post(self, request):
+        action, event = self.actions.get(request.POST.get('action'), (None, None))
+        try:
+            ids = [int(pk) for pk in request.POST.getlist('ids')]
+        except ValueError:
+            ids = None
+        if action is None or ids is None:
+            return HttpResponseBadRequest('Expected an action and a list of todo ids.')
+
+        if ids and action(TodoList.objects.filter(pk__in=ids, owner=request.user)):
+            bump_version()
+            publish(event, ids, request.user.pk)
         return redirect(reverse('todoapp:home'))
 
 
-class CreateLabelView(View):
+class CreateLabelView(LoginRequiredMixin, View):
 
     def get(self, request):
         form = LabelForm()
@@ -131,8 +458,9 @@ class CreateLabelView(View):
         context = {'form': form}
         return render(request, 'todoapp/create_label.html', context)
 
+    @method_decorator(retry_on_lock)
     def post(self, request, *args, **kwargs):
-        form = LabelForm(request.POST)
+        form = LabelForm(request.POST, instance=Label(owner=request.user))
 
         if form.is_valid():
             form.save()
@@ -0,0 +1,75 @@
+"""Does at boot the work Django otherwise leaves to the first requests.
+
+Called from todo/wsgi.py when TODO_PRODUCTION_STARTUP is on: parses the
+board templates into the cached loader, compiles and indexes every URL
+pattern, builds model metadata and forms, loads the label registry and
+opens the database connections.
+"""
+import logging
+import time
+
+from django.apps import apps
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import RegexURLResolver, get_resolver, resolve, reverse
+
+logger = logging.getLogger(__name__)
+
+# Parsed at boot. todo_cards.html is included by todo_status_snippet.html,
+# and includes are only loaded when rendered.
+TEMPLATES = ('base.html', 'todoapp/home.html', 'todoapp/create_edit.html',
+             'todoapp/todo_status_snippet.html', 'todoapp/todo_cards.html')
+
+
+def warm_templates():
+    for name in TEMPLATES:
+        get_template(name)
+
+
+def warm_urls():
+    """Compiles every pattern's regex and builds each resolver's reverse
+    lookups, which Django otherwise does on the first resolve or reverse."""
+    def walk(resolver):
+        resolver.reverse_dict
+        for pattern in resolver.url_patterns:
+            pattern.regex
+            if isinstance(pattern, RegexURLResolver):
+                walk(pattern)
+
+    walk(get_resolver())
+    resolve(reverse('todoapp:home'))
+
+
+def warm_orm():
+    """Builds the field and relation caches of every model, and the forms.
+
+    Labels are loaded per owner, on each owner's first request.
+    """
+    from .forms import LabelForm, SearchForm, TodoForm
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+    TodoForm(), LabelForm(), SearchForm()
+
+
+def warm_database():
+    """Opens a connection to every database for the importing thread.
+
+    Under a preforking server, import todo.wsgi in each worker rather than
+    in the master, so workers do not share the master's connections.
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def warm_up():
+    """Runs every warm-up step and returns {step: seconds}."""
+    timings = {}
+    for step in (warm_templates, warm_urls, warm_database, warm_orm):
+        start = time.perf_counter()
+        step()
+        timings[step.__name__] = time.perf_counter() - start
+    logger.info('Warmed up in %.0f ms (%s)', sum(timings.values()) * 1000,
+                ', '.join('{0} {1:.0f} ms'.format(name, seconds * 1000)
+                          for name, seconds in timings.items()))
+    return timings